@@ -1,32 +1,25 @@
 ﻿# conftest.py
 import os
+import json
+import time
 import pytest
+import allure
 from datetime import datetime
 
 # Appium / Selenium imports
-from appium import webdriver
 from appium.webdriver.common.appiumby import AppiumBy
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
-# Try importing AppiumOptions from likely locations (compatible with multiple client versions)
-try:
-    # appium-python-client >= 3.x
-    from appium.options.common.base import AppiumOptions
-except Exception:
-    try:
-        # older packaging path
-        from appium.options.appium_options import AppiumOptions
-    except Exception:
-        # minimal fallback options-like object
-        class AppiumOptions(dict):
-            def set_capability(self, k, v):
-                self[k] = v
-            def to_capabilities(self):
-                return dict(self)
-            def load_capabilities(self, caps):
-                for k, v in caps.items():
-                    self.set_capability(k, v)
+from pages.locator_cache import LocatorCache, configure_locator_cache, get_locator_cache
+from pages import waits
+from pages.locator_rewrite import install_locator_rewriting, rewrite_report
+from pages import app_state, screen_graph
+from utils.driver_pool import DriverPool, wait_for_login_screen
+from utils.wd_trace import install_trace, trace_for
+from utils.artifacts import ArtifactStore
+from utils import allure_summary, session_factory, session_status
+from utils.duration_scheduler import SCHEDULER_ENABLED, DurationModel, LPTScheduling, lpt_order, plan_summary
 
 # Default BrowserStack creds (override with env vars in CI)
 DEFAULT_BS_USER = os.environ.get("BROWSERSTACK_USERNAME", "sandeeppandey_3z5YkG")
@@ -36,111 +29,289 @@ DEFAULT_BS_APP = os.environ.get("BROWSERSTACK_APP", "bs://bb87d435f3c19f20eb1118
 ARTIFACTS_DIR = os.path.join(os.getcwd(), "artifacts")
 os.makedirs(ARTIFACTS_DIR, exist_ok=True)
 
+# per-build record of which locator candidates win, shared across runs (and xdist workers)
+LOCATOR_CACHE_PATH = os.environ.get("LOCATOR_CACHE_PATH", os.path.join(os.getcwd(), ".locator_cache.json"))
+
+# BrowserStack account concurrency limit; caps the number of xdist workers (one session each)
+PARALLEL_SESSION_LIMIT = int(os.environ.get("BROWSERSTACK_PARALLELS", "2"))
+
+# recycle sessions between tests (DRIVER_REUSE=0: fresh session per test)
+DRIVER_REUSE = os.environ.get("DRIVER_REUSE", "1") != "0"
+# boot the next session in the background while the current test runs (costs one extra device per
+# worker); only with DRIVER_REUSE=0, a reused session needs no replacement
+DRIVER_PREWARM = os.environ.get("DRIVER_PREWARM", "0") == "1" and not DRIVER_REUSE
+
+# run tests that start from the same app state back to back (APP_STATE_GROUPING=0 keeps the LPT order)
+APP_STATE_GROUPING = os.environ.get("APP_STATE_GROUPING", "1") != "0"
+
+def _credentials():
+    """BrowserStack (user, key) the sessions are opened with, and their statuses reported with."""
+    return (os.environ.get("BROWSERSTACK_USERNAME", DEFAULT_BS_USER),
+            os.environ.get("BROWSERSTACK_ACCESS_KEY", DEFAULT_BS_KEY))
+
+def _max_workers():
+    # a pre-warming worker holds two sessions at once
+    return max(1, PARALLEL_SESSION_LIMIT // 2 if DRIVER_PREWARM else PARALLEL_SESSION_LIMIT)
+
+# driver pools created in this process (one per session / xdist worker)
+_pools = []
+_artifact_store = None
+
 def _timestamp():
     return datetime.utcnow().strftime("%Y%m%dT%H%M%S")
 
-def _save_debug(driver, prefix="debug"):
-    """Save pagesource and screenshot to artifacts and return paths."""
-    ts = _timestamp()
-    src_name = f"{prefix}_pagesource_{ts}.xml"
-    png_name = f"{prefix}_screenshot_{ts}.png"
-    src_path = os.path.join(ARTIFACTS_DIR, src_name)
-    png_path = os.path.join(ARTIFACTS_DIR, png_name)
-    try:
-        with open(src_path, "w", encoding="utf-8") as f:
-            f.write(driver.page_source or "")
-    except Exception as e:
-        src_path = f"(failed to save page_source: {e})"
+def _worker_id():
+    """xdist worker id ('gw0', 'gw1', ...) or 'master' when running serially."""
+    return os.environ.get("PYTEST_XDIST_WORKER", "master")
+
+def _session_name(test_name):
+    worker = _worker_id()
+    return test_name if worker == "master" else f"{test_name} [{worker}]"
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_cmdline_main(config):
+    """Never start more xdist workers than the account's parallel-session limit."""
+    if getattr(config.option, "numprocesses", None) is None:
+        return
+    limit = _max_workers()
+    current = config.option.maxprocesses
+    config.option.maxprocesses = min(current, limit) if current else limit
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_auto_num_workers(config):
+    # `pytest -n auto` -> one worker per allowed parallel session
+    return _max_workers()
+
+def pytest_collection_modifyitems(session, config, items):
+    """
+    Longest tests first (historical Allure durations), then grouped by the app state each
+    test starts from, so consecutive tests on a session pick up where the last one left off.
+    xdist workers all sort the same way.
+    """
+    if SCHEDULER_ENABLED:
+        model = DurationModel.load()
+        if model:
+            items[:], estimates, unknown = lpt_order(items, model)
+            # serial plan only on request (-v); under xdist the scheduler prints the real one
+            if not hasattr(config, "workerinput") and config.getoption("verbose") > 0:
+                print(plan_summary(list(estimates.values()), 1, unknown))
+    if APP_STATE_GROUPING:
+        items[:] = app_state.group_by_state(items)
+        if hasattr(config, "workerinput"):
+            # the controller doesn't collect: leave it the states for its scheduler
+            try:
+                app_state.write_state_map(items)
+            except OSError as e:
+                print(f"[conftest] could not write app state map: {e}")
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config, log):
+    # hand out the longest remaining test to whichever worker frees up first
+    if SCHEDULER_ENABLED and LPTScheduling is not None and config.getvalue("dist") == "load":
+        return LPTScheduling(config, log, affinity=app_state.load_state_map if APP_STATE_GROUPING else None)
+    return None
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "app_state(name): app state the test starts from (see pages/app_state.py)")
+    # shared by every worker so BrowserStack groups all parallel sessions under one build
+    os.environ.setdefault("BROWSERSTACK_BUILD_NAME", f"mobile-tests-{_timestamp()}")
+    if os.environ.get("LOCATOR_CACHE", "1") != "0":
+        configure_locator_cache(LOCATOR_CACHE_PATH, os.environ.get("BROWSERSTACK_APP", DEFAULT_BS_APP))
+    global _artifact_store
+    _artifact_store = ArtifactStore(ARTIFACTS_DIR, allure_dir=config.getoption("allure_report_dir", None))
+
+@pytest.hookimpl(trylast=True)
+def pytest_sessionfinish(session):
+    controller = not hasattr(session.config, "workerinput")
+    allure_dir = session.config.getoption("allure_report_dir", None)
+    if controller and allure_dir and os.environ.get("ALLURE_SUMMARY", "1") != "0":
+        # append this run to the summary history (python -m utils.allure_summary failed|slower|flaky)
+        try:
+            allure_summary.ingest(allure_dir)
+        except Exception as e:
+            print(f"[conftest] could not update allure summary history: {e}")
+    if controller:
+        # one bulk report of every session's status, including sessions that died mid-run
+        try:
+            user, key = _credentials()
+            reported, failed = session_status.flush(session_status.get_reporter(user=user, key=key))
+            if reported or failed:
+                print(f"[conftest] session statuses: {reported} reported, {failed} left for the next flush")
+        except Exception as e:
+            print(f"[conftest] could not report session statuses: {e}")
+    if _artifact_store is not None:
+        # failure captures are written in the background; make sure they hit the disk.
+        # The controller (or a plain run) then prunes artifacts/ and allure-results to the budget.
+        _artifact_store.close(gc=controller)
+    cache = get_locator_cache()
+    if cache:
+        try:
+            cache.save()
+        except Exception as e:
+            print(f"[conftest] could not save locator cache: {e}")
     try:
-        driver.get_screenshot_as_file(png_path)
+        # measured navigation costs, so the next run plans with them
+        screen_graph.GRAPH.save_costs()
     except Exception as e:
-        png_path = f"(failed to save screenshot: {e})"
+        print(f"[conftest] could not save screen graph costs: {e}")
+
+def _save_debug(driver, prefix="debug", test=None, attach=True):
+    """
+    Capture pagesource and screenshot into the content-addressed artifact store and return blob paths.
+    Both are fetched right away (in parallel); the files and Allure attachments are written in the background.
+    """
+    store = _artifact_store or ArtifactStore(ARTIFACTS_DIR)
+    src_ref, png_ref = store.capture(driver, prefix, test=test, attach=attach)
+    src_path = src_ref.path if src_ref else "(failed to save page_source)"
+    png_path = png_ref.path if png_ref else "(failed to save screenshot)"
+    if store is not _artifact_store:
+        store.close()
     return src_path, png_path
 
-@pytest.fixture(scope="function")
-def driver(request):
+def _new_driver(session_name):
     """
-    Function-scoped driver fixture.
+    Create a BrowserStack session and wait until the login screen is ready.
     - Uses explicit waits to ensure login screen is ready (no hard sleeps).
     - Names BrowserStack session after the pytest test name.
-    - Yields a fresh driver per test (reduces inter-test state bleed).
     """
-    user = os.environ.get("BROWSERSTACK_USERNAME", DEFAULT_BS_USER)
-    key = os.environ.get("BROWSERSTACK_ACCESS_KEY", DEFAULT_BS_KEY)
+    user, key = _credentials()
     app = os.environ.get("BROWSERSTACK_APP", DEFAULT_BS_APP)
 
-    if not (user and key and app):
-        raise RuntimeError("Set BROWSERSTACK_USERNAME, BROWSERSTACK_ACCESS_KEY and BROWSERSTACK_APP")
-
-    # Build AppiumOptions in a way that works with different client versions
-    try:
-        opts = AppiumOptions()
-    except Exception:
-        opts = AppiumOptions()
-
-    # Core caps (tweakable via env vars)
-    opts.set_capability("platformName", os.environ.get("DUMP_PLATFORM", "iOS"))
-    opts.set_capability("deviceName", os.environ.get("DUMP_DEVICE", "iPhone 14"))
-    opts.set_capability("app", app)
-
-    # BrowserStack options (bstack:options) — set session name per test
-    bstack_opts = {
-        "userName": user,
-        "accessKey": key,
-        "sessionName": request.node.name  # ensures video/session labelled with test name
-    }
-    try:
-        opts.load_capabilities({"bstack:options": bstack_opts})
-    except Exception:
-        opts.set_capability("bstack:options", bstack_opts)
-
-    hub = "https://hub-cloud.browserstack.com/wd/hub"
-
-    # Create the driver
-    driver = webdriver.Remote(command_executor=hub, options=opts)
+    # shared capabilities + keep-alive hub connection, transient creation failures retried
+    # (APPIUM_HUB_URL points the session at another hub, e.g. utils/appium_proxy.py in record/replay mode)
+    driver = session_factory.create_session(session_name, user=user, key=key, app=app)
+    install_locator_rewriting(driver)
+    install_trace(driver)
 
     # ---------- EXPLICIT WAIT: wait until login screen is ready ----------
     # Wait for either the standard username accessibility id OR any text field as a fallback.
+    # No implicit wait is set: every lookup that should wait goes through pages/waits.py.
     try:
-        WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((AppiumBy.ACCESSIBILITY_ID, "test-Username"))
-        )
-    except Exception:
-        # fallback waiting for any textfield (no hard sleeps; explicit wait)
+        ready = wait_for_login_screen(driver, timeout=30)
+    except BaseException:
+        # don't leave a session nobody owns holding a parallel slot
         try:
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((AppiumBy.IOS_PREDICATE, "type == 'XCUIElementTypeTextField'"))
-            )
+            driver.quit()
         except Exception:
-            # if still not found, save debug for investigation but continue to yield driver
-            try:
-                src, png = _save_debug(driver, prefix=f"driver_start_{request.node.name}")
-                print(f"[conftest] login control not found during startup. Saved {src}, {png}")
-            except Exception:
-                pass
+            pass
+        raise
+    if not ready:
+        # if still not found, save debug for investigation but continue to return driver
+        try:
+            # may run in the pre-warm thread: not attached to whichever test is running
+            src, png = _save_debug(driver, prefix=f"driver_start_{session_name}", attach=False)
+            print(f"[conftest] login control not found during startup. Saved {src}, {png}")
+        except Exception:
+            pass
+
+    return driver
 
-    # Set a small implicit wait for element find fallback tolerance (not a hard sleep)
-    try:
-        driver.implicitly_wait(3)
-    except Exception:
-        pass
+
+@pytest.fixture(scope="session")
+def driver_pool():
+    """
+    Session-scoped pool of live sessions; under xdist every worker owns its own pool,
+    i.e. one remote session per worker.
+    Between tests the app is reset in place (terminate/activate or logout);
+    a fresh session is only created when that reset can't be verified.
+    Set DRIVER_REUSE=0 to get the old fresh-session-per-test behaviour, and with it
+    DRIVER_PREWARM=1 to boot the next session while the current test runs.
+    """
+    pool = DriverPool(
+        _new_driver,
+        reuse=DRIVER_REUSE,
+        prewarm=DRIVER_PREWARM,
+    )
+    _pools.append(pool)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture(scope="function")
+def driver(request, driver_pool):
+    """
+    Function-scoped handle on a pooled driver.
+    - The test starts in the app state it declares with @pytest.mark.app_state (login screen
+      by default); a reused session is driven there from wherever the previous test left it,
+      and only reset when that can't be done.
+    - Names BrowserStack session after the pytest test name.
+    """
+    started = time.time()
+    state = app_state.state_of(request.node)
+    driver = driver_pool.acquire(_session_name(request.node.name), prepare=lambda d: app_state.reach(d, state))
+    # session creation / reuse-reset cost, reported with the command trace (WD_TRACE=1)
+    request.node._driver_acquire_ms = round((time.time() - started) * 1000.0, 1)
+    trace = trace_for(driver)
+    if trace:
+        trace.begin()
+    # the test body's waits share one budget (WAIT_BUDGET_S); setup above is not charged
+    waits.start_budget(request.node.nodeid)
 
     yield driver
 
-    # Teardown: determine test result and mark BrowserStack session accordingly.
+    waits.end_budget()
+
+    # Teardown: the session goes back to the pool (or is quit when reuse is off).
     # We rely on pytest_runtest_makereport hook below to set the session status.
+    driver_pool.release(driver)
+
+
+def pytest_terminal_summary(terminalreporter):
+    for pool in _pools:
+        terminalreporter.write_line(f"[conftest] {pool.summary()}")
+    http = session_factory.summary()
+    if http:
+        terminalreporter.write_line(f"[conftest] {http}")
+    states = app_state.summary()
+    if states:
+        terminalreporter.write_line(f"[conftest] {states}")
+    cache = get_locator_cache()
+    if cache:
+        # re-read from disk: under xdist the workers did the recording
+        never_won = LocatorCache(cache.path, cache.app_build).never_won()
+        if never_won:
+            terminalreporter.write_line("[conftest] locator candidates that never won on this build:")
+            for chain, key, attempts in never_won:
+                terminalreporter.write_line(f"    {chain}: {key} ({attempts} attempts)")
+    report = rewrite_report()
+    if report:
+        # only the locators resolved in this process (xdist workers keep their own registry)
+        terminalreporter.write_line("[conftest] locator rewrites:")
+        for line in report:
+            terminalreporter.write_line(f"    {line}")
+
+def _attach_command_trace(item, driver):
+    """Attach the test body's WebDriver command summary to the Allure result (WD_TRACE=1 only)."""
+    trace = trace_for(driver)
+    if not trace:
+        return
     try:
-        driver.quit()
-    except Exception:
-        pass
+        summary = trace.summary()
+        summary["driver_acquire_ms"] = getattr(item, "_driver_acquire_ms", None)
+        # whole-session HTTP counters (connections opened, errors, timeouts)
+        summary["http"] = session_factory.http_stats(driver)
+        allure.attach(json.dumps(summary, indent=2), name="webdriver-commands", attachment_type=allure.attachment_type.JSON)
+        print(f"[conftest] {item.name}: {summary['round_trips']} round trips, {summary['network_ms']} ms network, "
+              f"{summary['find_miss_ms']} ms in empty finds, {summary['outside_channel_ms']} ms outside the channel")
+    except Exception as e:
+        print(f"[conftest] could not attach command trace: {e}")
+
+
+def _record_status(driver, item, status, reason=""):
+    """Local record only (no device round trip); utils/session_status.py reports it after the run."""
+    try:
+        session_status.record(getattr(driver, "session_id", None), item.nodeid, status, reason)
+    except Exception as e:
+        print(f"[conftest] could not record session status: {e}")
+
 
 # Hook to capture test outcome and update BrowserStack session status + save artifacts on failure.
 @pytest.hookimpl(hookwrapper=True)
 def pytest_runtest_makereport(item, call):
     """
     After each test phase, this hook runs. We care about the 'call' phase (test body).
-    If test failed, save debug artifacts and mark BrowserStack session as failed via executor.
-    If test passed, mark session passed.
+    If test failed, save debug artifacts and record the session as failed; otherwise record it
+    passed. The records are sent to BrowserStack in one batch at the end (utils/session_status.py).
     """
     outcome = yield
     rep = outcome.get_result()
@@ -161,32 +332,33 @@ def pytest_runtest_makereport(item, call):
         return
 
     driver = driver_fixture
+    _attach_command_trace(item, driver)
 
     # If test failed, save artifacts
     if rep.failed:
+        budget = waits.current_budget()
+        if budget is not None and budget.waits:
+            # where the test's waiting went (the full story when it ran out of budget)
+            print(f"[conftest] {item.name} waits: {budget.describe()}")
+            try:
+                allure.attach(json.dumps({"limit_s": budget.limit, "spent_s": round(budget.spent, 2), "waits": [
+                    {"label": label, "waits": n, "seconds": round(sec, 2), "timeouts": t}
+                    for label, n, sec, t in budget.breakdown()]}, indent=2),
+                    name="wait-budget", attachment_type=allure.attachment_type.JSON)
+            except Exception:
+                pass
         try:
-            src, png = _save_debug(driver, prefix=f"failure_{item.name}")
+            src, png = _save_debug(driver, prefix=f"failure_{item.name}", test=item.nodeid)
             print(f"[conftest] Test failed. Saved page_source -> {src}, screenshot -> {png}")
         except Exception:
             pass
 
-        # Mark BrowserStack session as failed with reason
-        try:
-            reason = ""
-            if hasattr(rep, "longrepr"):
-                # concise reason
-                reason = str(rep.longrepr).splitlines()[-1][:250]
-            driver.execute_script(
-                "browserstack_executor: {\"action\": \"setSessionStatus\", \"arguments\": {\"status\":\"failed\",\"reason\":\"%s\"}}"
-                % reason
-            )
-        except Exception:
-            pass
+        # Record the failure for the session; statuses are reported in bulk at the end of the run
+        reason = ""
+        if hasattr(rep, "longrepr"):
+            # concise reason
+            reason = str(rep.longrepr).splitlines()[-1][:250]
+        _record_status(driver, item, "failed", reason)
     else:
-        # test passed -> mark session passed
-        try:
-            driver.execute_script(
-                "browserstack_executor: {\"action\": \"setSessionStatus\", \"arguments\": {\"status\":\"passed\",\"reason\":\"All assertions passed\"}}"
-            )
-        except Exception:
-            pass
+        # test passed
+        _record_status(driver, item, "passed")
@@ -0,0 +1,84 @@
+# pages/app_state.py
+"""
+Named app states a test can start from: @pytest.mark.app_state("products_logged_in").
+
+    login_screen         app (re)started, nothing typed (the default for unmarked tests)
+    products_logged_in   logged in as the standard user, product list showing, cart empty
+    cart_with_item       the first product in the cart, cart screen showing
+    ui_elements          UI Elements screen of the sample app
+
+reach(driver, state) looks at the current screen (one page-source snapshot) and drives the
+cheapest path of transitions still missing from there (pages/screen_graph.py): a test that
+needs the product list right after another products test starts in place, with no reset
+and no second login. It returns False when the target can't be reached from the current
+screen; the driver pool then resets the app (back to login_screen) and calls it again.
+"""
+import json
+import os
+
+from pages import screen_graph
+# screen names, re-exported for tests and callers
+from pages.screen_graph import (  # noqa: F401
+    CART_EMPTY, CART_WITH_ITEM, LOGIN_SCREEN, LOGIN_USED, MENU_OPEN, PRODUCT_DETAILS,
+    PRODUCTS, PRODUCTS_IN_CART, SORT_SHEET, UI_ELEMENTS,
+)
+
+# in the order a session naturally walks through them (used to order test groups)
+STATES = (LOGIN_SCREEN, PRODUCTS, CART_WITH_ITEM, UI_ELEMENTS)
+DEFAULT_STATE = LOGIN_SCREEN
+
+# {nodeid: state} written by the xdist workers at collection, read by the controller's scheduler
+STATE_MAP_PATH = os.environ.get("APP_STATE_MAP", os.path.join(os.getcwd(), ".app_state_map.json"))
+
+
+def detect_state(driver, snap=None):
+    """Name of the screen the app is on (one GET /source), or None when it isn't recognised."""
+    return screen_graph.GRAPH.detect(driver, snap)
+
+
+def path_to(current, target):
+    """Cheapest list of (from, to) hops from current to target, [] when already there, None if unreachable."""
+    hops = screen_graph.GRAPH.path(current, target)
+    return None if hops is None else [(edge.src, edge.dst) for edge in hops]
+
+
+def reach(driver, target):
+    """Drive the app from wherever it is to `target`; True when the target screen is confirmed."""
+    return screen_graph.GRAPH.go_to(driver, target)
+
+
+def state_of(item):
+    """The app state a pytest item asked for with @pytest.mark.app_state(...)."""
+    marker = item.get_closest_marker("app_state")
+    if marker is None or not marker.args:
+        return DEFAULT_STATE
+    state = marker.args[0]
+    if state not in STATES:
+        raise ValueError(f"unknown app_state {state!r} on {item.nodeid}; expected one of {', '.join(STATES)}")
+    return state
+
+
+def group_by_state(items):
+    """Stable regroup: tests sharing a start state run back to back, groups in STATES order."""
+    rank = {state: i for i, state in enumerate(STATES)}
+    return sorted(items, key=lambda item: rank[state_of(item)])
+
+
+def write_state_map(items, path=None):
+    path = path or STATE_MAP_PATH
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({item.nodeid: state_of(item) for item in items}, f)
+    os.replace(tmp, path)
+
+
+def load_state_map(path=None):
+    try:
+        with open(path or STATE_MAP_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def summary():
+    return screen_graph.GRAPH.summary()
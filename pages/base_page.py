@@ -1,8 +1,8 @@
 # pages/base_page.py
 from appium.webdriver.common.appiumby import AppiumBy
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import time
+
+from pages.input_batch import InputBatch
+from pages.waits import present, wait_until
 
 
 class BasePage:
@@ -12,19 +12,13 @@ class BasePage:
 
     def find(self, by, locator, timeout=None):
         timeout = timeout if timeout is not None else self.default_timeout
-        return WebDriverWait(self.driver, timeout).until(
-            EC.presence_of_element_located((by, locator))
-        )
+        return wait_until(self.driver, present(by, locator), timeout, label=f"{type(self).__name__}.find",
+                          message=f"{by}={locator} not found within {timeout}s", raise_on_timeout=True)
 
     def find_all(self, by, locator, timeout=1):
         # quick poll to return list (may be empty)
-        end = time.time() + timeout
-        while time.time() < end:
-            elems = self.driver.find_elements(by, locator)
-            if elems:
-                return elems
-            time.sleep(0.15)
-        return []
+        return wait_until(self.driver, lambda d: d.find_elements(by, locator), timeout,
+                          label=f"{type(self).__name__}.find_all") or []
 
     def exists(self, by, locator, timeout=2):
         try:
@@ -33,6 +27,10 @@ class BasePage:
         except Exception:
             return False
 
+    def batch(self):
+        """InputBatch for this page's driver: chain tap/type/pause, then perform() (False = go step by step)."""
+        return InputBatch(self.driver)
+
     def safe_click(self, el):
         try:
             el.click()
@@ -1,7 +1,9 @@
 # pages/cart_page.py
 from appium.webdriver.common.appiumby import AppiumBy
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+
+from pages.locator_chain import LocatorChain
+from pages.snapshot import SNAPSHOTS_ENABLED, snapshot_for
+from pages.waits import present, wait_until
 
 class CartPage:
     def __init__(self, driver, timeout=8):
@@ -11,29 +13,36 @@ class CartPage:
             (AppiumBy.ACCESSIBILITY_ID, "test-Cart"),
             (AppiumBy.IOS_PREDICATE, "type == 'XCUIElementTypeButton' and label CONTAINS 'Cart'")
         ]
+        self.cart_btn_chain = LocatorChain("CartPage.cart_btn", self.cart_btn_candidates)
         self.item_title_pred = (
             "type == 'XCUIElementTypeStaticText' and label CONTAINS 'Sauce'"
         )
 
     def open_cart(self):
-        for by, val in self.cart_btn_candidates:
-            try:
-                btn = WebDriverWait(self.driver, 6).until(
-                    EC.presence_of_element_located((by, val))
-                )
-                btn.click()
-                WebDriverWait(self.driver, 6).until(
-                    EC.presence_of_element_located(
-                        (AppiumBy.IOS_PREDICATE, "label CONTAINS 'YOUR CART'")
-                    )
-                )
-                return True
-            except Exception:
-                continue
-        return False
+        btn = self.cart_btn_chain.find(self.driver, timeout=6)
+        if btn is None:
+            return False
+        try:
+            btn.click()
+            return wait_until(self.driver, present(AppiumBy.IOS_PREDICATE, "label CONTAINS 'YOUR CART'"), 6,
+                              label="CartPage.cart_screen") is not None
+        except Exception:
+            return False
 
     def get_cart_items(self):
         items = []
+        if SNAPSHOTS_ENABLED:
+            # one GET /source instead of find_elements + text/label per cart row
+            try:
+                snap = snapshot_for(self.driver)
+                for el in snap.find_elements(AppiumBy.IOS_PREDICATE, self.item_title_pred):
+                    txt = snap.text(el)
+                    if txt and txt not in items:
+                        items.append(txt)
+            except Exception:
+                items = []
+            if items:
+                return items
         try:
             els = self.driver.find_elements(AppiumBy.IOS_PREDICATE, self.item_title_pred)
             for e in els:
@@ -0,0 +1,106 @@
+# pages/input_batch.py
+"""
+Multi-step input (taps, typing, pauses) sent as one W3C Actions request.
+
+    InputBatch(driver).type(username_field, "standard_user").type(password_field, "secret_sauce").tap(login_btn).perform()
+
+compiles to a single POST /actions with a touch pointer and a keyboard source, kept in step
+by padding each with zero-length pauses, instead of find + clear + send_keys + click round
+trips per control. Targets can be:
+
+- a WebElement: the pointer moves to its centre via the element origin (no rect lookup),
+- a snapshot node (pages/snapshot.py): the centre of its x/y/width/height,
+- an (x, y) point.
+
+perform() returns True when the server ran the batch and False when it can't (no actions
+endpoint, key actions rejected, INPUT_BATCH=0): callers then take their per-step path. A driver
+that rejected a batch once is remembered, so later batches go straight to the fallback.
+"""
+import os
+
+from selenium.webdriver.remote.command import Command
+
+# INPUT_BATCH=0 sends every step separately (the page objects' per-step path)
+BATCH_ENABLED = os.environ.get("INPUT_BATCH", "1") != "0"
+# after tapping a text field, give the keyboard this long to come up before the keys
+FOCUS_PAUSE_MS = int(os.environ.get("INPUT_BATCH_FOCUS_MS", "250"))
+TAP_HOLD_MS = 50
+
+_ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+
+def _origin(target):
+    """(origin, x, y) of a pointerMove to the centre of target."""
+    element_id = getattr(target, "id", None)
+    if isinstance(element_id, str) and element_id:
+        return {_ELEMENT_KEY: element_id}, 0, 0
+    if isinstance(target, (tuple, list)):
+        return "viewport", int(target[0]), int(target[1])
+    # snapshot node (ElementTree element or its attrib dict)
+    attrs = getattr(target, "attrib", target)
+    x = float(attrs.get("x") or 0) + float(attrs.get("width") or 0) / 2
+    y = float(attrs.get("y") or 0) + float(attrs.get("height") or 0) / 2
+    return "viewport", int(x), int(y)
+
+
+class InputBatch:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pointer = []
+        self.keys = []
+
+    def _tick(self, pointer=None, key=None):
+        # every tick has one action per source; the idle one pauses for 0 ms
+        self.pointer.append(pointer or {"type": "pause", "duration": 0})
+        self.keys.append(key or {"type": "pause", "duration": 0})
+
+    def tap(self, target, hold_ms=TAP_HOLD_MS):
+        origin, x, y = _origin(target)
+        self._tick(pointer={"type": "pointerMove", "duration": 0, "origin": origin, "x": x, "y": y})
+        self._tick(pointer={"type": "pointerDown", "button": 0})
+        self._tick(pointer={"type": "pause", "duration": hold_ms})
+        self._tick(pointer={"type": "pointerUp", "button": 0})
+        return self
+
+    def type(self, target, text, focus_ms=FOCUS_PAUSE_MS):
+        """Tap target to focus it, then type text (target=None types into whatever has focus)."""
+        if target is not None:
+            self.tap(target)
+            self.pause(focus_ms / 1000.0)
+        for ch in text:
+            self._tick(key={"type": "keyDown", "value": ch})
+            self._tick(key={"type": "keyUp", "value": ch})
+        return self
+
+    def pause(self, seconds):
+        ms = int(seconds * 1000)
+        self._tick(pointer={"type": "pause", "duration": ms}, key={"type": "pause", "duration": ms})
+        return self
+
+    def payload(self):
+        """The W3C actions body this batch compiles to."""
+        sources = []
+        if any(a["type"] != "pause" for a in self.pointer):
+            sources.append({"type": "pointer", "id": "finger1", "parameters": {"pointerType": "touch"},
+                            "actions": self.pointer})
+        if any(a["type"] != "pause" for a in self.keys):
+            sources.append({"type": "key", "id": "keyboard", "actions": self.keys})
+        return {"actions": sources}
+
+    def perform(self):
+        """Run the whole batch in one request; False (nothing sent, or rejected) means: do it step by step."""
+        if not BATCH_ENABLED or getattr(self.driver, "_input_batch_unsupported", False):
+            return False
+        body = self.payload()
+        if not body["actions"]:
+            return True
+        try:
+            self.driver.execute(Command.W3C_ACTIONS, body)
+            return True
+        except Exception as e:
+            print(f"[input_batch] batched input rejected ({type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}); using per-step input")
+            try:
+                self.driver._input_batch_unsupported = True
+            except Exception:
+                pass
+            return False
@@ -0,0 +1,907 @@
+# pages/ios_query.py
+"""
+Offline evaluator for the locators used by the page objects, run against
+XCUITest page-source XML (PageSnapshot / the files in artifacts/).
+
+Supported:
+  - accessibility id / name / id  -> name attribute
+  - class name                    -> element type
+  - -ios predicate string         -> the NSPredicate subset we use: ==, !=, CONTAINS,
+    BEGINSWITH, ENDSWITH, LIKE, MATCHES, IN, <, >, with [c]/[d]/[cd] modifiers,
+    AND/OR/NOT (&&, ||, !), parentheses, TRUEPREDICATE/FALSEPREDICATE
+  - -ios class chain              -> **/Type, Type/Type child steps, [n] / [-n] indexes,
+    [`predicate`] filters and [$predicate$] descendant filters
+  - xpath                         -> XPath 1.0 location paths with predicates,
+    unions, the child/descendant/ancestor/parent/self/following-sibling axes and
+    contains(), starts-with(), translate(), normalize-space(), not(), string(),
+    concat(), string-length(), count(), position(), last(), text()
+
+Every locator is compiled once (compile_locator is memoised). Lookups use the
+snapshot's attribute index (type / name) instead of scanning the whole tree when
+the locator pins one of those attributes.
+"""
+import fnmatch
+import re
+import unicodedata
+from functools import lru_cache
+
+from appium.webdriver.common.appiumby import AppiumBy
+
+
+class QuerySyntaxError(ValueError):
+    """The locator uses syntax outside the supported subset."""
+
+
+# ====================================================================================
+# snapshot index
+# ====================================================================================
+class SnapshotIndex:
+    """Lazily built lookup tables over one PageSnapshot's tree."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.order = {el: i for i, el in enumerate(snapshot.nodes)}
+        self.parent = {}
+        for el in snapshot.root.iter():
+            for child in el:
+                self.parent[child] = el
+        self._by_attr = {}
+
+    def by(self, attr):
+        """{attribute value: [nodes in document order]} for one attribute."""
+        table = self._by_attr.get(attr)
+        if table is None:
+            table = {}
+            for el in self.snapshot.nodes:
+                value = el.tag if attr == "type" else el.get(attr)
+                if value is not None:
+                    table.setdefault(value, []).append(el)
+            self._by_attr[attr] = table
+        return table
+
+    def sort(self, nodes):
+        seen = set()
+        unique = []
+        for n in nodes:
+            if id(n) not in seen and n in self.order:
+                seen.add(id(n))
+                unique.append(n)
+        return sorted(unique, key=self.order.__getitem__)
+
+
+def index_for(snapshot):
+    idx = getattr(snapshot, "_index", None)
+    if idx is None:
+        idx = SnapshotIndex(snapshot)
+        snapshot._index = idx
+    return idx
+
+
+# ====================================================================================
+# compiled locators
+# ====================================================================================
+class CompiledLocator:
+    def __init__(self, by, value, select):
+        self.by = by
+        self.value = value
+        self._select = select
+
+    def __repr__(self):
+        return f"CompiledLocator({self.by!r}, {self.value!r})"
+
+    def select(self, snapshot, context=None):
+        """Matching nodes in document order (context: element for relative XPath)."""
+        return self._select(index_for(snapshot), context)
+
+    def matches(self, snapshot, el):
+        return any(n is el for n in self.select(snapshot))
+
+
+@lru_cache(maxsize=None)
+def compile_locator(by, value):
+    """Compile (by, value) once; raises QuerySyntaxError for unsupported locators."""
+    if by in (AppiumBy.ACCESSIBILITY_ID, AppiumBy.NAME, AppiumBy.ID):
+        return CompiledLocator(by, value, lambda idx, ctx: list(idx.by("name").get(value, [])))
+    if by == AppiumBy.CLASS_NAME:
+        return CompiledLocator(by, value, lambda idx, ctx: list(idx.by("type").get(value, [])))
+    if by == AppiumBy.IOS_PREDICATE:
+        return CompiledLocator(by, value, _compile_predicate_select(value))
+    if by == AppiumBy.IOS_CLASS_CHAIN:
+        return CompiledLocator(by, value, _compile_class_chain(value))
+    if by == AppiumBy.XPATH:
+        expr = parse_xpath(value)
+        return CompiledLocator(by, value, lambda idx, ctx: _xpath_select(expr, idx, ctx))
+    raise QuerySyntaxError(f"unsupported locator strategy: {by}")
+
+
+def find_all(snapshot, by, value):
+    return compile_locator(by, value).select(snapshot)
+
+
+# ====================================================================================
+# NSPredicate
+# ====================================================================================
+_PRED_TOKEN = re.compile(r"""
+    \s*(?:
+      (?P<str>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+    | (?P<num>-?\d+(?:\.\d+)?)
+    | (?P<mod>\[[cdn]+\])
+    | (?P<op>==|=|!=|<>|<=|>=|<|>|&&|\|\||!)
+    | (?P<punct>[(),{}])
+    | (?P<word>[A-Za-z_$][A-Za-z0-9_.$]*)
+    )""", re.VERBOSE)
+
+_STRING_OPS = {"CONTAINS", "BEGINSWITH", "ENDSWITH", "LIKE", "MATCHES", "IN"}
+_KEY_ALIASES = {"wdtype": "type", "wdname": "name", "wdlabel": "label", "wdvalue": "value",
+                "wdenabled": "enabled", "wdvisible": "visible", "wdaccessible": "accessible",
+                "elementtype": "type", "identifier": "name"}
+
+
+def _tokenize_predicate(text):
+    tokens, pos = [], 0
+    text = text.strip()
+    while pos < len(text):
+        m = _PRED_TOKEN.match(text, pos)
+        if not m or m.end() == pos:
+            raise QuerySyntaxError(f"cannot parse predicate near: {text[pos:pos + 20]!r}")
+        kind = m.lastgroup
+        tokens.append((kind, m.group(kind)))
+        pos = m.end()
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+    return tokens
+
+
+def _unquote(s):
+    body = s[1:-1]
+    return re.sub(r"\\(.)", r"\1", body)
+
+
+class _PredicateParser:
+    def __init__(self, text):
+        self.text = text
+        self.tokens = _tokenize_predicate(text)
+        self.i = 0
+
+    def peek(self, offset=0):
+        j = self.i + offset
+        return self.tokens[j] if j < len(self.tokens) else (None, None)
+
+    def take(self):
+        tok = self.peek()
+        self.i += 1
+        return tok
+
+    def keyword(self, *words):
+        kind, val = self.peek()
+        if kind == "word" and val.upper() in words:
+            self.i += 1
+            return True
+        if kind == "op" and val in words:
+            self.i += 1
+            return True
+        return False
+
+    def parse(self):
+        node = self.or_expr()
+        if self.peek()[0] is not None:
+            raise QuerySyntaxError(f"unexpected token {self.peek()[1]!r} in predicate {self.text!r}")
+        return node
+
+    def or_expr(self):
+        parts = [self.and_expr()]
+        while self.keyword("OR", "||"):
+            parts.append(self.and_expr())
+        return parts[0] if len(parts) == 1 else ("or", parts)
+
+    def and_expr(self):
+        parts = [self.not_expr()]
+        while self.keyword("AND", "&&"):
+            parts.append(self.not_expr())
+        return parts[0] if len(parts) == 1 else ("and", parts)
+
+    def not_expr(self):
+        if self.keyword("NOT", "!"):
+            return ("not", self.not_expr())
+        return self.primary()
+
+    def primary(self):
+        kind, val = self.peek()
+        if kind == "punct" and val == "(":
+            self.take()
+            node = self.or_expr()
+            if self.take() != ("punct", ")"):
+                raise QuerySyntaxError(f"missing ')' in predicate {self.text!r}")
+            return node
+        if kind == "word" and val.upper() == "TRUEPREDICATE":
+            self.take()
+            return ("const", True)
+        if kind == "word" and val.upper() == "FALSEPREDICATE":
+            self.take()
+            return ("const", False)
+        return self.comparison()
+
+    def comparison(self):
+        kind, key = self.take()
+        if kind != "word":
+            raise QuerySyntaxError(f"expected attribute name, got {key!r} in {self.text!r}")
+        key = _KEY_ALIASES.get(key.lower(), key)
+        negate = self.keyword("NOT")
+        kind, op = self.take()
+        if kind == "word" and op.upper() in _STRING_OPS:
+            op = op.upper()
+        elif kind == "op" and op in ("==", "=", "!=", "<>", "<", ">", "<=", ">="):
+            op = {"=": "==", "<>": "!="}.get(op, op)
+        else:
+            raise QuerySyntaxError(f"unsupported operator {op!r} in {self.text!r}")
+        mods = ""
+        if self.peek()[0] == "mod":
+            mods = self.take()[1][1:-1]
+        value = self.literal()
+        return ("cmp", key, op, mods, value, negate)
+
+    def literal(self):
+        kind, val = self.take()
+        if kind == "str":
+            return _unquote(val)
+        if kind == "num":
+            return float(val)
+        if kind == "word":
+            upper = val.upper()
+            if upper in ("TRUE", "YES"):
+                return True
+            if upper in ("FALSE", "NO"):
+                return False
+            if upper in ("NIL", "NULL"):
+                return None
+        if kind == "punct" and val == "{":
+            items = []
+            while self.peek() != ("punct", "}"):
+                items.append(self.literal())
+                if self.peek() == ("punct", ","):
+                    self.take()
+            self.take()
+            return items
+        raise QuerySyntaxError(f"expected a value, got {val!r} in {self.text!r}")
+
+
+def _fold(s, mods):
+    if "c" in mods:
+        s = s.casefold()
+    if "d" in mods:
+        s = "".join(ch for ch in unicodedata.normalize("NFKD", s) if not unicodedata.combining(ch))
+    return s
+
+
+def _compare(raw, op, mods, expected):
+    if expected is None:
+        return (raw is None) if op == "==" else (raw is not None) if op == "!=" else False
+    if raw is None:
+        return op == "!="
+    if isinstance(expected, bool):
+        actual = raw.lower() in ("true", "1", "yes")
+        return actual == expected if op == "==" else actual != expected if op == "!=" else False
+    if isinstance(expected, float) and op not in _STRING_OPS:
+        try:
+            # boolean attributes are serialized as "true"/"false" but compare as 1/0 on the device
+            actual = float({"true": 1, "false": 0}.get(raw, raw))
+        except ValueError:
+            return op == "!="
+        return {"==": actual == expected, "!=": actual != expected, "<": actual < expected,
+                ">": actual > expected, "<=": actual <= expected, ">=": actual >= expected}[op]
+    if op == "IN":
+        choices = expected if isinstance(expected, list) else [expected]
+        return _fold(raw, mods) in [_fold(str(c), mods) for c in choices]
+    left, right = _fold(raw, mods), _fold(str(expected), mods)
+    if op == "==":
+        return left == right
+    if op == "!=":
+        return left != right
+    if op == "CONTAINS":
+        return right in left
+    if op == "BEGINSWITH":
+        return left.startswith(right)
+    if op == "ENDSWITH":
+        return left.endswith(right)
+    if op == "LIKE":
+        return re.fullmatch(fnmatch.translate(right), left) is not None
+    if op == "MATCHES":
+        return re.fullmatch(str(expected), raw, re.IGNORECASE if "c" in mods else 0) is not None
+    return {"<": left < right, ">": left > right, "<=": left <= right, ">=": left >= right}[op]
+
+
+def _predicate_fn(node):
+    kind = node[0]
+    if kind == "const":
+        value = node[1]
+        return lambda attrib: value
+    if kind == "not":
+        inner = _predicate_fn(node[1])
+        return lambda attrib: not inner(attrib)
+    if kind in ("and", "or"):
+        parts = [_predicate_fn(p) for p in node[1]]
+        if kind == "and":
+            return lambda attrib: all(p(attrib) for p in parts)
+        return lambda attrib: any(p(attrib) for p in parts)
+    _, key, op, mods, expected, negate = node
+
+    def fn(attrib):
+        result = _compare(attrib.get(key), op, mods, expected)
+        return not result if negate else result
+    return fn
+
+
+def _pinned(node):
+    """(attr, value) an AND-conjunct pins by exact equality -> usable as an index lookup."""
+    conjuncts = node[1] if node[0] == "and" else [node]
+    for attr in ("name", "type"):
+        for c in conjuncts:
+            if c[0] == "cmp" and c[1] == attr and c[2] == "==" and not c[3] and not c[5] and isinstance(c[4], str):
+                return attr, c[4]
+    return None
+
+
+def parse_predicate(text):
+    """Parse an NSPredicate string into a small AST (also used by the locator rewriter)."""
+    return _PredicateParser(text).parse()
+
+
+def _compile_predicate_select(text):
+    ast = parse_predicate(text)
+    fn = _predicate_fn(ast)
+    pinned = _pinned(ast)
+
+    def select(idx, ctx):
+        if pinned:
+            pool = idx.by(pinned[0]).get(pinned[1], [])
+        else:
+            pool = idx.snapshot.nodes
+        if ctx is not None:
+            pool = [n for n in pool if _is_descendant(idx, n, ctx)]
+        return [el for el in pool if fn(el.attrib)]
+    return select
+
+
+def _is_descendant(idx, node, ancestor):
+    p = idx.parent.get(node)
+    while p is not None:
+        if p is ancestor:
+            return True
+        p = idx.parent.get(p)
+    return False
+
+
+# ====================================================================================
+# class chain
+# ====================================================================================
+def _split_class_chain(text):
+    """Split on '/' outside of `...` and $...$ predicate blocks."""
+    segments, current, quote = [], "", None
+    for ch in text.strip():
+        if quote:
+            current += ch
+            if ch == quote:
+                quote = None
+        elif ch in "`$":
+            quote = ch
+            current += ch
+        elif ch == "/":
+            segments.append(current)
+            current = ""
+        else:
+            current += ch
+    if quote:
+        raise QuerySyntaxError(f"unterminated predicate in class chain {text!r}")
+    segments.append(current)
+    return segments
+
+
+_CHAIN_SEGMENT = re.compile(r"^(\*\*|\*|[A-Za-z]+)((?:\[[^\]]*\])*)$")
+_CHAIN_FILTER = re.compile(r"\[(-?\d+|`[^`]*`|\$[^$]*\$)\]")
+
+
+def _parse_class_chain(text):
+    steps = []
+    for seg in _split_class_chain(text):
+        m = _CHAIN_SEGMENT.match(seg.strip())
+        if not m:
+            raise QuerySyntaxError(f"cannot parse class chain segment {seg!r} in {text!r}")
+        test, rest = m.group(1), m.group(2)
+        filters = []
+        for f in _CHAIN_FILTER.findall(rest):
+            if f[0] == "`":
+                filters.append(("pred", _predicate_fn(parse_predicate(f[1:-1]))))
+            elif f[0] == "$":
+                filters.append(("has", _predicate_fn(parse_predicate(f[1:-1]))))
+            else:
+                filters.append(("index", int(f)))
+        if "".join("[" + f + "]" for f in _CHAIN_FILTER.findall(rest)) != rest:
+            raise QuerySyntaxError(f"cannot parse class chain filters {rest!r} in {text!r}")
+        if test == "**" and filters:
+            raise QuerySyntaxError(f"'**' takes no filters in class chain {text!r}")
+        steps.append((test, filters))
+    if not steps or steps[-1][0] == "**":
+        raise QuerySyntaxError(f"class chain must end with an element type: {text!r}")
+    return steps
+
+
+def _compile_class_chain(text):
+    steps = _parse_class_chain(text)
+
+    def select(idx, ctx):
+        root = idx.snapshot.root
+        # searches start at the application element (or the given context element)
+        start = ctx if ctx is not None else (root[0] if len(root) else root)
+        nodes, deep = [start], False
+        for test, filters in steps:
+            if test == "**":
+                deep = True
+                continue
+            out = []
+            for n in nodes:
+                found = [m for m in (n.iter() if deep else n) if m is not n and (test == "*" or m.tag == test)]
+                for kind, arg in filters:
+                    if kind == "index":
+                        pos = arg - 1 if arg > 0 else len(found) + arg
+                        found = [found[pos]] if 0 <= pos < len(found) else []
+                    elif kind == "pred":
+                        found = [m for m in found if arg(m.attrib)]
+                    else:
+                        found = [m for m in found if any(arg(d.attrib) for d in m.iter() if d is not m)]
+                out.extend(found)
+            nodes, deep = idx.sort(out), False
+        return nodes
+    return select
+
+
+# ====================================================================================
+# XPath 1.0 subset
+# ====================================================================================
+_XP_TOKEN = re.compile(r"""
+    \s*(?:
+      (?P<str>"[^"]*"|'[^']*')
+    | (?P<num>\d+(?:\.\d+)?)
+    | (?P<op>//|/|\|\||\||!=|<=|>=|=|<|>|::|\.\.|\.|@|\*|\[|\]|\(|\)|,)
+    | (?P<name>[A-Za-z_][A-Za-z0-9_.\-]*)
+    )""", re.VERBOSE)
+
+_AXES = {"child", "descendant", "descendant-or-self", "ancestor", "ancestor-or-self",
+         "parent", "self", "following-sibling", "preceding-sibling", "attribute"}
+
+
+class _Attr:
+    """An attribute node (@label etc.)."""
+    __slots__ = ("el", "name", "value")
+
+    def __init__(self, el, name, value):
+        self.el, self.name, self.value = el, name, value
+
+
+class _Doc:
+    """The document node above <AppiumAUT>."""
+
+
+_DOC = _Doc()
+
+
+class _XPathParser:
+    def __init__(self, text):
+        self.text = text
+        self.tokens = []
+        pos, text = 0, text.strip()
+        while pos < len(text):
+            m = _XP_TOKEN.match(text, pos)
+            if not m or m.end() == pos:
+                raise QuerySyntaxError(f"cannot parse xpath near: {text[pos:pos + 20]!r}")
+            kind = m.lastgroup
+            self.tokens.append((kind, m.group(kind)))
+            pos = m.end()
+            while pos < len(text) and text[pos].isspace():
+                pos += 1
+        self.i = 0
+
+    def peek(self, offset=0):
+        j = self.i + offset
+        return self.tokens[j] if j < len(self.tokens) else (None, None)
+
+    def take(self):
+        tok = self.peek()
+        self.i += 1
+        return tok
+
+    def accept(self, kind, val=None):
+        k, v = self.peek()
+        if k == kind and (val is None or v == val):
+            self.i += 1
+            return True
+        return False
+
+    def expect(self, kind, val):
+        if not self.accept(kind, val):
+            raise QuerySyntaxError(f"expected {val!r} in xpath {self.text!r}")
+
+    def parse(self):
+        expr = self.or_expr()
+        if self.peek()[0] is not None:
+            raise QuerySyntaxError(f"unexpected {self.peek()[1]!r} in xpath {self.text!r}")
+        return expr
+
+    def or_expr(self):
+        parts = [self.and_expr()]
+        while self.peek() == ("name", "or"):
+            self.take()
+            parts.append(self.and_expr())
+        return parts[0] if len(parts) == 1 else ("or", parts)
+
+    def and_expr(self):
+        parts = [self.eq_expr()]
+        while self.peek() == ("name", "and"):
+            self.take()
+            parts.append(self.eq_expr())
+        return parts[0] if len(parts) == 1 else ("and", parts)
+
+    def eq_expr(self):
+        left = self.union_expr()
+        while self.peek()[0] == "op" and self.peek()[1] in ("=", "!=", "<", ">", "<=", ">="):
+            op = self.take()[1]
+            left = ("cmp", op, left, self.union_expr())
+        return left
+
+    def union_expr(self):
+        parts = [self.path_expr()]
+        while self.accept("op", "|"):
+            parts.append(self.path_expr())
+        return parts[0] if len(parts) == 1 else ("union", parts)
+
+    def path_expr(self):
+        kind, val = self.peek()
+        if kind == "str":
+            self.take()
+            return ("lit", val[1:-1])
+        if kind == "num":
+            self.take()
+            return ("num", float(val))
+        if kind == "op" and val == "(":
+            self.take()
+            inner = self.or_expr()
+            self.expect("op", ")")
+            preds = self.predicates()
+            return ("filter", inner, preds) if preds else inner
+        if kind == "name" and self.peek(1) == ("op", "(") and val not in ("text", "node"):
+            return self.function_call()
+        return self.location_path()
+
+    def function_call(self):
+        name = self.take()[1]
+        self.expect("op", "(")
+        args = []
+        if not self.accept("op", ")"):
+            args.append(self.or_expr())
+            while self.accept("op", ","):
+                args.append(self.or_expr())
+            self.expect("op", ")")
+        return ("fn", name, args)
+
+    def location_path(self):
+        steps = []
+        absolute = False
+        if self.accept("op", "//"):
+            absolute = True
+            steps.append(("descendant-or-self", "node", []))
+        elif self.accept("op", "/"):
+            absolute = True
+            if self.peek()[0] not in ("name", "op") or self.peek() in (("op", ")"), ("op", "|"), ("op", "]")):
+                return ("path", absolute, steps)
+        steps.append(self.step())
+        while True:
+            if self.accept("op", "//"):
+                steps.append(("descendant-or-self", "node", []))
+                steps.append(self.step())
+            elif self.accept("op", "/"):
+                steps.append(self.step())
+            else:
+                break
+        return ("path", absolute, steps)
+
+    def step(self):
+        if self.accept("op", "."):
+            return ("self", "node", [])
+        if self.accept("op", ".."):
+            return ("parent", "node", [])
+        axis = "child"
+        if self.accept("op", "@"):
+            axis = "attribute"
+        elif self.peek()[0] == "name" and self.peek(1) == ("op", "::"):
+            axis = self.take()[1]
+            self.take()
+            if axis not in _AXES:
+                raise QuerySyntaxError(f"unsupported axis {axis!r} in xpath {self.text!r}")
+        kind, val = self.take()
+        if kind == "op" and val == "*":
+            test = "*"
+        elif kind == "name":
+            test = val
+            if val in ("text", "node") and self.accept("op", "("):
+                self.expect("op", ")")
+                test = val + "()"
+        else:
+            raise QuerySyntaxError(f"expected node test, got {val!r} in xpath {self.text!r}")
+        return (axis, test, self.predicates())
+
+    def predicates(self):
+        preds = []
+        while self.accept("op", "["):
+            preds.append(self.or_expr())
+            self.expect("op", "]")
+        return preds
+
+
+def parse_xpath(text):
+    """Parse an XPath expression into a small AST (also used by the locator rewriter)."""
+    return _XPathParser(text).parse()
+
+
+def _axis(idx, node, axis):
+    if isinstance(node, _Attr):
+        return [node.el] if axis == "parent" else [node] if axis == "self" else []
+    if axis == "child":
+        return [idx.snapshot.root] if node is _DOC else list(node)
+    if axis == "descendant":
+        if node is _DOC:
+            return [idx.snapshot.root] + idx.snapshot.nodes
+        return [n for n in node.iter() if n is not node]
+    if axis == "descendant-or-self":
+        if node is _DOC:
+            return [_DOC, idx.snapshot.root] + idx.snapshot.nodes
+        return list(node.iter())
+    if axis == "self":
+        return [node]
+    if axis == "parent":
+        p = idx.parent.get(node)
+        return [p] if p is not None else ([_DOC] if node is idx.snapshot.root else [])
+    if axis in ("ancestor", "ancestor-or-self"):
+        out = [node] if axis == "ancestor-or-self" else []
+        p = idx.parent.get(node)
+        while p is not None:
+            out.append(p)
+            p = idx.parent.get(p)
+        return out  # reverse document order (proximity), as XPath defines for reverse axes
+    if axis in ("following-sibling", "preceding-sibling"):
+        p = idx.parent.get(node)
+        if p is None:
+            return []
+        sibs = list(p)
+        pos = next(i for i, s in enumerate(sibs) if s is node)
+        return sibs[pos + 1:] if axis == "following-sibling" else list(reversed(sibs[:pos]))
+    if axis == "attribute":
+        return [_Attr(node, k, v) for k, v in node.attrib.items()] if node is not _DOC else []
+    raise QuerySyntaxError(f"unsupported axis {axis}")
+
+
+def _node_test(node, axis, test):
+    if test == "node()":
+        return True
+    if test == "text()":
+        return False  # XCUITest page sources carry no text nodes
+    if axis == "attribute":
+        return isinstance(node, _Attr) and (test == "*" or node.name == test)
+    if node is _DOC or isinstance(node, _Attr):
+        return False
+    return test == "*" or node.tag == test
+
+
+def _string(value):
+    if isinstance(value, list):
+        if not value:
+            return ""
+        first = value[0]
+        if isinstance(first, _Attr):
+            return first.value
+        return ""  # element string-value: no text content in XCUITest sources
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else str(value)
+    return value
+
+
+def _number(value):
+    try:
+        return float(_string(value) if not isinstance(value, (float, bool)) else value)
+    except ValueError:
+        return float("nan")
+
+
+def _boolean(value):
+    if isinstance(value, list):
+        return bool(value)
+    if isinstance(value, float):
+        return value != 0 and value == value
+    if isinstance(value, str):
+        return bool(value)
+    return bool(value)
+
+
+def _eval(expr, idx, node, pos=1, size=1):
+    kind = expr[0]
+    if kind == "lit":
+        return expr[1]
+    if kind == "num":
+        return expr[1]
+    if kind == "or":
+        return any(_boolean(_eval(p, idx, node, pos, size)) for p in expr[1])
+    if kind == "and":
+        return all(_boolean(_eval(p, idx, node, pos, size)) for p in expr[1])
+    if kind == "cmp":
+        return _xp_compare(expr[1], _eval(expr[2], idx, node, pos, size), _eval(expr[3], idx, node, pos, size))
+    if kind == "union":
+        out = []
+        for p in expr[1]:
+            out.extend(_eval(p, idx, node, pos, size))
+        return idx.sort(out)
+    if kind == "path":
+        return _eval_path(expr, idx, node)
+    if kind == "filter":
+        nodes = _eval(expr[1], idx, node, pos, size)
+        for pred in expr[2]:
+            nodes = _apply_predicate(pred, idx, nodes)
+        return nodes
+    if kind == "fn":
+        return _call(expr[1], expr[2], idx, node, pos, size)
+    raise QuerySyntaxError(f"cannot evaluate {kind}")
+
+
+def _xp_compare(op, left, right):
+    def atoms(v):
+        if isinstance(v, list):
+            return [n.value if isinstance(n, _Attr) else "" for n in v]
+        return [v]
+    for a in atoms(left):
+        for b in atoms(right):
+            if op in ("=", "!="):
+                if isinstance(a, bool) or isinstance(b, bool):
+                    eq = _boolean(a) == _boolean(b)
+                elif isinstance(a, float) or isinstance(b, float):
+                    eq = _number(a) == _number(b)
+                else:
+                    eq = _string(a) == _string(b)
+                if eq == (op == "="):
+                    return True
+            else:
+                x, y = _number(a), _number(b)
+                if {"<": x < y, ">": x > y, "<=": x <= y, ">=": x >= y}[op]:
+                    return True
+    return False
+
+
+def _call(name, args, idx, node, pos, size):
+    vals = [_eval(a, idx, node, pos, size) for a in args]
+    if name == "contains":
+        return _string(vals[1]) in _string(vals[0])
+    if name == "starts-with":
+        return _string(vals[0]).startswith(_string(vals[1]))
+    if name == "translate":
+        src, frm, to = _string(vals[0]), _string(vals[1]), _string(vals[2])
+        table = {}
+        for i, ch in enumerate(frm):
+            if ord(ch) not in table:
+                table[ord(ch)] = to[i] if i < len(to) else None
+        return src.translate(table)
+    if name == "normalize-space":
+        return " ".join(_string(vals[0] if vals else [node]).split())
+    if name == "string":
+        return _string(vals[0] if vals else [node])
+    if name == "concat":
+        return "".join(_string(v) for v in vals)
+    if name == "string-length":
+        return float(len(_string(vals[0] if vals else [node])))
+    if name == "not":
+        return not _boolean(vals[0])
+    if name == "true":
+        return True
+    if name == "false":
+        return False
+    if name == "count":
+        return float(len(vals[0]))
+    if name == "position":
+        return float(pos)
+    if name == "last":
+        return float(size)
+    if name == "boolean":
+        return _boolean(vals[0])
+    if name == "number":
+        return _number(vals[0])
+    raise QuerySyntaxError(f"unsupported xpath function {name}()")
+
+
+def _apply_predicate(pred, idx, nodes):
+    out = []
+    size = len(nodes)
+    for i, n in enumerate(nodes, start=1):
+        v = _eval(pred, idx, n, i, size)
+        if isinstance(v, float):
+            if v == i:
+                out.append(n)
+        elif _boolean(v):
+            out.append(n)
+    return out
+
+
+def _eval_path(expr, idx, context):
+    _, absolute, steps = expr
+    if absolute:
+        nodes = [_DOC]
+    else:
+        nodes = [context if context is not None else _DOC]
+    i = 0
+    while i < len(steps):
+        axis, test, preds = steps[i]
+        # fast path: '//Name' (descendant-or-self::node()/child::Name) from the document node
+        if (axis == "descendant-or-self" and test == "node" and not preds and i + 1 < len(steps)
+                and nodes == [_DOC] and steps[i + 1][0] == "child" and steps[i + 1][1] not in ("*", "node()", "text()")):
+            _, name, next_preds = steps[i + 1]
+            found = list(idx.by("type").get(name, []))
+            if idx.snapshot.root.tag == name:
+                found.insert(0, idx.snapshot.root)
+            for pred in next_preds:
+                found = _apply_predicate_grouped(pred, idx, found)
+            nodes = found
+            i += 2
+            continue
+        out = []
+        for n in nodes:
+            step_nodes = [m for m in _axis(idx, n, axis) if _node_test(m, axis, test if test != "node" else "node()")]
+            for pred in preds:
+                step_nodes = _apply_predicate(pred, idx, step_nodes)
+            out.extend(step_nodes)
+        if axis == "attribute":
+            nodes = out
+        else:
+            nodes = _dedupe_doc_order(idx, out)
+        i += 1
+    return nodes
+
+
+def _apply_predicate_grouped(pred, idx, found):
+    """Predicates of '//Name[...]' are positional per parent, not over the whole result."""
+    if not _uses_position(pred):
+        return [n for n in found if _boolean(_eval(pred, idx, n))]
+    groups = {}
+    for n in found:
+        groups.setdefault(id(idx.parent.get(n)), []).append(n)
+    out = []
+    for group in groups.values():
+        out.extend(_apply_predicate(pred, idx, group))
+    return idx.sort(out)
+
+
+def _uses_position(pred):
+    if pred[0] == "num":
+        return True
+    if pred[0] == "fn" and pred[1] in ("position", "last"):
+        return True
+    for part in pred[1:]:
+        if isinstance(part, tuple) and _uses_position(part):
+            return True
+        if isinstance(part, list) and any(isinstance(p, tuple) and _uses_position(p) for p in part):
+            return True
+    return False
+
+
+def _dedupe_doc_order(idx, nodes):
+    special = [n for n in nodes if n is _DOC]
+    elems = [n for n in nodes if n is not _DOC and not isinstance(n, _Attr)]
+    root = idx.snapshot.root
+    has_root = any(n is root for n in elems)
+    out = idx.sort([n for n in elems if n is not root])
+    if has_root:
+        out.insert(0, root)
+    return special[:1] + out
+
+
+def _xpath_select(expr, idx, context):
+    result = _eval(expr, idx, context if context is not None else _DOC)
+    if not isinstance(result, list):
+        raise QuerySyntaxError("xpath locator does not select nodes")
+    # find_elements never returns the document or the <AppiumAUT> wrapper
+    return [n for n in result if n is not _DOC and not isinstance(n, _Attr) and n is not idx.snapshot.root]
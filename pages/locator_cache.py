@@ -0,0 +1,156 @@
+# pages/locator_cache.py
+import json
+import os
+import re
+import threading
+
+from utils.artifact_index import _FileLock
+
+_cache = None
+
+# predicate / class-chain operators that match more than one exact value
+_FUZZY_OPERATORS = re.compile(r"\b(CONTAINS|BEGINSWITH|ENDSWITH|LIKE|MATCHES)\b", re.IGNORECASE)
+
+
+def configure_locator_cache(path, app_build):
+    """Load (or create) the process-wide cache used by every LocatorChain."""
+    global _cache
+    _cache = LocatorCache(path, app_build)
+    return _cache
+
+
+def get_locator_cache():
+    """The configured cache, or None (chains then keep their hardcoded order)."""
+    return _cache
+
+
+def candidate_key(by, value):
+    return f"{by}|{value}"
+
+
+def precision(by, value):
+    """
+    0 exact (ids, equality predicates / XPaths), 1 fuzzy (CONTAINS, contains()),
+    2 catch-all (class names, other-platform strategies, XPaths without a filter or on //*
+    with a fuzzy filter).
+    """
+    if by in ("accessibility id", "id", "name"):
+        return 0
+    if by in ("-ios predicate string", "-ios class chain"):
+        return 1 if _FUZZY_OPERATORS.search(value) else 0
+    if by == "xpath":
+        if "[" not in value:
+            return 2
+        fuzzy = "contains(" in value or "starts-with(" in value
+        if not fuzzy:
+            return 0
+        return 2 if value.lstrip("(").startswith("//*") else 1
+    return 2
+
+
+class LocatorCache:
+    """
+    Remembers which candidate of each LocatorChain wins and how long it took.
+
+    Entries are keyed by chain name ("<PageClass>.<element>") and candidate, and
+    belong to one app build (BROWSERSTACK_APP): when the build changes the whole
+    store is evicted because locators may behave differently on the new binary.
+    Counts are accumulated in memory and merged into the JSON file on save(), so
+    several xdist workers can share one file.
+    """
+
+    def __init__(self, path, app_build):
+        self.path = path
+        self.app_build = app_build or "unknown"
+        self._lock = threading.Lock()
+        self._stats = self._load()  # chain -> candidate -> {"wins", "win_ms", "attempts"}
+        self._delta = {}            # same shape, only what this process added
+
+    # ---------- persistence ----------
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("app_build") != self.app_build:
+            # new build -> evict everything learned for the old one
+            return {}
+        return data.get("entries", {})
+
+    def save(self):
+        with self._lock:
+            if not self._delta:
+                return
+            # read-merge-replace under the file lock, or two workers saving at once lose each other's counts
+            with _FileLock(self.path):
+                entries = self._load()
+                for chain, cands in self._delta.items():
+                    for key, d in cands.items():
+                        _add(entries.setdefault(chain, {}).setdefault(key, _empty()), d)
+                tmp = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"app_build": self.app_build, "entries": entries}, f, indent=1, sort_keys=True)
+                os.replace(tmp, self.path)
+            self._delta = {}
+            self._stats = entries
+
+    # ---------- recording ----------
+    def record(self, chain, candidates, winner, elapsed_s, probed=None):
+        """Count one resolve of `chain`: `probed` indices (default all) were attempted, `winner` (index or None) won."""
+        with self._lock:
+            for i, (by, val) in enumerate(candidates):
+                if probed is not None and i not in probed and i != winner:
+                    continue
+                d = {"wins": 0, "win_ms": 0.0, "attempts": 1}
+                if i == winner:
+                    d["wins"] = 1
+                    d["win_ms"] = elapsed_s * 1000.0
+                key = candidate_key(by, val)
+                _add(self._stats.setdefault(chain, {}).setdefault(key, _empty()), d)
+                _add(self._delta.setdefault(chain, {}).setdefault(key, _empty()), d)
+
+    # ---------- queries ----------
+    def ranked(self, chain, candidates):
+        """
+        Indices of `candidates` with the historically fastest winner first, across the whole chain.
+        One guard: a fuzzy or catch-all candidate (see precision()) never moves ahead of an exact
+        candidate that has ever won, so a loose fallback that once won (e.g. a keyword XPath) can't
+        shadow the exact locator. Candidates that never won keep their hardcoded order after the winners.
+        """
+        stats = self._stats.get(chain)
+        if not stats:
+            return list(range(len(candidates)))
+        wins = {}
+        for i, cand in enumerate(candidates):
+            s = stats.get(candidate_key(*cand))
+            if s and s["wins"]:
+                wins[i] = s["win_ms"] / s["wins"]
+        exact_won = any(precision(*candidates[i]) == 0 for i in wins)
+
+        def sort_key(i):
+            if i not in wins:
+                return (2, 0.0, i)
+            loose = exact_won and precision(*candidates[i]) > 0
+            return (1 if loose else 0, wins[i], i)
+
+        return sorted(range(len(candidates)), key=sort_key)
+
+    def never_won(self):
+        """[(chain, candidate_key, attempts)] for candidates attempted but never chosen."""
+        rows = []
+        for chain, cands in sorted(self._stats.items()):
+            for key, s in sorted(cands.items()):
+                if s["attempts"] and not s["wins"]:
+                    rows.append((chain, key, s["attempts"]))
+        return rows
+
+
+def _empty():
+    return {"wins": 0, "win_ms": 0.0, "attempts": 0}
+
+
+def _add(into, d):
+    into["wins"] += d["wins"]
+    into["win_ms"] += d["win_ms"]
+    into["attempts"] += d["attempts"]
@@ -0,0 +1,134 @@
+# pages/locator_chain.py
+import time
+from collections import namedtuple
+
+from appium.webdriver.common.appiumby import AppiumBy
+from selenium.common.exceptions import InvalidSelectorException, WebDriverException
+
+from pages.locator_cache import get_locator_cache
+from pages.locator_rewrite import note_sent, rewrite_locator
+from pages.waits import wait_until
+
+# strategies that can be expressed as an iOS predicate and merged into one query
+_PREDICATE_ATTR = {
+    AppiumBy.ACCESSIBILITY_ID: "name",
+    AppiumBy.NAME: "name",
+    AppiumBy.CLASS_NAME: "type",
+}
+
+ChainMatch = namedtuple("ChainMatch", "element index by value")
+
+
+def _quote(value):
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def as_predicate(by, value):
+    """Return an equivalent iOS predicate for (by, value) or None."""
+    if by == AppiumBy.IOS_PREDICATE:
+        return value
+    attr = _PREDICATE_ATTR.get(by)
+    if attr:
+        return f"{attr} == {_quote(value)}"
+    return None
+
+
+class LocatorChain:
+    """
+    Ordered list of (by, value) candidates resolved in ONE polling loop.
+
+    Instead of giving every candidate its own WebDriverWait, each poll probes all
+    candidates at once (predicate-compatible candidates are merged into a single
+    compound IOS_PREDICATE query). A miss therefore costs one timeout, not the sum
+    of all timeouts. When several candidates match, the earliest one in the list wins;
+    with a LocatorCache configured the historically fastest winner is tried first (a loose
+    candidate never ahead of an exact one that has won), and every resolve is recorded back
+    into the cache.
+    XPath candidates are sent as their native rewrite (see locator_rewrite) when one exists,
+    which also lets them join the compound predicate. Polling (and the per-test wait
+    budget) is pages/waits.py's; poll= fixes the interval instead.
+    """
+
+    def __init__(self, name, candidates, poll=None):
+        self.name = name
+        self.candidates = list(candidates)
+        self.poll = poll
+        # what is actually sent for each candidate; cache keys and ChainMatch keep the original
+        self._queries = [rewrite_locator(by, val) for by, val in self.candidates]
+        merged = [i for i, (by, val) in enumerate(self._queries) if as_predicate(by, val) is not None]
+        # merging only pays off with 2+ predicate-compatible candidates
+        self._merged = merged if len(merged) > 1 else []
+        self._compound = " OR ".join(
+            f"({as_predicate(*self._queries[i])})" for i in self._merged
+        )
+
+    def __repr__(self):
+        return f"LocatorChain({self.name!r}, {len(self.candidates)} candidates)"
+
+    def resolve(self, driver, timeout=3):
+        """Return ChainMatch(element, index, by, value) for the winning candidate, or None."""
+        cache = get_locator_cache()
+        order = cache.ranked(self.name, self.candidates) if cache else list(range(len(self.candidates)))
+        start = time.time()
+        state = {"compound": bool(self._compound), "broken": set(), "probed": set()}
+        found = []
+
+        def poll_once(driver):
+            match = self._poll_once(driver, state, order)
+            if match is not None:
+                found.append(match)
+            # every candidate is unusable on this platform: stop waiting
+            return match is not None or len(state["broken"]) == len(self.candidates)
+
+        wait_until(driver, poll_once, timeout, label=self.name, poll=self.poll)
+        match = found[0] if found else None
+        if cache:
+            cache.record(self.name, self.candidates, match.index if match else None, time.time() - start,
+                         probed=state["probed"])
+        return match
+
+    def find(self, driver, timeout=3):
+        match = self.resolve(driver, timeout=timeout)
+        return match.element if match else None
+
+    def exists(self, driver, timeout=3):
+        return self.resolve(driver, timeout=timeout) is not None
+
+    def _poll_once(self, driver, state, order):
+        if state["compound"]:
+            hits = self._find(driver, AppiumBy.IOS_PREDICATE, self._compound)
+            if hits is None:
+                # compound query rejected -> probe the candidates one by one from now on
+                state["compound"] = False
+            elif not hits:
+                # none of the merged candidates is present: only probe the others
+                state["probed"].update(self._merged)
+                order = [i for i in order if i not in self._merged]
+        for i in order:
+            if i in state["broken"]:
+                continue
+            note_sent(*self.candidates[i])
+            state["probed"].add(i)
+            elems = self._find(driver, *self._queries[i])
+            if elems is None:
+                state["broken"].add(i)
+            elif elems:
+                by, val = self.candidates[i]
+                return ChainMatch(elems[0], i, by, val)
+        return None
+
+    @staticmethod
+    def _find(driver, by, val):
+        """find_elements that returns None when the locator itself is unusable on this platform."""
+        try:
+            return driver.find_elements(by, val)
+        except InvalidSelectorException:
+            return None
+        except WebDriverException as e:
+            # e.g. ANDROID_UIAUTOMATOR on an iOS session
+            msg = str(e).lower()
+            if "strategy" in msg or "selector" in msg:
+                return None
+            return []
+        except Exception:
+            return []
@@ -0,0 +1,251 @@
+# pages/locator_rewrite.py
+"""
+Rewrites XPath locators into native XCUITest queries before they are sent.
+
+XPath forces WDA to serialize the whole accessibility tree on every lookup, while
+-ios predicate string / -ios class chain queries run natively. The page objects
+mostly use two XPath idioms that have exact native equivalents:
+
+  //T[contains(translate(@label,'ABC..Z','abc..z'),'needle') or ...]
+      -> type == 'T' AND (label CONTAINS[c] 'needle' OR ...)
+  //A | //B
+      -> type == 'A' OR type == 'B'
+
+and child paths such as //A[...]/B become the class chain **/A[`...`]/B.
+Android-only attributes (@text, @content-desc, @resource-id) and text()/.
+string values are always empty in XCUITest sources, so terms testing them are
+dropped. Anything else (ancestor::, positions, functions we can't map, relative
+paths) stays XPath. Every decision is recorded in a registry reported at the end
+of the run; tests/test_locator_rewrite.py proves the rewrites equivalent on the
+page sources stored in artifacts/.
+"""
+import os
+import string
+import threading
+from functools import lru_cache
+
+from appium.webdriver.common.appiumby import AppiumBy
+from selenium.webdriver.remote.command import Command
+
+from pages.ios_query import QuerySyntaxError, parse_xpath
+
+# LOCATOR_REWRITE=0 sends every locator exactly as written
+REWRITE_ENABLED = os.environ.get("LOCATOR_REWRITE", "1") != "0"
+
+_IOS_ATTRS = {"name", "label", "value", "type"}
+_ANDROID_ATTRS = {"text", "content-desc", "resource-id", "class", "package"}
+_UPPER, _LOWER = string.ascii_uppercase, string.ascii_lowercase
+
+# the compound predicate for a locator that can never match on iOS
+NEVER_MATCHES = "FALSEPREDICATE"
+
+_registry = {}  # xpath -> (by, value) it was rewritten to, or None when kept
+_lock = threading.Lock()
+
+
+class _Untranslatable(Exception):
+    pass
+
+
+# ---------- public API ----------
+def rewrite_locator(by, value):
+    """(by, value) to send instead of the given locator; non-XPath locators pass through."""
+    if by != AppiumBy.XPATH or not REWRITE_ENABLED:
+        return by, value
+    return _rewrite_xpath(value) or (by, value)
+
+
+def note_sent(by, value):
+    """Record that the XPath (by, value) was sent to a session (as its rewrite or as written)."""
+    if by != AppiumBy.XPATH or not REWRITE_ENABLED:
+        return
+    with _lock:
+        _registry.setdefault(value, _rewrite_xpath(value))
+
+
+def rewrites():
+    """{xpath: (by, value) or None} for every XPath sent to a session by this process."""
+    with _lock:
+        return dict(_registry)
+
+
+def rewrite_report():
+    """Human-readable lines for the terminal summary."""
+    seen = rewrites()
+    lines = []
+    for xpath, target in sorted(seen.items()):
+        if target is None:
+            lines.append(f"kept xpath: {xpath}")
+        else:
+            lines.append(f"{target[0]}: {target[1]}  <-  {xpath}")
+    return lines
+
+
+def install_locator_rewriting(driver):
+    """Rewrite the XPath of every find_element(s) issued through this driver (not child finds)."""
+    if not REWRITE_ENABLED or getattr(driver, "_rewrite_hooked", False):
+        return
+    original = driver.execute
+
+    def execute(driver_command, params=None):
+        if driver_command in (Command.FIND_ELEMENT, Command.FIND_ELEMENTS) and params and params.get("using") == AppiumBy.XPATH:
+            note_sent(AppiumBy.XPATH, params.get("value"))
+            by, value = rewrite_locator(AppiumBy.XPATH, params.get("value"))
+            params = dict(params, using=by, value=value)
+        return original(driver_command, params)
+
+    driver.execute = execute
+    driver._rewrite_hooked = True
+
+
+# ---------- xpath -> native ----------
+@lru_cache(maxsize=None)
+def _rewrite_xpath(xpath):
+    try:
+        expr = parse_xpath(xpath)
+    except QuerySyntaxError:
+        return None
+    try:
+        if expr[0] == "union":
+            return AppiumBy.IOS_PREDICATE, _or([_step_predicate(*_single_step(p)) for p in expr[1]])
+        steps = _child_steps(expr)
+        if len(steps) == 1:
+            return AppiumBy.IOS_PREDICATE, _step_predicate(*steps[0])
+        return AppiumBy.IOS_CLASS_CHAIN, _class_chain(steps)
+    except _Untranslatable:
+        return None
+
+
+def _child_steps(expr):
+    """[(type, [predicates])] of an absolute '//A[...]/B[...]' path (child steps only after '//')."""
+    if expr[0] != "path" or not expr[1] or len(expr[2]) < 2:
+        raise _Untranslatable()
+    first, rest = expr[2][0], expr[2][1:]
+    if first != ("descendant-or-self", "node", []):
+        raise _Untranslatable()
+    steps = []
+    for axis, test, preds in rest:
+        if axis != "child" or test in ("node()", "text()", "node"):
+            raise _Untranslatable()
+        steps.append((test, preds))
+    if len(steps) > 1 and (steps[0][0] == "*" or steps[0][0] == "XCUIElementTypeApplication"):
+        # '//*/B' also matches the application's own children, '**/*/B' would not
+        raise _Untranslatable()
+    return steps
+
+
+def _single_step(expr):
+    steps = _child_steps(expr)
+    if len(steps) != 1:
+        raise _Untranslatable()
+    return steps[0]
+
+
+def _step_predicate(test, preds):
+    if test != "*" and not test.startswith("XCUIElementType"):
+        if "." in test:
+            return NEVER_MATCHES  # an Android class name (android.widget.TextView)
+        raise _Untranslatable()
+    parts = [] if test == "*" else [f"type == {_quote(test)}"]
+    for pred in preds:
+        parts.append(_term(pred))
+    return _and(parts) if parts else "TRUEPREDICATE"
+
+
+def _class_chain(steps):
+    segments = []
+    for test, preds in steps:
+        if test != "*" and not test.startswith("XCUIElementType"):
+            raise _Untranslatable()
+        segment = test
+        if preds:
+            pred = _and([_term(p) for p in preds])
+            if pred == NEVER_MATCHES:
+                return "**/" + test + "[`" + NEVER_MATCHES + "`]"
+            if "`" in pred:
+                raise _Untranslatable()
+            segment += f"[`{pred}`]"
+        segments.append(segment)
+    return "**/" + "/".join(segments)
+
+
+def _term(node):
+    """NSPredicate text for one XPath predicate term (raises _Untranslatable)."""
+    kind = node[0]
+    if kind in ("or", "and"):
+        parts = [_term(p) for p in node[1]]
+        return _or(parts) if kind == "or" else _and(parts)
+    if kind == "fn" and node[1] == "not" and len(node[2]) == 1:
+        inner = _term(node[2][0])
+        if inner in (NEVER_MATCHES, "TRUEPREDICATE"):
+            return "TRUEPREDICATE" if inner == NEVER_MATCHES else NEVER_MATCHES
+        return f"NOT ({inner})"
+    if kind == "fn" and node[1] in ("contains", "starts-with") and len(node[2]) == 2:
+        op = "CONTAINS" if node[1] == "contains" else "BEGINSWITH"
+        return _string_test(node[2][0], op, node[2][1])
+    if kind == "cmp" and node[1] == "=":
+        left, right = node[2], node[3]
+        if left[0] == "lit":
+            left, right = right, left
+        return _string_test(left, "==", right)
+    raise _Untranslatable()
+
+
+def _string_test(subject, op, needle):
+    if needle[0] != "lit" or not needle[1]:
+        raise _Untranslatable()
+    text = needle[1]
+    folded = False
+    if subject[0] == "fn" and subject[1] == "translate" and len(subject[2]) == 3:
+        src, frm, to = subject[2]
+        if (frm, to) != (("lit", _UPPER), ("lit", _LOWER)):
+            raise _Untranslatable()
+        # translate() only lower-cases A-Z; [c] folds everything, so only ASCII
+        # needles without upper-case letters give identical results
+        if not text.isascii() or text != text.lower():
+            raise _Untranslatable()
+        subject, folded = src, True
+    attr = _attribute(subject)
+    if attr is None:
+        # Android attribute / text() / '.': always "" on iOS, never equal to or containing a needle
+        return NEVER_MATCHES
+    return f"{attr} {op}{'[c]' if folded else ''} {_quote(text)}"
+
+
+def _attribute(node):
+    """iOS attribute name a string-valued XPath expression reads, None when it is always empty."""
+    if node[0] == "path" and not node[1] and len(node[2]) == 1:
+        axis, test, preds = node[2][0]
+        if preds:
+            raise _Untranslatable()
+        if axis == "attribute" and test in _IOS_ATTRS:
+            return test
+        if axis == "attribute" and test in _ANDROID_ATTRS:
+            return None
+        if axis == "child" and test == "text()":
+            return None
+        if axis == "self" and test == "node":
+            return None
+    raise _Untranslatable()
+
+
+def _or(parts):
+    if "TRUEPREDICATE" in parts:
+        return "TRUEPREDICATE"
+    parts = [p for p in parts if p != NEVER_MATCHES]
+    if not parts:
+        return NEVER_MATCHES
+    return parts[0] if len(parts) == 1 else " OR ".join(f"({p})" for p in parts)
+
+
+def _and(parts):
+    if NEVER_MATCHES in parts:
+        return NEVER_MATCHES
+    parts = [p for p in parts if p != "TRUEPREDICATE"]
+    if not parts:
+        return "TRUEPREDICATE"
+    return parts[0] if len(parts) == 1 else " AND ".join(f"({p})" if " OR " in p else p for p in parts)
+
+
+def _quote(value):
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
@@ -1,8 +1,13 @@
 # pages/login_page.py
 from appium.webdriver.common.appiumby import AppiumBy
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import time
+
+from pages.input_batch import InputBatch
+from pages.locator_chain import LocatorChain
+from pages.snapshot import SNAPSHOTS_ENABLED, PageSnapshot, snapshot_for
+from pages.waits import all_of, present, wait_until
+
+_ALERT_HINTS = ("invalid", "do not match", "epic sadface", "required")
+_ERROR_HINTS = ("invalid", "error", "do not match", "epic sadface", "username and password", "required", "locked")
 
 class LoginPage:
     """
@@ -29,6 +34,11 @@ class LoginPage:
             (AppiumBy.IOS_PREDICATE, "type == 'XCUIElementTypeButton' AND (label CONTAINS 'LOGIN' OR name CONTAINS 'LOGIN' OR label CONTAINS 'Log in' OR label CONTAINS 'Log In')"),
             (AppiumBy.XPATH, "//XCUIElementTypeButton[contains(translate(@label,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'login') or contains(translate(@name,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'login')]")
         ]
+        # LOGOUT entry of the side menu (menu open)
+        self.logout_btn_candidates = [
+            (AppiumBy.ACCESSIBILITY_ID, "test-LOGOUT"),
+            (AppiumBy.IOS_PREDICATE, "label == 'LOGOUT' AND visible == 1"),
+        ]
 
         # error candidate patterns (broad)
         self.error_candidates = [
@@ -37,18 +47,21 @@ class LoginPage:
             # generic modal/alert nodes
             (AppiumBy.XPATH, "//*[contains(translate(@label,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'epic sadface') or contains(translate(@label,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'username and password do not match') or contains(translate(@name,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'username and password do not match')]")
         ]
+        self.error_chain = LocatorChain("LoginPage.error", self.error_candidates)
+
+        # logical element names used as LocatorCache keys
+        self._chain_names = {
+            id(self.username_candidates): "LoginPage.username",
+            id(self.password_candidates): "LoginPage.password",
+            id(self.login_btn_candidates): "LoginPage.login_btn",
+            id(self.logout_btn_candidates): "LoginPage.logout_btn",
+        }
 
     def _find_first(self, candidates, timeout=None):
-        """Return first element found from candidates or None."""
-        timeout = timeout or self.timeout
-        for by, val in candidates:
-            try:
-                el = WebDriverWait(self.driver, 1).until(EC.presence_of_element_located((by, val)))
-                if el:
-                    return el
-            except Exception:
-                continue
-        return None
+        """Return first element found from candidates or None (one shared polling loop)."""
+        timeout = timeout or 3
+        name = self._chain_names.get(id(candidates), "LoginPage.element")
+        return LocatorChain(name, candidates).find(self.driver, timeout=timeout)
 
     def _try_click(self, el):
         """Try click(), then mobile: tap fallback."""
@@ -87,22 +100,20 @@ class LoginPage:
 
     def login(self, username, password):
         """Type credentials and press login. Raises if core controls missing."""
+        if self._login_batched(username, password):
+            return True
+
         u = self._find_first(self.username_candidates)
         p = self._find_first(self.password_candidates)
         btn = self._find_first(self.login_btn_candidates)
 
         if u is None or p is None or btn is None:
-            # try a last-chance direct finds (longer wait) before failing
-            try:
-                u = WebDriverWait(self.driver, 3).until(lambda d: d.find_element(*self.username_candidates[0]))
-            except Exception:
-                pass
+            # last chance: the missing controls by their primary locator, in one 3 s polling loop
+            found = [u, p, btn]
+            primaries = [self.username_candidates[0], self.password_candidates[0], self.login_btn_candidates[0]]
+            conditions = [present(*loc) if el is None else (lambda d, el=el: el) for el, loc in zip(found, primaries)]
             try:
-                p = WebDriverWait(self.driver, 3).until(lambda d: d.find_element(*self.password_candidates[0]))
-            except Exception:
-                pass
-            try:
-                btn = WebDriverWait(self.driver, 3).until(lambda d: d.find_element(*self.login_btn_candidates[0]))
+                u, p, btn = wait_until(self.driver, all_of(*conditions), 3, label="LoginPage.controls") or found
             except Exception:
                 pass
 
@@ -134,6 +145,56 @@ class LoginPage:
 
         return clicked
 
+    def _snapshot_control(self, snap, candidates):
+        for by, val in candidates:
+            for el in snap.find_elements(by, val):
+                if el.get("visible") == "true":
+                    return el
+        return None
+
+    def _login_batched(self, username, password):
+        """
+        Login as one W3C actions request (plus a page source when none is cached, and one to
+        confirm): the controls come from the snapshot, so there are no finds. False when that's
+        not possible (controls not visible, a field already filled and needing a clear, batches
+        rejected) or the typing didn't land -> per-step path.
+        """
+        if not SNAPSHOTS_ENABLED:
+            return False
+        try:
+            snap = snapshot_for(self.driver)
+        except Exception:
+            return False
+        u = self._snapshot_control(snap, self.username_candidates)
+        p = self._snapshot_control(snap, self.password_candidates)
+        btn = self._snapshot_control(snap, self.login_btn_candidates)
+        if u is None or p is None or btn is None:
+            return False
+        # an empty field shows its placeholder as value
+        if any((f.get("value") or "") not in ("", f.get("placeholderValue") or "") for f in (u, p)):
+            return False
+        if not InputBatch(self.driver).type(u, username).type(p, password).tap(btn).perform():
+            return False
+        # accepted only means the hub took the payload: keystrokes sent before the keyboard
+        # came up are lost, so check what the screen shows now
+        return self._batch_landed(username, password)
+
+    def _batch_landed(self, username, password):
+        """True once the login form is gone, or still shows both fields filled as typed."""
+        try:
+            snap = snapshot_for(self.driver, refresh=True)
+        except Exception:
+            return False
+        u = self._snapshot_control(snap, self.username_candidates)
+        p = self._snapshot_control(snap, self.password_candidates)
+        if u is None and p is None:
+            return True
+        if u is None or p is None:
+            return False
+        # the secure field shows one bullet per character
+        return (u.get("value") or "") == username and len(p.get("value") or "") == len(password) \
+            and (p.get("value") or "") != (p.get("placeholderValue") or "")
+
     def get_error_text(self, wait_seconds=4):
         """Return the best-effort error text after a login attempt.
 
@@ -142,58 +203,88 @@ class LoginPage:
          - alert/modal containers,
          - any visible static text that looks like an error.
         """
-        deadline = time.time() + (wait_seconds or 4)
-        last = ""
-        while time.time() < deadline:
-            # 1) check explicit candidate locators
-            for by, val in self.error_candidates:
-                try:
-                    el = self.driver.find_element(by, val)
-                    if el:
-                        txt = (el.text or el.get_attribute("label") or el.get_attribute("value") or "").strip()
-                        if txt:
-                            return txt
-                except Exception:
-                    continue
+        return wait_until(self.driver, lambda d: self._scan_error_text(), wait_seconds or 4,
+                          label="LoginPage.error_text") or ""
 
-            # 2) check standard iOS alert/body nodes for common phrases
+    def _scan_error_text(self):
+        """One look for an error text ("" when there is none yet)."""
+        # whole scan on one page_source snapshot instead of a round trip per locator/node
+        if SNAPSHOTS_ENABLED:
             try:
-                # look for nodes that contain the whole selector text (as observed)
-                els = self.driver.find_elements(AppiumBy.XPATH, "//XCUIElementTypeOther | //XCUIElementTypeStaticText")
-                for e in els[:40]:
-                    try:
-                        txt = (e.text or e.get_attribute("label") or e.get_attribute("value") or "").strip()
-                        if not txt:
-                            continue
-                        lower = txt.lower()
-                        if ("invalid" in lower) or ("do not match" in lower) or ("epic sadface" in lower) or ("username" in lower and "password" in lower) or ("required" in lower):
-                            return txt
-                    except Exception:
-                        continue
+                return self._error_text_from(snapshot_for(self.driver, refresh=True))
             except Exception:
                 pass
 
-            # 3) broad scan of static text nodes picking anything that looks like an error
-            try:
-                statics = self.driver.find_elements(AppiumBy.XPATH, "//XCUIElementTypeStaticText")
-                for s in statics[:60]:
-                    try:
-                        txt = (s.text or s.get_attribute("label") or s.get_attribute("value") or "").strip()
-                        if not txt:
-                            continue
-                        lower = txt.lower()
-                        if any(k in lower for k in ("invalid", "error", "do not match", "epic sadface", "username and password", "required", "locked")):
-                            return txt
-                        # small heuristic to avoid returning generic UI text: require short length or presence of keywords
-                        if len(txt) < 60 and ("!" in txt or "error" in lower):
-                            return txt
-                    except Exception:
+        # 1) check explicit candidate locators (single pass, no implicit wait per candidate)
+        try:
+            el = self.error_chain.find(self.driver, timeout=0)
+            if el:
+                txt = (el.text or el.get_attribute("label") or el.get_attribute("value") or "").strip()
+                if txt:
+                    return txt
+        except Exception:
+            pass
+
+        # 2) check standard iOS alert/body nodes for common phrases
+        try:
+            # look for nodes that contain the whole selector text (as observed)
+            els = self.driver.find_elements(AppiumBy.XPATH, "//XCUIElementTypeOther | //XCUIElementTypeStaticText")
+            for e in els[:40]:
+                try:
+                    txt = (e.text or e.get_attribute("label") or e.get_attribute("value") or "").strip()
+                    if not txt:
                         continue
-            except Exception:
-                pass
+                    lower = txt.lower()
+                    if ("invalid" in lower) or ("do not match" in lower) or ("epic sadface" in lower) or ("username" in lower and "password" in lower) or ("required" in lower):
+                        return txt
+                except Exception:
+                    continue
+        except Exception:
+            pass
+
+        # 3) broad scan of static text nodes picking anything that looks like an error
+        try:
+            statics = self.driver.find_elements(AppiumBy.XPATH, "//XCUIElementTypeStaticText")
+            for s in statics[:60]:
+                try:
+                    txt = (s.text or s.get_attribute("label") or s.get_attribute("value") or "").strip()
+                    if not txt:
+                        continue
+                    lower = txt.lower()
+                    if any(k in lower for k in ("invalid", "error", "do not match", "epic sadface", "username and password", "required", "locked")):
+                        return txt
+                    # small heuristic to avoid returning generic UI text: require short length or presence of keywords
+                    if len(txt) < 60 and ("!" in txt or "error" in lower):
+                        return txt
+                except Exception:
+                    continue
+        except Exception:
+            pass
 
-            # nothing yet — poll a short time
-            time.sleep(0.35)
+        return ""
 
-        # final fallback: return empty string
+    def _error_text_from(self, snap):
+        """get_error_text evaluated locally on a PageSnapshot (same locators, zero extra round trips)."""
+        # 1) explicit candidate locators
+        for by, val in self.error_candidates:
+            for el in snap.find_elements(by, val)[:1]:
+                txt = PageSnapshot.text(el)
+                if txt:
+                    return txt
+        # 2) standard iOS alert/body nodes
+        for el in snap.find_elements(AppiumBy.XPATH, "//XCUIElementTypeOther | //XCUIElementTypeStaticText")[:40]:
+            txt = PageSnapshot.text(el)
+            lower = txt.lower()
+            if txt and (any(k in lower for k in _ALERT_HINTS) or ("username" in lower and "password" in lower)):
+                return txt
+        # 3) broad scan of static text nodes
+        for el in snap.find_elements(AppiumBy.XPATH, "//XCUIElementTypeStaticText")[:60]:
+            txt = PageSnapshot.text(el)
+            if not txt:
+                continue
+            lower = txt.lower()
+            if any(k in lower for k in _ERROR_HINTS):
+                return txt
+            if len(txt) < 60 and ("!" in txt or "error" in lower):
+                return txt
         return ""
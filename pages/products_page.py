@@ -1,35 +1,56 @@
 # pages/products_page.py
 from appium.webdriver.common.appiumby import AppiumBy
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 import re
 
+from pages.locator_chain import LocatorChain
+from pages.snapshot import SNAPSHOTS_ENABLED, snapshot_for
+from pages.waits import any_of, present, wait_until
+
 class ProductsPage:
     def __init__(self, driver, timeout=10):
         self.driver = driver
         self.timeout = timeout
         self.PRODUCTS_HEADER = (AppiumBy.IOS_PREDICATE, 'label == "PRODUCTS"')
         self.PRODUCT_ITEM = (AppiumBy.IOS_PREDICATE, "label CONTAINS 'ADD TO CART' OR label CONTAINS '$'")
+        self.TITLE_PRED = "type == 'XCUIElementTypeStaticText' and (label CONTAINS 'Sauce' or label CONTAINS 'Test.allTheThings' or name CONTAINS 'test-Item title')"
+        self.PRICE_PRED = "type == 'XCUIElementTypeStaticText' AND label CONTAINS '$'"
+        self.sort_btn_candidates = [
+            (AppiumBy.ACCESSIBILITY_ID, "test-Modal Selector Button"),
+            (AppiumBy.ACCESSIBILITY_ID, "test-Sort"),
+            (AppiumBy.IOS_PREDICATE, "label CONTAINS 'Sort' OR label CONTAINS 'Sort By'"),
+            (AppiumBy.XPATH, "//*[contains(translate(@label,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'sort') or contains(translate(@text,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'sort') or contains(translate(@content-desc,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'sort')]"),
+            (AppiumBy.ANDROID_UIAUTOMATOR, 'new UiSelector().descriptionContains("sort")')
+        ]
+        self.sort_btn_chain = LocatorChain("ProductsPage.sort_btn", self.sort_btn_candidates)
 
     def wait_for_products(self):
-        try:
-            WebDriverWait(self.driver, self.timeout).until(EC.presence_of_element_located(self.PRODUCTS_HEADER))
-            return True
-        except Exception:
-            return self.exists(self.PRODUCT_ITEM, timeout=min(self.timeout, 8))
+        # header or any product row, in one polling loop
+        return wait_until(self.driver, any_of(self.PRODUCTS_HEADER, self.PRODUCT_ITEM), self.timeout,
+                          label="ProductsPage.products") is not None
 
     def exists(self, locator, timeout=3):
-        by, val = locator
+        return wait_until(self.driver, present(*locator), timeout, label="ProductsPage.exists") is not None
+
+    def _snapshot_texts(self, by, value):
+        """Texts of the nodes matching (by, value) in one page_source snapshot (None when snapshots are off/fail)."""
+        if not SNAPSHOTS_ENABLED:
+            return None
         try:
-            WebDriverWait(self.driver, timeout).until(EC.presence_of_element_located((by, val)))
-            return True
+            snap = snapshot_for(self.driver)
+            return [snap.text(el) for el in snap.find_elements(by, value)]
         except Exception:
-            return False
+            return None
 
     def get_all_product_titles(self):
+        # one GET /source instead of find_elements + text/label per product
         titles = []
+        for txt in self._snapshot_texts(AppiumBy.IOS_PREDICATE, self.TITLE_PRED) or []:
+            if txt and txt not in titles:
+                titles.append(txt)
+        if titles:
+            return titles
         try:
-            els = self.driver.find_elements(AppiumBy.IOS_PREDICATE, "type == 'XCUIElementTypeStaticText' and (label CONTAINS 'Sauce' or label CONTAINS 'Test.allTheThings' or name CONTAINS 'test-Item title')")
+            els = self.driver.find_elements(AppiumBy.IOS_PREDICATE, self.TITLE_PRED)
             for e in els:
                 txt = (e.text or e.get_attribute("label") or "").strip()
                 if txt and txt not in titles:
@@ -114,42 +135,20 @@ class ProductsPage:
 
     # ----------------- SORT helpers -----------------
     def is_sort_present(self, timeout=3):
-        candidates = [
-            (AppiumBy.ACCESSIBILITY_ID, "test-Modal Selector Button"),
-            (AppiumBy.ACCESSIBILITY_ID, "test-Sort"),
-            (AppiumBy.IOS_PREDICATE, "label CONTAINS 'Sort' OR label CONTAINS 'Sort By'"),
-            (AppiumBy.XPATH, "//*[contains(translate(@label,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'sort') or contains(translate(@text,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'sort') or contains(translate(@content-desc,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'sort')]"),
-            (AppiumBy.ANDROID_UIAUTOMATOR, 'new UiSelector().descriptionContains("sort")')
-        ]
-        for by, val in candidates:
-            try:
-                WebDriverWait(self.driver, timeout).until(EC.presence_of_element_located((by, val)))
-                return True
-            except Exception:
-                continue
-        return False
+        # all candidates share one polling loop: a miss costs `timeout`, not 5 x `timeout`
+        return self.sort_btn_chain.exists(self.driver, timeout=timeout)
 
     def open_sort_menu(self):
-        candidates = [
-            (AppiumBy.ACCESSIBILITY_ID, "test-Modal Selector Button"),
-            (AppiumBy.ACCESSIBILITY_ID, "test-Sort"),
-            (AppiumBy.IOS_PREDICATE, "label CONTAINS 'Sort'"),
-            (AppiumBy.XPATH, "//*[contains(translate(@label,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'sort') or contains(translate(@text,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'sort') or contains(translate(@content-desc,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'sort')]"),
-            (AppiumBy.ANDROID_UIAUTOMATOR, 'new UiSelector().descriptionContains("sort")')
-        ]
-        for by, val in candidates:
+        el = self.sort_btn_chain.find(self.driver, timeout=3)
+        if el is not None:
             try:
-                el = self.driver.find_element(by, val)
+                el.click()
+            except Exception:
                 try:
-                    el.click()
+                    self.driver.execute_script("mobile: tap", {"element": el.id})
                 except Exception:
-                    try:
-                        self.driver.execute_script("mobile: tap", {"element": el.id})
-                    except Exception:
-                        pass
-                return True
-            except Exception:
-                continue
+                    pass
+            return True
         # fallback: open menu and look for sort inside it
         try:
             menu = self.driver.find_element(AppiumBy.ACCESSIBILITY_ID, "test-Menu")
@@ -177,56 +176,57 @@ class ProductsPage:
         'Price (low to high)', 'Price (high to low)' (seen as accessible labels).
         We try ACCESSIBILITY_ID first for exact match, then fallbacks.
         """
-        # 1) exact accessibility id / label match (observed in pagesource)
+        # the exact strategies are probed in one polling loop (one cache entry per option)
+        chain = LocatorChain(f"ProductsPage.sort_option[{option_text}]", self.sort_option_candidates(option_text))
+        el = chain.find(self.driver, timeout=3)
+        if el is None:
+            # keyword matches only once the option itself is not there: "price" matches both
+            # price options, so it must never race the exact locator
+            fallback = LocatorChain(f"ProductsPage.sort_option_keyword[{option_text}]", self.sort_option_fallbacks())
+            el = fallback.find(self.driver, timeout=3)
+        if el is None:
+            return False
         try:
-            el = WebDriverWait(self.driver, 3).until(
-                EC.presence_of_element_located((AppiumBy.ACCESSIBILITY_ID, option_text))
-            )
-            try:
-                el.click()
-            except Exception:
-                try:
-                    self.driver.execute_script("mobile: tap", {"element": el.id})
-                except Exception:
-                    pass
-            return True
+            el.click()
         except Exception:
-            pass
-
-        # 2) try static text match (case-insensitive contains)
-        try:
-            xpath = f"//XCUIElementTypeOther[contains(translate(@label,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'{option_text.lower()}') or contains(translate(@name,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'{option_text.lower()}') or contains(translate(@value,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'{option_text.lower()}')]"
-            el = WebDriverWait(self.driver, 3).until(EC.presence_of_element_located((AppiumBy.XPATH, xpath)))
             try:
-                el.click()
+                self.driver.execute_script("mobile: tap", {"element": el.id})
             except Exception:
-                try:
-                    self.driver.execute_script("mobile: tap", {"element": el.id})
-                except Exception:
-                    pass
-            return True
-        except Exception:
-            pass
+                pass
+        return True
 
-        # 3) short keyword matches (e.g., 'low to high', 'price')
-        short_cands = ["low to high", "price (low", "price"]
-        for kw in short_cands:
-            try:
-                el = self.driver.find_element(AppiumBy.XPATH, f"//*[contains(translate(@label,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'{kw}') or contains(translate(@text,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'{kw}')]")
-                try:
-                    el.click()
-                except Exception:
-                    pass
-                return True
-            except Exception:
-                continue
+    def sort_option_candidates(self, option_text):
+        """
+        1) exact accessibility id / label match (observed in pagesource)
+        2) static text match (case-insensitive contains)
+        """
+        return [
+            (AppiumBy.ACCESSIBILITY_ID, option_text),
+            (AppiumBy.XPATH, f"//XCUIElementTypeOther[contains(translate(@label,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'{option_text.lower()}') or contains(translate(@name,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'{option_text.lower()}') or contains(translate(@value,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'{option_text.lower()}')]"),
+        ]
 
-        return False
+    def sort_option_fallbacks(self):
+        """3) short keyword matches (e.g., 'low to high', 'price'), tried after the candidates above."""
+        short_cands = ["low to high", "price (low", "price"]
+        return [
+            (AppiumBy.XPATH, f"//*[contains(translate(@label,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'{kw}') or contains(translate(@text,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'{kw}')]")
+            for kw in short_cands
+        ]
 
     def collect_visible_prices(self):
         prices = []
+        for txt in self._snapshot_texts(AppiumBy.IOS_PREDICATE, self.PRICE_PRED) or []:
+            m = re.search(r"[\d,]+(?:\.\d+)?", txt.replace(",", ""))
+            if m:
+                try:
+                    prices.append(float(m.group().replace(",", "")))
+                except Exception:
+                    continue
+        if prices:
+            return prices
+
         try:
-            els = self.driver.find_elements(AppiumBy.IOS_PREDICATE, "type == 'XCUIElementTypeStaticText' AND label CONTAINS '$'")
+            els = self.driver.find_elements(AppiumBy.IOS_PREDICATE, self.PRICE_PRED)
             for e in els:
                 txt = (e.text or e.get_attribute("label") or "").strip()
                 if txt:
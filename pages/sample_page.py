@@ -1,8 +1,9 @@
 # pages/sample_page.py
 import os
 from appium.webdriver.common.appiumby import AppiumBy
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+
+from pages.locator_chain import LocatorChain
+from pages.waits import present, wait_until
 
 class SamplePage:
     def __init__(self, driver, timeout=10):
@@ -16,24 +17,14 @@ class SamplePage:
             (AppiumBy.ACCESSIBILITY_ID, "test-Page"),
             (AppiumBy.ACCESSIBILITY_ID, "test-Title"),
             (AppiumBy.IOS_PREDICATE, "type == 'XCUIElementTypeStaticText' AND label CONTAINS 'Welcome'"),
-            (AppiumBy.ANDROID_UIAUTOMATOR, 'new UiSelector().className("android.widget.TextView")')
+            (AppiumBy.ANDROID_UIAUTOMATOR, 'new UiSelector().className("android.widget.TextView")'),
         ]
-        for by, val in candidates:
-            try:
-                WebDriverWait(self.driver, self.timeout).until(
-                    EC.presence_of_element_located((by, val))
-                )
-                return True
-            except Exception:
-                continue
-        # fallback: at least wait for any static text element
-        try:
-            WebDriverWait(self.driver, self.timeout).until(
-                EC.presence_of_element_located((AppiumBy.XPATH, "//XCUIElementTypeStaticText | //android.widget.TextView"))
-            )
+        # one polling loop for all indicators: at most self.timeout instead of 4 x self.timeout
+        if LocatorChain("SamplePage.app_ready", candidates).exists(self.driver, timeout=self.timeout):
             return True
-        except Exception:
-            return False
+        # fallback, only once no indicator showed up: at least wait for any static text element
+        return wait_until(self.driver, present(AppiumBy.XPATH, "//XCUIElementTypeStaticText | //android.widget.TextView"),
+                          self.timeout, label="SamplePage.any_text") is not None
 
     def open_ui_elements(self):
         """Navigate to UI Elements sample - best-effort."""
@@ -55,9 +46,8 @@ class SamplePage:
             btn = self.driver.find_element(AppiumBy.ACCESSIBILITY_ID, "test-Text Button")
             btn.click()
             # wait for label to update
-            el = WebDriverWait(self.driver, 6).until(
-                EC.presence_of_element_located((AppiumBy.ACCESSIBILITY_ID, "test-Text"))
-            )
+            el = wait_until(self.driver, present(AppiumBy.ACCESSIBILITY_ID, "test-Text"), 6,
+                            label="SamplePage.text", raise_on_timeout=True)
             return (el.text or el.get_attribute("label") or el.get_attribute("value") or "").strip()
         except Exception:
             return ""
@@ -69,9 +59,8 @@ class SamplePage:
             btn.click()
             # wait for alert
             try:
-                alert_ok = WebDriverWait(self.driver, 6).until(
-                    EC.presence_of_element_located((AppiumBy.ACCESSIBILITY_ID, "OK"))
-                )
+                alert_ok = wait_until(self.driver, present(AppiumBy.ACCESSIBILITY_ID, "OK"), 6,
+                                      label="SamplePage.alert_ok", raise_on_timeout=True)
                 alert_ok.click()
                 return True
             except Exception:
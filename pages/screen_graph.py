@@ -0,0 +1,345 @@
+# pages/screen_graph.py
+"""
+Navigation model of the app: screens recognised by page-source fingerprints, connected by
+page-object actions whose cost (seconds) is measured every time they run.
+
+    from pages.screen_graph import go_to, SORT_SHEET
+    go_to(driver, SORT_SHEET)       # from wherever the app is: login, products, cart, menu...
+
+go_to() reads the current screen from one snapshot, runs the cheapest known path (Dijkstra
+over the measured costs) and confirms the target with a second snapshot. When an action
+fails or lands somewhere unexpected it replans from the screen it actually reached, so
+recovering from a leftover dialog or menu is the same call.
+
+Measured costs are kept across runs in SCREEN_COSTS_PATH (default .screen_costs.json),
+an exponential moving average per edge; a failed edge gets a penalty so the next plan
+prefers another route when there is one.
+"""
+import heapq
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+from appium.webdriver.common.appiumby import AppiumBy
+
+from pages.snapshot import snapshot_for
+from pages.waits import wait_until
+from utils.artifact_index import _FileLock
+
+COSTS_PATH = os.environ.get("SCREEN_COSTS_PATH", os.path.join(os.getcwd(), ".screen_costs.json"))
+# weight of the newest measurement in an edge's cost
+_EWMA = 0.3
+# added to an edge's cost each time its action fails
+_FAILURE_PENALTY_S = 10.0
+
+# ---------- screens of the Swag Labs app (plus the sample app's UI Elements screen) ----------
+LOGIN_SCREEN = "login_screen"
+LOGIN_USED = "login_used"               # typed credentials / error banner left over: needs a reset
+PRODUCTS = "products_logged_in"
+PRODUCTS_IN_CART = "products_in_cart"   # product list, but something is in the cart
+PRODUCT_DETAILS = "product_details"
+CART_WITH_ITEM = "cart_with_item"
+CART_EMPTY = "cart_empty"
+MENU_OPEN = "menu_open"
+SORT_SHEET = "sort_sheet"
+UI_ELEMENTS = "ui_elements"
+
+_VISIBLE = "visible == 1"
+
+
+def _visible(predicate):
+    # the React Native tree keeps earlier screens around as invisible nodes
+    return f"{predicate} AND {_VISIBLE}"
+
+
+class Screen:
+    def __init__(self, name, all_of, none_of=()):
+        """all_of / none_of: iOS predicates that must (not) match a node of the snapshot."""
+        self.name = name
+        self.all_of = tuple(all_of)
+        self.none_of = tuple(none_of)
+
+    def matches(self, snap):
+        return (all(snap.find_elements(AppiumBy.IOS_PREDICATE, p) for p in self.all_of)
+                and not any(snap.find_elements(AppiumBy.IOS_PREDICATE, p) for p in self.none_of))
+
+
+class Edge:
+    def __init__(self, src, dst, action, cost):
+        self.src = src
+        self.dst = dst
+        self.action = action
+        self.cost = float(cost)
+        self.runs = 0
+        self.failures = 0
+
+    @property
+    def key(self):
+        return f"{self.src}->{self.dst}"
+
+    def __repr__(self):
+        return f"Edge({self.key}, {self.cost:.1f}s)"
+
+
+class ScreenGraph:
+    def __init__(self, costs_path=None):
+        self.screens = []            # checked in order: more specific fingerprints first
+        self.edges = {}              # src -> [Edge]
+        self.costs_path = costs_path
+        self.stats = Counter()       # edges run, "in_place", "replans"
+        self._costs_loaded = costs_path is None
+        self._lock = threading.Lock()
+
+    def add_screen(self, name, all_of, none_of=()):
+        self.screens.append(Screen(name, all_of, none_of))
+
+    def add_edge(self, src, dst, action, cost=2.0):
+        self.edges.setdefault(src, []).append(Edge(src, dst, action, cost))
+
+    def edge(self, src, dst):
+        return next((e for e in self.edges.get(src, ()) if e.dst == dst), None)
+
+    # ---------- where are we ----------
+    def detect(self, driver=None, snap=None):
+        """Name of the screen the app is on (one GET /source), or None when it isn't recognised."""
+        try:
+            snap = snap or snapshot_for(driver, refresh=True)
+        except Exception:
+            return None
+        for screen in self.screens:
+            if screen.matches(snap):
+                return screen.name
+        return None
+
+    # ---------- planning ----------
+    def path(self, src, dst):
+        """Cheapest list of edges from src to dst, [] when already there, None when unreachable."""
+        self._load_costs()
+        if src == dst:
+            return []
+        if src is None:
+            return None
+        best = {src: 0.0}
+        previous = {}
+        heap = [(0.0, 0, src)]
+        tie = 1
+        while heap:
+            cost, _, screen = heapq.heappop(heap)
+            if screen == dst:
+                hops = []
+                while screen != src:
+                    hops.append(previous[screen])
+                    screen = previous[screen].src
+                return hops[::-1]
+            if cost > best.get(screen, float("inf")):
+                continue
+            for edge in self.edges.get(screen, ()):
+                total = cost + edge.cost
+                if total < best.get(edge.dst, float("inf")):
+                    best[edge.dst] = total
+                    previous[edge.dst] = edge
+                    heapq.heappush(heap, (total, tie, edge.dst))
+                    tie += 1
+        return None
+
+    # ---------- driving ----------
+    def go_to(self, driver, target, replans=2, unknown_wait=3.0):
+        """
+        Drive the app to `target`; True once a snapshot confirms it.
+        An unrecognised screen (still rendering, animating) is re-read for up to unknown_wait seconds.
+        """
+        current = self.detect(driver) or wait_until(driver, self.detect, unknown_wait, label="screen_graph.detect")
+        if current == target:
+            self.stats["in_place"] += 1
+            return True
+        for attempt in range(replans + 1):
+            hops = self.path(current, target)
+            if hops is None:
+                return False
+            if attempt:
+                self.stats["replans"] += 1
+            for edge in hops:
+                if not self._run(edge, driver):
+                    break
+            current = self.detect(driver)
+            if current == target:
+                return True
+        return False
+
+    def _run(self, edge, driver):
+        started = time.time()
+        try:
+            ok = bool(edge.action(driver))
+        except Exception as e:
+            print(f"[screen_graph] {edge.key} failed: {e}")
+            ok = False
+        elapsed = time.time() - started
+        with self._lock:
+            edge.runs += 1
+            self.stats[edge.key] += 1
+            if ok:
+                edge.cost = (1 - _EWMA) * edge.cost + _EWMA * elapsed
+            else:
+                edge.failures += 1
+                edge.cost += _FAILURE_PENALTY_S
+        return ok
+
+    # ---------- measured costs ----------
+    def _load_costs(self):
+        if self._costs_loaded:
+            return
+        self._costs_loaded = True
+        for key, cost in self._read_costs().items():
+            src, _, dst = key.partition("->")
+            edge = self.edge(src, dst)
+            if edge is not None and edge.runs == 0:
+                edge.cost = float(cost)
+
+    def _read_costs(self):
+        try:
+            with open(self.costs_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError, TypeError):
+            return {}
+
+    def save_costs(self):
+        """Merge the costs of the edges run in this process into costs_path (xdist workers share it)."""
+        if not self.costs_path:
+            return
+        with self._lock:
+            measured = {e.key: round(e.cost, 3) for edges in self.edges.values() for e in edges if e.runs}
+        if not measured:
+            return
+        # read-merge-replace under the file lock, or two workers saving at once lose each other's edges
+        with _FileLock(self.costs_path):
+            costs = self._read_costs()
+            costs.update(measured)
+            tmp = f"{self.costs_path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(costs, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.costs_path)
+
+    def summary(self):
+        if not self.stats:
+            return None
+        hops = ", ".join(f"{k} x{v}" for k, v in sorted(self.stats.items()) if "->" in k)
+        text = f"screen graph: {self.stats['in_place']} arrival(s) in place"
+        if self.stats["replans"]:
+            text += f", {self.stats['replans']} replan(s)"
+        return text + (f"; edges run: {hops}" if hops else "")
+
+
+# ---------- actions ----------
+def _tap(driver, accessibility_id, timeout=4):
+    from pages.locator_chain import LocatorChain
+    el = LocatorChain(f"screen_graph.{accessibility_id}", [(AppiumBy.ACCESSIBILITY_ID, accessibility_id)]).find(driver, timeout=timeout)
+    if el is None:
+        return False
+    el.click()
+    return True
+
+
+def _login(driver):
+    from pages.login_page import LoginPage
+    from pages.products_page import ProductsPage
+    LoginPage(driver).login("standard_user", "secret_sauce")
+    return ProductsPage(driver).wait_for_products()
+
+
+def _remove_all(driver):
+    while _tap(driver, "test-REMOVE", timeout=1):
+        pass
+    return True
+
+
+def _empty_cart_and_continue(driver):
+    # leave the product list as clean as a fresh login found it
+    _remove_all(driver)
+    return _tap(driver, "test-CONTINUE SHOPPING")
+
+
+def _add_first_item_to_cart(driver):
+    from pages.cart_page import CartPage
+    from pages.products_page import ProductsPage
+    ProductsPage(driver).add_first_product_to_cart()
+    return CartPage(driver).open_cart()
+
+
+def _open_cart(driver):
+    from pages.cart_page import CartPage
+    return CartPage(driver).open_cart()
+
+
+def _open_first_product(driver):
+    from pages.products_page import ProductsPage
+    pp = ProductsPage(driver)
+    titles = pp.get_all_product_titles()
+    return bool(titles) and pp.open_product_details(titles[0])
+
+
+def _open_sort_sheet(driver):
+    from pages.products_page import ProductsPage
+    return ProductsPage(driver).open_sort_menu()
+
+
+def _logout_from_menu(driver):
+    # reset first, so the next login finds an empty cart
+    _tap(driver, "test-RESET APP STATE", timeout=2)
+    return _tap(driver, "test-LOGOUT")
+
+
+def _open_ui_elements(driver):
+    from pages.sample_page import SamplePage
+    sp = SamplePage(driver)
+    sp.wait_for_app()
+    return sp.open_ui_elements()
+
+
+def _swag_labs_graph():
+    graph = ScreenGraph(costs_path=COSTS_PATH)
+    cart_item = _visible("type == 'XCUIElementTypeStaticText' AND (label BEGINSWITH 'Sauce Labs' OR label BEGINSWITH 'Test.allTheThings')")
+    remove = _visible("name == 'test-REMOVE'")
+    your_cart = _visible("label == 'YOUR CART' AND type == 'XCUIElementTypeStaticText'")
+    products = _visible("label == 'PRODUCTS' AND type == 'XCUIElementTypeStaticText'")
+    username = _visible("name == 'test-Username'")
+
+    graph.add_screen(MENU_OPEN, [_visible("name == 'test-LOGOUT'")])
+    graph.add_screen(SORT_SHEET, [_visible("name == 'Sort items by...' AND type == 'XCUIElementTypeStaticText'")])
+    graph.add_screen(UI_ELEMENTS, [_visible("name == 'Text Button'")])
+    graph.add_screen(CART_WITH_ITEM, [your_cart, cart_item])
+    graph.add_screen(CART_EMPTY, [your_cart])
+    graph.add_screen(PRODUCT_DETAILS, [_visible("name == 'test-BACK TO PRODUCTS'")])
+    graph.add_screen(PRODUCTS_IN_CART, [products, remove])
+    graph.add_screen(PRODUCTS, [products])
+    graph.add_screen(LOGIN_USED, [_visible("name == 'test-Username' AND value != 'Username' AND value != ''")])
+    graph.add_screen(LOGIN_SCREEN, [username])
+
+    # starting costs in seconds; replaced by measurements as the edges run
+    graph.add_edge(LOGIN_SCREEN, PRODUCTS, _login, cost=8)
+    graph.add_edge(LOGIN_SCREEN, UI_ELEMENTS, _open_ui_elements, cost=4)
+    graph.add_edge(PRODUCTS, CART_WITH_ITEM, _add_first_item_to_cart, cost=4)
+    graph.add_edge(PRODUCTS, PRODUCT_DETAILS, _open_first_product, cost=3)
+    graph.add_edge(PRODUCTS, SORT_SHEET, _open_sort_sheet, cost=2)
+    graph.add_edge(PRODUCTS, MENU_OPEN, lambda driver: _tap(driver, "test-Menu"), cost=1.5)
+    graph.add_edge(PRODUCTS_IN_CART, PRODUCTS, _remove_all, cost=3)
+    graph.add_edge(PRODUCTS_IN_CART, CART_WITH_ITEM, _open_cart, cost=2)
+    graph.add_edge(PRODUCTS_IN_CART, MENU_OPEN, lambda driver: _tap(driver, "test-Menu"), cost=1.5)
+    graph.add_edge(PRODUCT_DETAILS, PRODUCTS, lambda driver: _tap(driver, "test-BACK TO PRODUCTS"), cost=1.5)
+    graph.add_edge(CART_WITH_ITEM, PRODUCTS, _empty_cart_and_continue, cost=3)
+    graph.add_edge(CART_EMPTY, PRODUCTS, lambda driver: _tap(driver, "test-CONTINUE SHOPPING"), cost=1.5)
+    graph.add_edge(SORT_SHEET, PRODUCTS, lambda driver: _tap(driver, "Cancel"), cost=1.5)
+    graph.add_edge(MENU_OPEN, LOGIN_SCREEN, _logout_from_menu, cost=2.5)
+    return graph
+
+
+GRAPH = _swag_labs_graph()
+
+
+def go_to(driver, screen):
+    return GRAPH.go_to(driver, screen)
+
+
+def current_screen(driver):
+    return GRAPH.detect(driver)
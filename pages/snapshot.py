@@ -0,0 +1,101 @@
+# pages/snapshot.py
+import os
+import time
+import xml.etree.ElementTree as ET
+
+from selenium.webdriver.remote.command import Command
+
+from pages.ios_query import find_all
+
+# snapshot mode on by default; PAGE_SNAPSHOTS=0 makes page objects query the live session only
+SNAPSHOTS_ENABLED = os.environ.get("PAGE_SNAPSHOTS", "1") != "0"
+
+# a snapshot is never trusted for longer than this, even when no command touched the UI
+MAX_AGE_S = float(os.environ.get("PAGE_SNAPSHOT_MAX_AGE", "2.0"))
+
+# commands that only read state; anything else (click, type, execute script, actions,
+# navigation, app activation...) may change the UI and drops the cached snapshot
+READ_ONLY_COMMANDS = {
+    Command.FIND_ELEMENT, Command.FIND_ELEMENTS,
+    Command.FIND_CHILD_ELEMENT, Command.FIND_CHILD_ELEMENTS,
+    Command.GET_ELEMENT_ATTRIBUTE, Command.GET_ELEMENT_PROPERTY,
+    Command.GET_ELEMENT_TEXT, Command.GET_ELEMENT_RECT, Command.GET_ELEMENT_TAG_NAME,
+    Command.IS_ELEMENT_ENABLED, Command.IS_ELEMENT_SELECTED,
+    Command.GET_PAGE_SOURCE, Command.SCREENSHOT, Command.ELEMENT_SCREENSHOT,
+    Command.GET_TIMEOUTS, Command.SET_TIMEOUTS,
+    Command.GET_WINDOW_RECT, Command.GET_SCREEN_ORIENTATION,
+    "isElementDisplayed", "getWindowSize",
+}
+
+
+class PageSnapshot:
+    """
+    One `driver.page_source` parsed locally (the AppiumAUT / XCUIElementType* XML saved in artifacts/).
+
+    Read-only page-object queries run against this tree instead of issuing one
+    find_elements plus one text/get_attribute round trip per element.
+    """
+
+    def __init__(self, source, taken_at=None):
+        self.source = source or ""
+        self.taken_at = taken_at if taken_at is not None else time.time()
+        self.root = ET.fromstring(self.source.encode("utf-8")) if self.source else ET.Element("AppiumAUT")
+        # document order, root excluded (like find_elements)
+        self.nodes = [el for el in self.root.iter() if el is not self.root]
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(f.read(), taken_at=os.path.getmtime(path))
+
+    def find(self, type=None, where=None):
+        """Nodes (document order) of the given XCUIElementType* and/or matching where(attrib)."""
+        out = []
+        for el in self.nodes:
+            if type is not None and el.get("type", el.tag) != type:
+                continue
+            if where is not None and not where(el.attrib):
+                continue
+            out.append(el)
+        return out
+
+    def find_elements(self, by, value):
+        """Same (by, value) locators as driver.find_elements, evaluated locally (see ios_query)."""
+        return find_all(self, by, value)
+
+    @staticmethod
+    def text(el):
+        """What WebElement.text returns on XCUITest: value, falling back to label."""
+        return (el.get("value") or el.get("label") or "").strip()
+
+
+def _install_invalidation(driver):
+    """Wrap driver.execute once so any UI-changing command drops the cached snapshot."""
+    if getattr(driver, "_snapshot_hooked", False):
+        return
+    original = driver.execute
+
+    def execute(driver_command, params=None):
+        if driver_command not in READ_ONLY_COMMANDS:
+            driver._page_snapshot = None
+        return original(driver_command, params)
+
+    driver.execute = execute
+    driver._snapshot_hooked = True
+
+
+def snapshot_for(driver, refresh=False):
+    """
+    Cached PageSnapshot of the current screen; one GET /source when missing, stale or refresh=True.
+    The cache is dropped automatically after any click, typing, script or navigation command.
+    """
+    _install_invalidation(driver)
+    snap = getattr(driver, "_page_snapshot", None)
+    if refresh or snap is None or time.time() - snap.taken_at > MAX_AGE_S:
+        snap = PageSnapshot(driver.page_source)
+        driver._page_snapshot = snap
+    return snap
+
+
+def invalidate_snapshot(driver):
+    driver._page_snapshot = None
@@ -0,0 +1,60 @@
+# pages/ui_settle.py
+"""
+"Wait until the UI stops moving" without fixed sleeps.
+
+wait_for_settle() takes page-source snapshots back to back and fingerprints each one: a
+hash of the element structure (types and names, in tree order) and a hash of the geometry
+(x/y/width/height/visible). Text values are left out, so a ticking clock or a caret doesn't
+keep a screen "unsettled". It returns as soon as `stable` consecutive fingerprints match,
+or at `timeout` with whatever was showing last.
+
+A screen that is done after 300 ms returns after two snapshots. One still animating (a
+drawer sliding in, a list loading) is not captured mid-way. The settled snapshot becomes
+the driver's cached snapshot (pages/snapshot.py), so the page-object queries that follow
+reuse it instead of fetching the source again.
+"""
+import hashlib
+import time
+from collections import namedtuple
+
+from pages.snapshot import snapshot_for
+from pages.waits import wait_until
+
+SettleResult = namedtuple("SettleResult", "snapshot settled elapsed snapshots")
+
+_GEOMETRY = ("x", "y", "width", "height", "visible")
+
+
+def fingerprint(snapshot):
+    """(structure hash, geometry hash) of a PageSnapshot."""
+    structure = hashlib.blake2b(digest_size=8)
+    geometry = hashlib.blake2b(digest_size=8)
+    for el in snapshot.nodes:
+        structure.update(f"{el.tag}|{el.get('name', '')}\n".encode("utf-8"))
+        geometry.update(("|".join(el.get(a, "") for a in _GEOMETRY) + "\n").encode("utf-8"))
+    return structure.hexdigest(), geometry.hexdigest()
+
+
+def wait_for_settle(driver, timeout=5.0, stable=2, label="ui_settle"):
+    """
+    Return SettleResult(snapshot, settled, elapsed, snapshots) once `stable` snapshots in a row
+    have the same fingerprint; settled=False when `timeout` ran out first (snapshot is the last one).
+    """
+    started = time.time()
+    state = {"last": None, "same": 0, "count": 0, "snapshot": None}
+
+    def settled(driver):
+        try:
+            # also becomes the driver's cached snapshot
+            snap = snapshot_for(driver, refresh=True)
+        except Exception:
+            return None
+        state["count"] += 1
+        state["snapshot"] = snap
+        fp = fingerprint(snap)
+        state["same"] = state["same"] + 1 if fp == state["last"] else 1
+        state["last"] = fp
+        return snap if state["same"] >= stable else None
+
+    snap = wait_until(driver, settled, timeout, label=label)
+    return SettleResult(snap or state["snapshot"], snap is not None, time.time() - started, state["count"])
@@ -0,0 +1,258 @@
+# pages/waits.py
+"""
+The one wait loop behind the page objects.
+
+wait_until(driver, condition, timeout, label) evaluates condition(driver) until it returns
+something truthy:
+
+- the implicit wait is suspended while it polls, so a miss costs one round trip instead
+  of a full implicit wait per find (implicit x explicit);
+- the first check is immediate; after that it sleeps on a backoff that starts at half the
+  measured cost of a poll (the hub round trip) and grows x1.5 up to WAIT_MAX_POLL. Polling
+  faster than the hub answers only queues requests;
+- every wait is charged to the running test's WaitBudget (WAIT_BUDGET_S, default 90 s of
+  waiting per test, 0 = no limit). Once the budget is gone, waits stop waiting and raise
+  WaitBudgetExceeded, which lists where the time went. The budget belongs to the thread that
+  started it: waits in other threads (e.g. the pre-warm boot) are never charged to the test.
+
+Sessions run without an implicit wait, so suspending it costs nothing; a driver given one with
+set_implicit_wait gets it switched off for the duration of each wait.
+
+Conditions are callables(driver) -> value or falsy; present/visible/absent build them from
+(by, value) locators, any_of/all_of combine them (plain (by, value) tuples are accepted too).
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
+
+WAIT_BUDGET_S = float(os.environ.get("WAIT_BUDGET_S", "90"))
+MIN_POLL_S = float(os.environ.get("WAIT_MIN_POLL", "0.05"))
+MAX_POLL_S = float(os.environ.get("WAIT_MAX_POLL", "1.0"))
+_BACKOFF = 1.5
+# weight of the newest sample in a driver's poll cost
+_EWMA = 0.3
+
+Hit = namedtuple("Hit", "index value")
+
+
+# ---------- implicit wait ----------
+def set_implicit_wait(driver, seconds):
+    """Set the implicit wait and remember it so it can be suspended/restored cheaply."""
+    driver.implicitly_wait(seconds)
+    driver._implicit_wait_s = seconds
+
+
+@contextmanager
+def implicit_wait_suspended(driver):
+    """Run a block with implicit wait 0 (so empty find_elements return immediately); nests without extra calls."""
+    if getattr(driver, "_implicit_wait_suspended", False):
+        yield
+        return
+    previous = getattr(driver, "_implicit_wait_s", 0)
+    if previous:
+        try:
+            driver.implicitly_wait(0)
+        except Exception:
+            previous = 0
+    try:
+        driver._implicit_wait_suspended = True
+    except Exception:
+        pass
+    try:
+        yield
+    finally:
+        try:
+            driver._implicit_wait_suspended = False
+        except Exception:
+            pass
+        if previous:
+            try:
+                driver.implicitly_wait(previous)
+            except Exception:
+                pass
+
+
+# ---------- per-test budget ----------
+class WaitBudgetExceeded(TimeoutException):
+    def __init__(self, budget):
+        super().__init__(f"wait budget of {budget.limit:.0f}s used up by {budget.name or 'this test'}: {budget.describe()}")
+        self.budget = budget
+
+
+class WaitBudget:
+    def __init__(self, limit_s=WAIT_BUDGET_S, name=None):
+        self.limit = limit_s
+        self.name = name
+        self.spent = 0.0
+        self.waits = {}     # label -> [waits, seconds, timeouts]
+
+    def remaining(self):
+        return max(0.0, self.limit - self.spent) if self.limit else float("inf")
+
+    def exhausted(self):
+        return bool(self.limit) and self.spent >= self.limit
+
+    def charge(self, label, seconds, satisfied):
+        entry = self.waits.setdefault(label, [0, 0.0, 0])
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] += not satisfied
+        self.spent += seconds
+
+    def breakdown(self):
+        """[(label, waits, seconds, timeouts)], most expensive first."""
+        return sorted(((label, n, s, t) for label, (n, s, t) in self.waits.items()), key=lambda r: -r[2])
+
+    def describe(self, top=5):
+        rows = self.breakdown()
+        text = ", ".join(f"{label} {s:.1f}s ({n} wait(s), {t} timed out)" for label, n, s, t in rows[:top])
+        if len(rows) > top:
+            text += f", {len(rows) - top} more"
+        return f"{self.spent:.1f}s waited: {text}" if rows else "nothing waited"
+
+
+# per thread: .budget (the running test's) and .depth; waits running inside another wait's
+# condition (e.g. a LocatorChain probe) are charged by the outer one
+_local = threading.local()
+
+
+def start_budget(name=None, limit_s=None):
+    """Start a budget for the calling thread's waits."""
+    _local.budget = WaitBudget(WAIT_BUDGET_S if limit_s is None else limit_s, name)
+    return _local.budget
+
+
+def current_budget():
+    return getattr(_local, "budget", None)
+
+
+def end_budget():
+    budget = current_budget()
+    _local.budget = None
+    return budget
+
+
+# ---------- polling ----------
+def poll_cost(driver):
+    """Moving average of how long one poll took on this driver (≈ the hub round trip), or None."""
+    return getattr(driver, "_wait_poll_cost_s", None)
+
+
+def _note_poll_cost(driver, seconds):
+    previous = poll_cost(driver)
+    try:
+        driver._wait_poll_cost_s = seconds if previous is None else (1 - _EWMA) * previous + _EWMA * seconds
+    except Exception:
+        pass
+
+
+def poll_intervals(cost=None):
+    """Sleeps between polls: half a poll's cost to start, x1.5 each time, capped at MAX_POLL_S."""
+    interval = max(MIN_POLL_S, (cost or 0.0) / 2)
+    while True:
+        yield min(interval, MAX_POLL_S)
+        interval *= _BACKOFF
+
+
+def wait_until(driver, condition, timeout, label="wait", poll=None, message=None, raise_on_timeout=False):
+    """
+    Poll condition(driver) until it returns something truthy and return that; None on timeout
+    (or TimeoutException with raise_on_timeout). poll: fixed interval instead of the backoff.
+    """
+    depth = getattr(_local, "depth", 0)
+    budget = current_budget() if depth == 0 else None
+    if budget is not None:
+        if budget.exhausted():
+            budget.charge(label, 0.0, False)
+            raise WaitBudgetExceeded(budget)
+        timeout = min(timeout or 0, budget.remaining())
+    start = time.time()
+    deadline = start + (timeout or 0)
+    intervals = poll_intervals(poll_cost(driver))
+    result = None
+    _local.depth = depth + 1
+    try:
+        with implicit_wait_suspended(driver):
+            while True:
+                polled = time.time()
+                try:
+                    result = condition(driver)
+                except (NoSuchElementException, StaleElementReferenceException):
+                    result = None
+                now = time.time()
+                _note_poll_cost(driver, now - polled)
+                if result or now >= deadline:
+                    break
+                time.sleep(max(0.0, min(poll if poll is not None else next(intervals), deadline - now)))
+    finally:
+        _local.depth = depth
+    if budget is not None:
+        budget.charge(label, time.time() - start, bool(result))
+        if not result and budget.exhausted():
+            raise WaitBudgetExceeded(budget)
+    if not result and raise_on_timeout:
+        raise TimeoutException(message or f"{label}: not met within {timeout:.1f}s")
+    return result or None
+
+
+# ---------- conditions ----------
+def present(by, value):
+    """First element matching (by, value)."""
+    def condition(driver):
+        elems = driver.find_elements(by, value)
+        return elems[0] if elems else None
+    return condition
+
+
+def visible(by, value):
+    """First displayed element matching (by, value)."""
+    def condition(driver):
+        for el in driver.find_elements(by, value):
+            if el.is_displayed():
+                return el
+        return None
+    return condition
+
+
+def absent(by, value):
+    """True once nothing matches (by, value)."""
+    return lambda driver: not driver.find_elements(by, value)
+
+
+def _condition(c):
+    return present(*c) if isinstance(c, tuple) else c
+
+
+def any_of(*conditions):
+    """Hit(index, value) of the first condition (in order) that holds on a poll."""
+    conditions = [_condition(c) for c in conditions]
+
+    def condition(driver):
+        for i, c in enumerate(conditions):
+            try:
+                value = c(driver)
+            except (NoSuchElementException, StaleElementReferenceException):
+                value = None
+            if value:
+                return Hit(i, value)
+        return None
+    return condition
+
+
+def all_of(*conditions):
+    """[values] once every condition holds on the same poll."""
+    conditions = [_condition(c) for c in conditions]
+
+    def condition(driver):
+        values = []
+        for c in conditions:
+            value = c(driver)
+            if not value:
+                return None
+            values.append(value)
+        return values
+    return condition
@@ -1,34 +1,24 @@
 # tests/check_locators.py
-import os, json, time
-from appium import webdriver
-from appium.options.common import AppiumOptions
-from appium.webdriver.common.appiumby import AppiumBy
+import os, sys, json
 
-USERNAME = os.environ.get("BROWSERSTACK_USERNAME")
-ACCESS_KEY = os.environ.get("BROWSERSTACK_ACCESS_KEY")
-APP_ID = os.environ.get("APP_ID")
-if not USERNAME or not ACCESS_KEY or not APP_ID:
-    raise SystemExit("Set BROWSERSTACK_USERNAME, BROWSERSTACK_ACCESS_KEY and APP_ID environment variables first")
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
 
-caps = {
-    "bstack:options": {
-        "userName": USERNAME,
-        "accessKey": ACCESS_KEY,
-        "deviceName": os.environ.get("DEVICE", "iPhone 14"),
-        "osVersion": os.environ.get("OS_VERSION", "18"),
-        "appiumVersion": "2.0.0"
-    },
-    "app": APP_ID,
-    "automationName": "XCUITest",
-}
+from appium.webdriver.common.appiumby import AppiumBy
+from pages.ui_settle import wait_for_settle
+from utils import session_factory
+from utils.screenshots import save_screenshot
 
+# ATTACH_SESSION=<id>|keeper checks the locators on a running session instead of booting one
 print("Starting session to check locators...")
-options = AppiumOptions()
-options.load_capabilities(caps)
-hub = "https://hub-cloud.browserstack.com/wd/hub"
-driver = webdriver.Remote(command_executor=hub, options=options)
+try:
+    driver = session_factory.open_session("check-locators")
+except RuntimeError as e:
+    raise SystemExit(str(e))
 
-time.sleep(2)  # let app settle
+settle = wait_for_settle(driver, timeout=5)  # let app settle
+print(f"App settled={settle.settled} after {settle.elapsed:.1f}s")
 
 candidates = [
     ("Sample iOS",           (AppiumBy.NAME, "Sample iOS")),
@@ -65,7 +55,7 @@ except Exception:
 
 print("\nSaving screenshot and page source to artifacts/")
 os.makedirs("artifacts", exist_ok=True)
-driver.save_screenshot("artifacts/check_locators_screenshot.png")
+save_screenshot(driver, "artifacts/check_locators_screenshot.png")
 with open("artifacts/check_locators_pagesource.xml", "w", encoding="utf-8") as f:
     f.write(driver.page_source)
 
@@ -1,20 +1,16 @@
 # tests/dump_page_source.py
-import os, time, json
+import os, sys, time, json
 from datetime import datetime
-from appium import webdriver
-# Try importing AppiumOptions from the most likely paths
-try:
-    from appium.options.common.base import AppiumOptions
-except Exception:
-    try:
-        from appium.options.appium_options import AppiumOptions
-    except Exception:
-        # fallback minimal options object
-        class AppiumOptions(dict):
-            def set_capability(self, k, v):
-                self[k] = v
-            def to_capabilities(self):
-                return dict(self)
+
+# ensure project root is on PYTHONPATH so "from pages..." imports work
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from pages.locator_rewrite import install_locator_rewriting, rewrite_report
+from pages.ui_settle import wait_for_settle
+from utils import session_factory
+from utils.screenshots import save_screenshot
 
 def ts():
     return datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
@@ -73,48 +69,26 @@ def try_click(driver, by, val, wait=5):
     return False
 
 def main():
-    user = os.environ.get("BROWSERSTACK_USERNAME")
-    key = os.environ.get("BROWSERSTACK_ACCESS_KEY")
-    app = os.environ.get("BROWSERSTACK_APP")
-    if not (user and key and app):
-        print("Please set BROWSERSTACK_USERNAME, BROWSERSTACK_ACCESS_KEY and BROWSERSTACK_APP in this shell.")
-        return
-
-    # Build options (works across appium client versions)
-    try:
-        opts = AppiumOptions()
-    except Exception:
-        opts = AppiumOptions()
-
-    # Minimal capabilities (we rely on your defaults from conftest)
-    opts.set_capability("platformName", os.environ.get("DUMP_PLATFORM", "iOS"))
-    opts.set_capability("deviceName", os.environ.get("DUMP_DEVICE", "iPhone 14"))
-    opts.set_capability("app", app)
-    # set BrowserStack options explicitly
-    bstack = {
-        "userName": user,
-        "accessKey": key,
-        "sessionName": f"dump-page-source-{ts()}"
-    }
-    try:
-        # AppiumOptions may accept load_capabilities
-        opts.load_capabilities({"bstack:options": bstack})
-    except Exception:
-        opts.set_capability("bstack:options", bstack)
-
-    hub = "https://hub-cloud.browserstack.com/wd/hub"
+    # ATTACH_SESSION=<id>|keeper inspects a running session instead of booting one
     print("[INFO] Starting remote session...")
-    driver = webdriver.Remote(hub, options=opts)
+    try:
+        driver = session_factory.open_session(f"dump-page-source-{ts()}")
+    except RuntimeError as e:
+        print(f"[ERROR] {e}")
+        return
+    install_locator_rewriting(driver)
 
     try:
-        time.sleep(5)  # allow app to settle
+        # wait for the first screen to stop changing (up to 10 s) and keep that snapshot
+        initial = wait_for_settle(driver, timeout=10)
+        print(f"[INFO] initial screen settled={initial.settled} after {initial.elapsed:.1f}s")
         # Save initial page source + screenshot
-        initial_src = driver.page_source
+        initial_src = initial.snapshot.source if initial.snapshot else driver.page_source
         fname_src = f"page_source_initial_{ts()}.xml"
         save_text(fname_src, initial_src)
         try:
             ss = f"screenshot_initial_{ts()}.png"
-            driver.save_screenshot(ss)
+            ss = save_screenshot(driver, ss)
             print(f"[SAVED] {ss}")
         except Exception as e:
             print("[WARN] could not save screenshot:", e)
@@ -147,13 +121,14 @@ def main():
             for by, val in cands:
                 if try_click(driver, by, val, wait=4):
                     clicked = True
-                    time.sleep(3)  # allow navigation
-                    src = driver.page_source
+                    # navigation done once two snapshots in a row look the same (up to 5 s)
+                    after = wait_for_settle(driver, timeout=5)
+                    src = after.snapshot.source if after.snapshot else driver.page_source
                     fname = f"page_source_{name}_{ts()}.xml"
                     save_text(fname, src)
                     try:
                         ssf = f"screenshot_{name}_{ts()}.png"
-                        driver.save_screenshot(ssf)
+                        ssf = save_screenshot(driver, ssf)
                         print(f"[SAVED] {ssf}")
                     except Exception as e:
                         print("[WARN] could not save screenshot:", e)
@@ -166,6 +141,8 @@ def main():
         except Exception:
             pass
         print("[INFO] session ended")
+        for line in rewrite_report():
+            print(f"[REWRITE] {line}")
 
 if __name__ == "__main__":
     main()
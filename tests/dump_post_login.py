@@ -1,73 +1,37 @@
 # tests/dump_post_login.py
 import os
-import time
-from appium import webdriver
-from appium.options.common import AppiumOptions
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import sys
 
-# Read env vars
-USERNAME = os.environ.get("BROWSERSTACK_USERNAME")
-ACCESS_KEY = os.environ.get("BROWSERSTACK_ACCESS_KEY")
-APP_ID = os.environ.get("APP_ID") or os.environ.get("BROWSERSTACK_APP")
-DEVICE = os.environ.get("DEVICE", "iPhone 14")
-OS_VERSION = os.environ.get("OS_VERSION", "18")
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
 
-if not USERNAME or not ACCESS_KEY or not APP_ID:
-    raise SystemExit("Set BROWSERSTACK_USERNAME, BROWSERSTACK_ACCESS_KEY and APP_ID in env before running")
-
-caps = {
-    "bstack:options": {
-        "userName": USERNAME,
-        "accessKey": ACCESS_KEY,
-        "deviceName": DEVICE,
-        "osVersion": OS_VERSION,
-        "appiumVersion": "2.0.0",
-        "projectName": "Mobile-Automation",
-        "buildName": "post-login-dump",
-        "sessionName": "dump-post-login"
-    },
-    "app": APP_ID,
-    "automationName": "XCUITest"
-}
-
-options = AppiumOptions()
-options.load_capabilities(caps)
-
-hub = "https://hub-cloud.browserstack.com/wd/hub"
-driver = webdriver.Remote(command_executor=hub, options=options)
+from pages.screen_graph import PRODUCTS, go_to
+from pages.ui_settle import wait_for_settle
+from utils import session_factory
+from utils.screenshots import save_screenshot
 
+# env vars: see utils/session_factory.py (ATTACH_SESSION=<id>|keeper reuses a running session)
 try:
-    wait = WebDriverWait(driver, 20)
-
-    # Login with Swag Labs known credentials
-    username = wait.until(EC.presence_of_element_located((By.NAME, "test-Username")))
-    username.clear()
-    username.send_keys("standard_user")
+    driver = session_factory.open_session("dump-post-login", build_name="post-login-dump")
+except RuntimeError as e:
+    raise SystemExit(str(e))
 
-    password = driver.find_element(By.NAME, "test-Password")
-    password.clear()
-    password.send_keys("secret_sauce")
-
-    driver.find_element(By.NAME, "test-LOGIN").click()
-
-    # Wait for PRODUCTS screen
-    try:
-        wait.until(EC.presence_of_element_located((By.IOS_PREDICATE, 'label == "PRODUCTS"')))
-    except Exception:
-        wait.until(EC.presence_of_element_located((By.NAME, "test-ALL ITEMS")))
+try:
+    # login (or, on an attached session, whatever it takes from the current screen) -> PRODUCTS
+    if not go_to(driver, PRODUCTS):
+        print("Warning: could not confirm the PRODUCTS screen; dumping whatever is showing")
 
-    time.sleep(1)  # small pause
+    wait_for_settle(driver, timeout=5)  # product list done rendering
 
     # Save page source + screenshot
     os.makedirs("artifacts", exist_ok=True)
     with open("artifacts/pagesource_post_login.xml", "w", encoding="utf-8") as f:
         f.write(driver.page_source)
-    driver.save_screenshot("artifacts/screenshot_post_login.png")
+    screenshot_path = save_screenshot(driver, "artifacts/screenshot_post_login.png")
 
     print("✅ Saved post-login page source -> artifacts/pagesource_post_login.xml")
-    print("✅ Saved post-login screenshot -> artifacts/screenshot_post_login.png")
+    print(f"✅ Saved post-login screenshot -> {screenshot_path}")
 
 finally:
     driver.quit()
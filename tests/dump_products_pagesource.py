@@ -2,20 +2,15 @@
 import os
 from datetime import datetime
 import pytest
-from pages.login_page import LoginPage
-from pages.products_page import ProductsPage
+from pages.screen_graph import PRODUCTS, go_to
+from utils.screenshots import save_screenshot
 
 def _timestamp():
     return datetime.utcnow().strftime("%Y%m%dT%H%M%S")
 
 def test_dump_products_pagesource(driver):
     """Login, wait for product list, save page source + screenshot for debugging."""
-    lp = LoginPage(driver)
-    # use your valid creds
-    lp.login("standard_user", "secret_sauce")
-
-    pp = ProductsPage(driver)
-    pp.wait_for_products()
+    go_to(driver, PRODUCTS)
 
     ts = _timestamp()
     artifacts_dir = os.path.join(os.getcwd(), "artifacts")
@@ -31,7 +26,7 @@ def test_dump_products_pagesource(driver):
         src = "(failed)"
 
     try:
-        driver.get_screenshot_as_file(png)
+        png = save_screenshot(driver, png)
     except Exception as e:
         print("Failed to save screenshot:", e)
         png = "(failed)"
@@ -1,11 +1,11 @@
 # tests/dump_sort_menu_pagesource.py
 import os
 from datetime import datetime
-import time
 import pytest
 from appium.webdriver.common.appiumby import AppiumBy
-from pages.login_page import LoginPage
-from pages.products_page import ProductsPage
+from pages.screen_graph import PRODUCTS, go_to
+from pages.ui_settle import wait_for_settle
+from utils.screenshots import save_screenshot
 
 def _timestamp():
     return datetime.utcnow().strftime("%Y%m%dT%H%M%S")
@@ -22,17 +22,14 @@ def _save_artifacts(driver, prefix):
     except Exception as e:
         src = f"(failed to save pagesource: {e})"
     try:
-        driver.get_screenshot_as_file(png)
+        png = save_screenshot(driver, png)
     except Exception as e:
         png = f"(failed to save screenshot: {e})"
     return src, png
 
 def test_dump_sort_menu_pagesource(driver):
-    lp = LoginPage(driver)
-    lp.login("standard_user", "secret_sauce")
-
-    pp = ProductsPage(driver)
-    pp.wait_for_products()
+    # this dump debugs the sort button itself: navigate to the product list only
+    go_to(driver, PRODUCTS)
 
     # Try to click the modal selector button using several strategies.
     clicked = False
@@ -90,18 +87,12 @@ def test_dump_sort_menu_pagesource(driver):
         except Exception as e:
             reasons.append(f"coordinate tap setup failed: {e}")
 
-    # wait briefly for modal contents to render (no hard sleep for long)
+    # wait for the modal to finish sliding in (up to 3 s), then look for its texts
     if clicked:
-        # short explicit wait loop polling page_source to show new texts (non-blocking)
-        found = False
-        for _ in range(6):  # ~ up to 6 * 0.5s = 3s polling
-            src = driver.page_source or ""
-            lower = src.lower()
-            if "price" in lower or "low to high" in lower or "price (low to high)" in lower or "sort" in lower:
-                found = True
-                break
-            time.sleep(0.5)
-        reasons.append(f"modal_detected={found}")
+        settle = wait_for_settle(driver, timeout=3)
+        lower = (settle.snapshot.source if settle.snapshot else "").lower()
+        found = "price" in lower or "low to high" in lower or "price (low to high)" in lower or "sort" in lower
+        reasons.append(f"modal_detected={found} settled={settle.settled} after {settle.elapsed:.1f}s")
     else:
         reasons.append("not clicked")
 
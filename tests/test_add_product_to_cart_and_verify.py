@@ -6,24 +6,11 @@ from appium.webdriver.common.appiumby import AppiumBy
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
-VALID_USER = "standard_user"
-VALID_PASS = "secret_sauce"
-
-
-def login(driver):
-    """Helper to log in with valid user."""
-    from pages.login_page import LoginPage
-    lp = LoginPage(driver)
-    lp.login(VALID_USER, VALID_PASS)
-    WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located(
-            (AppiumBy.IOS_PREDICATE, 'label == "PRODUCTS"')
-        )
-    )
+# every test starts logged in on the product list (pages/app_state.py drives the login)
+pytestmark = pytest.mark.app_state("products_logged_in")
 
 
 def test_open_catalog_and_verify_product_details(driver):
-    login(driver)
     pp = ProductsPage(driver)
     pp.wait_for_products()
     titles = pp.get_all_product_titles()
@@ -43,7 +30,6 @@ def test_open_catalog_and_verify_product_details(driver):
 
 
 def test_add_product_to_cart_and_verify(driver):
-    login(driver)
     pp = ProductsPage(driver)
     pp.wait_for_products()
     titles = pp.get_all_product_titles()
@@ -67,7 +53,6 @@ def test_add_product_to_cart_and_verify(driver):
 
 
 def test_sorting_by_price(driver):
-    login(driver)
     pp = ProductsPage(driver)
     pp.wait_for_products()
 
@@ -0,0 +1,49 @@
+# tests/test_allure_summary.py
+import json
+import os
+
+from utils import allure_summary
+
+RESULTS = os.path.join(os.path.dirname(__file__), "..", "allure-results")
+
+
+def result(tmp_path, name, status, start, duration, pid, message=None):
+    data = {
+        "name": name.split("#")[-1], "fullName": name, "historyId": name, "status": status,
+        "start": start, "stop": start + duration, "uuid": f"{name}-{start}",
+        "labels": [{"name": "host", "value": "ci"}, {"name": "thread", "value": f"{pid}-MainThread"}],
+    }
+    if message:
+        data["statusDetails"] = {"message": message}
+    (tmp_path / f"{pid}-{start}-result.json").write_text(json.dumps(data))
+
+
+def test_ingest_stored_results_is_incremental(tmp_path):
+    history = str(tmp_path / "history.jsonl")
+    runs = allure_summary.ingest(RESULTS, history, workers=4)
+    total = sum(len(run["status"]) for run in runs)
+
+    assert total == sum(1 for n in os.listdir(RESULTS) if n.endswith("-result.json"))
+    assert allure_summary.ingest(RESULTS, history) == []
+    assert len(allure_summary.load_history(history)) == len(runs)
+    failures = [row for run in runs for row in allure_summary.failed(run)]
+    assert any(row[3].startswith("AssertionError: Expected an error message") for row in failures)
+
+
+def test_runs_merge_overlapping_workers_and_queries(tmp_path):
+    results = tmp_path / "allure-results"
+    results.mkdir()
+    # run 1 (two xdist workers overlapping in time), run 2, run 3 (one process each)
+    for base, pid_a, pid_b, login, cart in ((0, 10, 11, "passed", 20_000), (600_000, 20, 20, "failed", 21_000),
+                                            (1_200_000, 30, 30, "passed", 60_000)):
+        result(results, "tests.test_login#test_valid_login", login, base + 1000, 5000, pid_a,
+               message="AssertionError: Products title not visible\nassert False" if login == "failed" else None)
+        result(results, "tests.test_cart#test_add", "passed", base + 2000, cart, pid_b)
+
+    runs = allure_summary.ingest(str(results), str(tmp_path / "history.jsonl"))
+
+    assert [len(run["status"]) for run in runs] == [2, 2, 2]
+    assert allure_summary.failed(runs[1]) == [
+        ("tests.test_login#test_valid_login", "F", 5000, "AssertionError: Products title not visible")]
+    assert allure_summary.slower(runs) == [("tests.test_cart#test_add", 20500, 60000)]
+    assert allure_summary.flaky(runs) == [("tests.test_login#test_valid_login", 2, 1, 2)]
@@ -0,0 +1,72 @@
+# tests/test_app_state.py
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from pages import app_state
+from pages.snapshot import PageSnapshot
+from utils.driver_pool import DriverPool
+
+ARTIFACTS = os.path.join(os.path.dirname(__file__), "..", "artifacts")
+
+
+def snapshot(name):
+    with open(os.path.join(ARTIFACTS, name), encoding="utf-8") as f:
+        return PageSnapshot(f.read())
+
+
+@pytest.mark.parametrize("name, state", [
+    ("pagesource.xml", app_state.LOGIN_SCREEN),
+    ("failure_test_invalid_login_shows_error_pagesource_20250917T081531.xml", app_state.LOGIN_USED),
+    # the cart source still holds the (hidden) login and product screens
+    ("pagesource_post_login.xml", app_state.PRODUCTS),
+    ("pagesource_cart.xml", app_state.CART_EMPTY),
+    ("failure_test_logout_pagesource_20250917T055124.xml", app_state.MENU_OPEN),
+    ("dump_sort_menu_after_click_pagesource_20250917T061322.xml", app_state.SORT_SHEET),
+    ("check_locators_pagesource.xml", app_state.UI_ELEMENTS),
+])
+def test_detect_state_from_page_source(name, state):
+    assert app_state.detect_state(None, snapshot(name)) == state
+
+
+def test_paths_only_drive_missing_transitions():
+    assert app_state.path_to(app_state.PRODUCTS, app_state.PRODUCTS) == []
+    assert app_state.path_to(app_state.LOGIN_SCREEN, app_state.CART_WITH_ITEM) == [
+        (app_state.LOGIN_SCREEN, app_state.PRODUCTS), (app_state.PRODUCTS, app_state.CART_WITH_ITEM)]
+    assert app_state.path_to(app_state.CART_EMPTY, app_state.LOGIN_SCREEN) == [
+        (app_state.CART_EMPTY, app_state.PRODUCTS), (app_state.PRODUCTS, app_state.MENU_OPEN),
+        (app_state.MENU_OPEN, app_state.LOGIN_SCREEN)]
+    # needs a reset (or an unknown screen): the pool takes over
+    assert app_state.path_to(app_state.LOGIN_USED, app_state.PRODUCTS) is None
+    assert app_state.path_to(None, app_state.LOGIN_SCREEN) is None
+
+
+def item(nodeid, state=None):
+    marker = SimpleNamespace(args=(state,)) if state else None
+    return SimpleNamespace(nodeid=nodeid, get_closest_marker=lambda name: marker)
+
+
+def test_group_by_state_is_stable():
+    items = [item("a", "ui_elements"), item("b", "products_logged_in"), item("c"),
+             item("d", "products_logged_in"), item("e", "login_screen")]
+
+    assert [i.nodeid for i in app_state.group_by_state(items)] == ["c", "e", "b", "d", "a"]
+    with pytest.raises(ValueError):
+        app_state.state_of(item("f", "checkout"))
+
+
+def test_pool_prepares_in_place_before_resetting():
+    resets = []
+    pool = DriverPool(lambda name: f"new-{name}", reset=lambda d: resets.append(d) or True)
+    pool._rename = lambda driver, name: None
+    pool.release("s1")
+
+    assert pool.acquire("t1", prepare=lambda d: True) == "s1"
+    assert resets == []
+    pool.release("s1")
+    # can't get there in place: reset, then prepare again
+    attempts = iter([False, True])
+    assert pool.acquire("t2", prepare=lambda d: next(attempts)) == "s1"
+    assert resets == ["s1"]
+    assert (pool.stats.reused, pool.stats.in_place, pool.stats.created) == (2, 1, 0)
@@ -0,0 +1,108 @@
+# tests/test_appium_proxy.py
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils.appium_proxy import AppiumProxy
+
+
+class FakeHub(BaseHTTPRequestHandler):
+    """Minimal hub: new session, a find_elements that hits on the second poll, delete."""
+
+    protocol_version = "HTTP/1.1"
+    finds = 0
+
+    def _reply(self, status, value):
+        payload = json.dumps({"value": value}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path == "/wd/hub/session":
+            # like BrowserStack, echo the requested capabilities (credentials included)
+            caps = json.loads(body)["capabilities"]["alwaysMatch"]
+            self._reply(200, {"sessionId": "abc123", "capabilities": caps})
+        elif self.path.endswith("/elements"):
+            FakeHub.finds += 1
+            self._reply(200, [] if FakeHub.finds == 1 else [{"element-6066-11e4-a52e-4f735466cecf": "el-1"}])
+        else:
+            self._reply(404, {"error": "unknown command", "message": self.path})
+
+    def do_DELETE(self):
+        self._reply(200, None)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+@pytest.fixture
+def hub():
+    FakeHub.finds = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeHub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def call(url, method="POST", body=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            return resp.status, json.loads(resp.read())["value"]
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())["value"]
+
+
+def session_script(base, caps_name):
+    caps = {"capabilities": {"alwaysMatch": {"bstack:options": {"userName": "u", "accessKey": "secret", "sessionName": caps_name}}}}
+    sid = call(base + "/session", body=caps)[1]["sessionId"]
+    find = {"using": "accessibility id", "value": "test-Menu"}
+    results = [call(f"{base}/session/{sid}/elements", body=find)[1] for _ in range(3)]
+    call(f"{base}/session/{sid}", method="DELETE")
+    return sid, results
+
+
+def test_record_then_replay_offline(tmp_path, hub):
+    cassette = tmp_path / "run.jsonl"
+    recorder = AppiumProxy("record", str(cassette), upstream=hub, port=0)
+    recorded = session_script(recorder.start(), "run 1")
+    recorder.stop()
+
+    lines = [json.loads(line) for line in cassette.read_text().splitlines()]
+    assert [ex["method"] for ex in lines] == ["POST", "POST", "POST", "POST", "DELETE"]
+    assert all(ex["elapsed_ms"] >= 0 for ex in lines)
+    assert "secret" not in cassette.read_text()
+    new_session = lines[0]
+    assert new_session["response"]["value"]["capabilities"]["bstack:options"]["accessKey"] == "***"
+
+    # replay needs no hub; the new-session body (session name) may differ between runs
+    player = AppiumProxy("replay", str(cassette), port=0)
+    replayed = session_script(player.start(), "run 2")
+    player.stop()
+    assert replayed == recorded
+    assert recorded[1][0] == [] and recorded[1][1]  # the miss-then-hit order is preserved
+    assert player.misses == 0 and player.cassette.remaining() == 0
+
+
+def test_unrecorded_command_is_an_error(tmp_path, hub):
+    cassette = tmp_path / "run.jsonl"
+    recorder = AppiumProxy("record", str(cassette), upstream=hub, port=0)
+    session_script(recorder.start(), "run 1")
+    recorder.stop()
+
+    player = AppiumProxy("replay", str(cassette), port=0)
+    base = player.start()
+    status, value = call(base + "/session/abc123/element", body={"using": "xpath", "value": "//x"})
+    player.stop()
+    assert status == 500 and "not in cassette" in value["message"]
+    assert player.misses == 1
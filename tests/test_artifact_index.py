@@ -0,0 +1,83 @@
+# tests/test_artifact_index.py
+import json
+import os
+
+from allure_commons import model2, plugin_manager
+from allure_commons.logger import AllureFileLogger
+
+from utils.artifact_index import AllureResultsTracker, ArtifactIndex
+from utils.artifacts import ArtifactStore
+
+DAY = 86400
+
+
+def blob(store, test, data, t):
+    ref = store.put(data, "xml", "failure_pagesource", test=test, capture=f"{test}-{t}")
+    store.flush()
+    # pretend the capture happened `t` days ago
+    for c in store.index.data["captures"]:
+        if c.get("capture") == f"{test}-{t}":
+            c["t"] = t * DAY
+    store.index.data["files"][store.index.rel(ref.path)].update(t=t * DAY, used=t * DAY)
+    store.index._write(store.index.data)
+    return ref
+
+
+def test_gc_keeps_the_latest_failure_of_each_test(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    old_logout = blob(store, "test_logout", b"<old logout/>", 1)
+    new_logout = blob(store, "test_logout", b"<new logout/>", 20)
+    old_alert = blob(store, "test_alert", b"<alert/>", 2)
+    store.close()
+
+    report = ArtifactIndex(str(tmp_path)).gc(max_age_days=7, now=30 * DAY)
+
+    assert report["removed"] == 1 and report["kept_failures"] == 2
+    assert not os.path.exists(old_logout.path)
+    assert os.path.exists(new_logout.path) and os.path.exists(old_alert.path)  # latest of their test
+    index = json.loads((tmp_path / "index.json").read_text())
+    assert sorted(c["capture"] for c in index["captures"]) == ["test_alert-2", "test_logout-20"]
+
+
+def test_gc_evicts_least_recently_used_over_budget(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    refs = [blob(store, None, bytes([i]) * 400_000, i) for i in range(1, 5)]
+    store.close()
+
+    report = ArtifactIndex(str(tmp_path)).gc(max_mb=1, max_age_days=365, now=5 * DAY)
+
+    assert [os.path.exists(r.path) for r in refs] == [False, False, True, True]
+    assert report["total_bytes"] == 800_000
+
+
+def test_allure_results_are_tracked(tmp_path):
+    allure_dir = tmp_path / "allure-results"
+    index = ArtifactIndex(str(tmp_path / "artifacts"))
+    writer = AllureFileLogger(str(allure_dir))
+    tracker = AllureResultsTracker(index, str(allure_dir))
+    plugin_manager.register(writer)
+    plugin_manager.register(tracker)
+    try:
+        for n, status in enumerate(("failed", "passed")):
+            plugin_manager.hook.report_attached_data(body=b"x" * 100, file_name=f"att{n}-attachment.txt")
+            result = model2.TestResult(uuid=f"uuid-{n}", fullName="tests.test_login#test_logout", status=status,
+                                       stop=(n + 1) * 1000, attachments=[model2.Attachment(source=f"att{n}-attachment.txt")])
+            plugin_manager.hook.report_result(result=result)
+    finally:
+        plugin_manager.unregister(tracker)
+        plugin_manager.unregister(writer)
+    assert tracker.resolve() == 2
+    index.save()
+
+    files = index.files()
+    assert sorted(os.listdir(allure_dir)) == sorted(os.path.basename(rel) for rel in files)
+    # the stock logger picks the file names; the tracker found them by the uuid inside
+    result0 = next(e for e in files.values() if e.get("uuid") == "uuid-0")
+    assert result0["kind"] == "result" and result0["refs"] == ["../allure-results/att0-attachment.txt"]
+
+    report = ArtifactIndex(str(tmp_path / "artifacts")).gc(max_mb=0)
+    # the passing run goes, the failure (with its attachment) stays
+    assert report["removed"] == 2
+    kept = os.listdir(allure_dir)
+    assert "att0-attachment.txt" in kept and len(kept) == 2
+    assert json.loads((allure_dir / next(n for n in kept if n.endswith("-result.json"))).read_text())["uuid"] == "uuid-0"
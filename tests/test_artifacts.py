@@ -0,0 +1,80 @@
+# tests/test_artifacts.py
+import json
+import os
+import threading
+
+import pytest
+
+from utils import screenshots
+from utils.artifacts import ArtifactStore
+
+ARTIFACTS = os.path.join(os.path.dirname(__file__), "..", "artifacts")
+
+
+def read(name, mode="rb"):
+    with open(os.path.join(ARTIFACTS, name), mode) as f:
+        return f.read()
+
+
+class CaptureDriver:
+    def __init__(self, source_file, png_file="failure_test_logout_screenshot_20250917T054135.png"):
+        self.page_source = read(source_file, "r")
+        self.png = read(png_file)
+        self.threads = set()
+
+    def get_screenshot_as_png(self):
+        self.threads.add(threading.current_thread().name)
+        return self.png
+
+
+def test_identical_captures_are_stored_once(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    driver = CaptureDriver("failure_test_logout_pagesource_20250917T054135.xml")
+    first = store.capture(driver, "failure_test_logout", test="tests/test_login.py::test_logout")
+    second = store.capture(driver, "failure_test_logout", test="tests/test_login.py::test_logout")
+    store.close()
+
+    assert first == second
+    assert sorted(os.listdir(tmp_path / "blobs")) == sorted([os.path.basename(first[0].path), os.path.basename(first[1].path)])
+    index = json.loads((tmp_path / "index.json").read_text())
+    assert len(index["captures"]) == 4
+    assert len({c["capture"] for c in index["captures"]}) == 2
+    assert sorted(index["files"]) == sorted(f"blobs/{os.path.basename(ref.path)}" for ref in first)
+    # the screenshot was fetched off the calling thread, concurrently with page_source
+    assert driver.threads and threading.current_thread().name not in driver.threads
+
+
+def test_byte_identical_stored_artifacts_collapse(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    names = sorted(n for n in os.listdir(ARTIFACTS) if n.startswith("failure_") and n.endswith(".xml"))
+    refs = set()
+    for name in names:
+        with open(os.path.join(ARTIFACTS, name), "rb") as f:
+            refs.add(store.put(f.read(), "xml", name))
+    store.close()
+    assert len(os.listdir(tmp_path / "blobs")) == len(refs) < len(names)
+
+
+@pytest.mark.skipif(not screenshots.available(), reason="Pillow/NumPy not installed")
+def test_screenshots_are_downscaled_and_near_duplicates_collapse(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    logout = "tests/test_login.py::test_logout"
+    # two failures of the same test: different bytes, near-identical frames
+    first = _frame(store, "failure_test_logout_screenshot_20250917T054135.png", logout)
+    second = _frame(store, "failure_test_logout_screenshot_20250917T055124.png", logout)
+    other = _frame(store, "failure_test_invalid_login_shows_error_screenshot_20250917T081531.png", "t::other")
+    # another test's near-identical frame is its own evidence, never an older test's screen
+    elsewhere = _frame(store, "failure_test_logout_screenshot_20250917T055124.png", "t::elsewhere")
+    store.close()
+
+    assert second == first and other != first and elsewhere != first
+    assert len(os.listdir(tmp_path / "blobs")) == 3
+    assert [e["near_duplicate_of"] for e in store.index.captures() if "near_duplicate_of" in e] == [first.sha256]
+    assert first.size * 10 < len(read("failure_test_logout_screenshot_20250917T054135.png"))
+    # a new store picks the stored frames up from the index
+    assert _frame(ArtifactStore(str(tmp_path)), "failure_test_logout_screenshot_20250917T055124.png", logout) == first
+
+
+def _frame(store, name, test):
+    shot = screenshots.process(read(name))
+    return store.put(shot.data, shot.ext, "failure_screenshot", test=test, phash=shot.phash)
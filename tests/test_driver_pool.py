@@ -0,0 +1,121 @@
+# tests/test_driver_pool.py
+import json
+import threading
+
+import pytest
+
+from utils import driver_pool
+from utils.driver_pool import DriverPool
+
+
+class FakeDriver:
+    def __init__(self, name):
+        self.name = name
+        self.scripts = []
+        self.quit_calls = 0
+
+    def execute_script(self, script):
+        self.scripts.append(script)
+
+    def quit(self):
+        self.quit_calls += 1
+
+    def session_names(self):
+        prefix = "browserstack_executor: "
+        return [json.loads(s[len(prefix):])["arguments"]["name"] for s in self.scripts if s.startswith(prefix)]
+
+
+class FakeFactory:
+    def __init__(self):
+        self.created = []
+        self._lock = threading.Lock()
+
+    def __call__(self, session_name):
+        driver = FakeDriver(session_name)
+        with self._lock:
+            self.created.append(driver)
+        return driver
+
+
+@pytest.fixture
+def factory():
+    return FakeFactory()
+
+
+def test_reused_session_is_prepared_in_place_without_a_reset(factory):
+    resets = []
+    pool = DriverPool(factory, reset=lambda d: resets.append(d) or True)
+    first = pool.acquire("test_one", prepare=lambda d: True)
+    pool.release(first)
+
+    second = pool.acquire('test "two"', prepare=lambda d: True)
+
+    assert second is first and resets == [] and len(factory.created) == 1
+    assert (pool.stats.reused, pool.stats.in_place) == (1, 1)
+    # the name is JSON-encoded, quotes included
+    assert second.session_names() == ['test "two"']
+
+
+def test_failed_in_place_prepare_falls_back_to_a_reset(factory):
+    states = iter([False, True])  # in place fails, after the reset it works
+    resets = []
+    pool = DriverPool(factory, reset=lambda d: resets.append(d) or True)
+    driver = pool.acquire("test_one")
+    pool.release(driver)
+
+    again = pool.acquire("test_two", prepare=lambda d: next(states))
+
+    assert again is driver and resets == [driver]
+    assert (pool.stats.reused, pool.stats.in_place, pool.stats.reset_failures) == (1, 0, 0)
+
+
+def test_session_is_quit_and_replaced_when_reset_fails(factory):
+    pool = DriverPool(factory, reset=lambda d: False)
+    driver = pool.acquire("test_one")
+    pool.release(driver)
+
+    fresh = pool.acquire("test_two", prepare=lambda d: d is not driver)
+
+    assert fresh is not driver and driver.quit_calls == 1
+    assert (pool.stats.created, pool.stats.reset_failures) == (2, 1)
+
+
+def test_prewarmed_spare_is_handed_out_and_the_leftover_quit_on_close(factory, monkeypatch):
+    monkeypatch.setattr(driver_pool, "wait_for_login_screen", lambda driver, timeout=15: True)
+    pool = DriverPool(factory, reuse=True, prewarm=True)
+    assert pool.prewarm is False  # reuse on: never keeps a spare
+
+    pool = DriverPool(factory, reuse=False, prewarm=True)
+    first = pool.acquire("test_one")
+    pool.release(first)
+    second = pool.acquire("test_two")
+    pool._spare.result()  # let the next spare finish booting: close() must quit it, not just cancel it
+    pool.close()
+
+    spare, leftover = factory.created[1], factory.created[2]
+    assert first.quit_calls == 1 and second is spare and spare.session_names() == ["test_two"]
+    assert leftover.quit_calls == 1 and spare.quit_calls == 0
+    assert (pool.stats.created, pool.stats.prewarmed, pool.stats.prewarm_hits, pool.stats.prewarm_discarded) == (1, 2, 1, 1)
+
+
+def test_stale_spare_is_discarded(factory, monkeypatch):
+    monkeypatch.setattr(driver_pool, "wait_for_login_screen", lambda driver, timeout=15: False)
+    pool = DriverPool(factory, reuse=False, prewarm=True)
+    pool.release(pool.acquire("test_one"))
+
+    second = pool.acquire("test_two")
+    pool.close()
+
+    assert second.name == "test_two" and factory.created[1].quit_calls == 1
+    assert pool.stats.prewarm_discarded >= 1 and pool.stats.created == 2
+
+
+def test_close_quits_idle_sessions(factory):
+    pool = DriverPool(factory, reset=lambda d: True)
+    drivers = [pool.acquire("a"), pool.acquire("b")]
+    for d in drivers:
+        pool.release(d)
+
+    pool.close()
+
+    assert [d.quit_calls for d in drivers] == [1, 1]
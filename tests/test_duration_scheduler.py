@@ -0,0 +1,127 @@
+# tests/test_duration_scheduler.py
+import heapq
+import json
+from types import SimpleNamespace
+
+from xdist.scheduler import LoadScheduling
+
+from utils.duration_scheduler import DurationModel, LPTScheduling, lpt_partition, nodeid_full_name
+
+# collected shortest first: the worst case for pytest's own order
+DURATIONS = {f"tests/test_m.py::test_{i}": d for i, d in enumerate([5, 5, 10, 10, 10, 20, 30, 40, 50, 60])}
+
+
+class FakeNode:
+    def __init__(self, name):
+        self.gateway = SimpleNamespace(id=name)
+        self.shutting_down = False
+
+    def send_runtest_some(self, indices):
+        pass
+
+    def shutdown(self):
+        self.shutting_down = True
+
+
+def simulate(scheduler_cls, workers=2, **kwargs):
+    """Run the collection through an xdist scheduler with simulated test durations; returns the wall clock."""
+    config = SimpleNamespace(getvalue=lambda name: [f"{workers}*popen"], getoption=lambda name: None)
+    sched = scheduler_cls(config, **kwargs)
+    collection = list(DURATIONS)
+    nodes = [FakeNode(f"gw{i}") for i in range(workers)]
+    for node in nodes:
+        sched.add_node(node)
+        sched.add_node_collection(node, collection)
+    sched.schedule()
+    running, now, clock = [], 0.0, {node: 0.0 for node in nodes}
+    while True:
+        for node in nodes:
+            pending = sched.node2pending.get(node, [])
+            busy = any(n is node for _, _, n, _ in running)
+            # a worker runs its first test once the next one is queued (or it is told to shut down)
+            if not busy and pending and (len(pending) >= 2 or node.shutting_down):
+                index = pending[0]
+                heapq.heappush(running, (clock[node] + DURATIONS[collection[index]], node.gateway.id, node, index))
+        if not running:
+            return now
+        now, _, node, index = heapq.heappop(running)
+        clock[node] = now
+        sched.mark_test_complete(node, index)
+
+
+def test_lpt_partition_balances_load():
+    bins, loads = lpt_partition([7, 5, 4, 3, 3, 2], 2)
+    assert sorted(loads) == [12, 12]
+    assert sorted(j for b in bins for j in b) == list(range(6))
+
+
+def test_model_estimates_and_fallbacks(tmp_path):
+    history = tmp_path / "history.jsonl"
+    runs = [
+        {"fullName": ["tests.test_login#test_logout", "tests.test_login#test_valid_login"], "historyId": ["h1", "h2"],
+         "status": status, "duration": durations}
+        for status, durations in (("PP", [40_000, 10_000]), ("FS", [50_000, 0]), ("PP", [45_000, 12_000]))
+    ]
+    history.write_text("".join(json.dumps(run) + "\n" for run in runs))
+
+    model = DurationModel.load(history_path=str(history), report_history=str(tmp_path / "none.json"))
+
+    assert model.estimate(("h1",)) == (45.0, True)
+    assert model.estimate(full_name=nodeid_full_name("tests/test_login.py::test_valid_login")) == (11.0, True)
+    # unknown test: median of its module, then of everything
+    assert model.estimate(full_name="tests.test_login#test_new") == (28.0, False)
+    assert model.estimate(full_name="tests.test_cart#test_new") == (28.0, False)
+
+
+def test_lpt_scheduler_finishes_workers_together():
+    model = DurationModel({nodeid_full_name(n): [d] for n, d in DURATIONS.items()})
+    ideal = sum(DURATIONS.values()) / 2
+
+    lpt = simulate(LPTScheduling, model=model)
+    default = simulate(LoadScheduling)
+
+    assert lpt <= ideal * 1.05
+    assert lpt < default
+
+
+def test_lpt_scheduler_finds_history_keyed_by_nodeid():
+    from allure_commons.utils import md5
+
+    # allure generate's history.json: historyIds only, no fullName to fall back on
+    model = DurationModel({md5(n): [d] for n, d in DURATIONS.items()})
+    schedulers = []
+
+    def scheduler(config, **kwargs):
+        schedulers.append(LPTScheduling(config, **kwargs))
+        return schedulers[-1]
+
+    simulate(scheduler, model=model)
+
+    assert schedulers[0].estimates == list(DURATIONS.values())
+
+
+def test_affinity_keeps_workers_on_their_group():
+    model = DurationModel({nodeid_full_name(n): [d] for n, d in DURATIONS.items()})
+    # alternate groups, so plain LPT would switch group on almost every test
+    groups = {nodeid: ("login", "products")[i % 2] for i, nodeid in enumerate(DURATIONS)}
+    ideal = sum(DURATIONS.values()) / 2
+    schedulers = []
+
+    def scheduler(config, **kwargs):
+        schedulers.append(LPTScheduling(config, **kwargs))
+        return schedulers[-1]
+
+    grouped = simulate(scheduler, model=model, affinity=lambda: groups)
+
+    assert schedulers[0].affinity_hits > 0
+    assert grouped <= ideal * 1.2
+
+
+def test_unknown_xdist_falls_back_to_load_scheduling(monkeypatch):
+    from utils import duration_scheduler
+
+    assert duration_scheduler._xdist_compatible()
+    monkeypatch.setattr(duration_scheduler, "_LOAD_SCHEDULING_INTERNALS", ("_send_tests", "_renamed_in_a_later_xdist"))
+    assert not duration_scheduler._xdist_compatible()
+    monkeypatch.setattr(duration_scheduler.xdist, "__version__", "4.0.0")
+    assert not duration_scheduler._xdist_compatible()
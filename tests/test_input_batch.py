@@ -0,0 +1,88 @@
+# tests/test_input_batch.py
+import os
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.command import Command
+
+from pages.input_batch import InputBatch
+from pages.login_page import LoginPage
+
+ARTIFACTS = os.path.join(os.path.dirname(__file__), "..", "artifacts")
+
+
+class RecordingDriver:
+    def __init__(self, source_file, reject=False, after=None):
+        self.source = _read(source_file)
+        # what the screen shows once the actions ran (default: unchanged)
+        self.after = after
+        self.reject = reject
+        self.commands = []
+
+    @property
+    def page_source(self):
+        self.commands.append(Command.GET_PAGE_SOURCE)
+        return self.source
+
+    def execute(self, command, params=None):
+        self.commands.append((command, params))
+        if self.reject:
+            raise WebDriverException("unknown command")
+        if command == Command.W3C_ACTIONS and self.after:
+            self.source = _read(self.after)
+        return {}
+
+
+def _read(source_file):
+    with open(os.path.join(ARTIFACTS, source_file), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_login_is_one_actions_request():
+    driver = RecordingDriver("pagesource.xml", after="pagesource_post_login.xml")
+
+    assert LoginPage(driver).login("standard_user", "secret_sauce")
+    # one source for the controls, the actions, one source confirming the login form is gone
+    assert [c if isinstance(c, str) else c[0] for c in driver.commands] == [
+        Command.GET_PAGE_SOURCE, Command.W3C_ACTIONS, Command.GET_PAGE_SOURCE]
+
+    pointer, keys = driver.commands[1][1]["actions"]
+    taps = [(a["x"], a["y"]) for a in pointer["actions"] if a["type"] == "pointerMove"]
+    # centres of test-Username, test-Password and test-LOGIN in the saved source
+    assert taps == [(187, 170), (187, 233), (187, 342)]
+    typed = "".join(a["value"] for a in keys["actions"] if a["type"] == "keyDown")
+    assert typed == "standard_usersecret_sauce"
+    # both sources advance tick by tick
+    assert len(pointer["actions"]) == len(keys["actions"])
+
+
+def test_filled_fields_and_rejected_batches_fall_back():
+    # after a failed login the fields still hold text: they need the per-step clear()
+    used = RecordingDriver("failure_test_invalid_login_shows_error_pagesource_20250917T081531.xml")
+    assert not LoginPage(used)._login_batched("standard_user", "secret_sauce")
+    assert all(isinstance(c, str) for c in used.commands)
+
+    # accepted, but the keyboard wasn't up: the fields still show their placeholders
+    lost = RecordingDriver("pagesource.xml")
+    assert not LoginPage(lost)._login_batched("standard_user", "secret_sauce")
+    # typed as sent and the login form still up (e.g. an error banner): the attempt landed
+    typed = RecordingDriver("pagesource.xml", after="failure_test_invalid_login_shows_error_pagesource_20250917T081531.xml")
+    assert LoginPage(typed)._login_batched("invalid_user", "wrong_password")
+
+    rejecting = RecordingDriver("pagesource.xml", reject=True)
+    assert not LoginPage(rejecting)._login_batched("standard_user", "secret_sauce")
+    assert rejecting._input_batch_unsupported
+    sent = len(rejecting.commands)
+    # remembered: the next batch isn't even tried
+    assert not InputBatch(rejecting).tap((10, 10)).perform()
+    assert len(rejecting.commands) == sent
+
+
+def test_element_targets_use_the_element_origin():
+    class El:
+        id = "abc"
+
+    body = InputBatch(None).tap(El()).pause(0.5).payload()
+    move = body["actions"][0]["actions"][0]
+    assert move["origin"] == {"element-6066-11e4-a52e-4f735466cecf": "abc"}
+    # a tap-only batch sends no key source
+    assert len(body["actions"]) == 1
@@ -0,0 +1,83 @@
+# tests/test_ios_query.py
+import os
+
+import pytest
+from appium.webdriver.common.appiumby import AppiumBy
+
+from pages.ios_query import QuerySyntaxError, compile_locator
+from pages.snapshot import PageSnapshot
+
+ARTIFACTS = os.path.join(os.path.dirname(__file__), "..", "artifacts")
+
+TREE = """<?xml version="1.0" encoding="UTF-8"?>
+<AppiumAUT>
+  <XCUIElementTypeApplication type="XCUIElementTypeApplication" name="Swag" label="Swag" enabled="true" visible="true">
+    <XCUIElementTypeOther type="XCUIElementTypeOther" name="test-Item" label="Sauce Labs Backpack $29.99" enabled="true" visible="true">
+      <XCUIElementTypeStaticText type="XCUIElementTypeStaticText" name="test-Item title" label="Sauce Labs Backpack" enabled="true" visible="true"/>
+      <XCUIElementTypeStaticText type="XCUIElementTypeStaticText" name="test-Price" label="$29.99" enabled="true" visible="true"/>
+      <XCUIElementTypeButton type="XCUIElementTypeButton" name="test-ADD TO CART" label="ADD TO CART" enabled="true" visible="true"/>
+    </XCUIElementTypeOther>
+    <XCUIElementTypeOther type="XCUIElementTypeOther" name="test-Item" label="Sauce Labs Onesie $7.99" enabled="true" visible="false">
+      <XCUIElementTypeStaticText type="XCUIElementTypeStaticText" name="test-Item title" label="Sauce Labs Onesie" enabled="true" visible="false"/>
+      <XCUIElementTypeStaticText type="XCUIElementTypeStaticText" name="test-Price" label="$7.99" enabled="true" visible="false"/>
+    </XCUIElementTypeOther>
+    <XCUIElementTypeTextField type="XCUIElementTypeTextField" name="test-Username" value="standard_user" enabled="true" visible="true"/>
+  </XCUIElementTypeApplication>
+</AppiumAUT>
+"""
+
+
+@pytest.fixture
+def snap():
+    return PageSnapshot(TREE)
+
+
+def labels(snap, by, value):
+    return [el.get("label") or el.get("value") for el in snap.find_elements(by, value)]
+
+
+@pytest.mark.parametrize("predicate, expected", [
+    ("type == 'XCUIElementTypeStaticText' AND label CONTAINS '$'", ["$29.99", "$7.99"]),
+    ("label BEGINSWITH[c] 'sauce labs o'", ["Sauce Labs Onesie $7.99", "Sauce Labs Onesie"]),
+    ("label CONTAINS 'backpack'", []),
+    ("name == 'test-Price' AND visible == 1", ["$29.99"]),
+    ("name == 'test-ADD TO CART' OR value == 'standard_user'", ["ADD TO CART", "standard_user"]),
+    ("type IN {'XCUIElementTypeButton', 'XCUIElementTypeTextField'}", ["ADD TO CART", "standard_user"]),
+    ("NOT (label ENDSWITH '99') AND type == 'XCUIElementTypeStaticText'", ["Sauce Labs Backpack", "Sauce Labs Onesie"]),
+    ("label LIKE 'Sauce * Onesie'", ["Sauce Labs Onesie"]),
+])
+def test_predicates(snap, predicate, expected):
+    assert labels(snap, AppiumBy.IOS_PREDICATE, predicate) == expected
+
+
+@pytest.mark.parametrize("xpath, expected", [
+    ("//XCUIElementTypeButton[@name='test-ADD TO CART']", ["ADD TO CART"]),
+    ("//*[contains(translate(@label,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'onesie')]",
+     ["Sauce Labs Onesie $7.99", "Sauce Labs Onesie"]),
+    ("//XCUIElementTypeTextField | //XCUIElementTypeButton", ["ADD TO CART", "standard_user"]),
+    ("//XCUIElementTypeStaticText[starts-with(@label,'$')]/ancestor::XCUIElementTypeOther[1]",
+     ["Sauce Labs Backpack $29.99", "Sauce Labs Onesie $7.99"]),
+    ("(//XCUIElementTypeStaticText[@name='test-Price'])[2]", ["$7.99"]),
+    ("//XCUIElementTypeOther[./XCUIElementTypeButton]/XCUIElementTypeStaticText[1]", ["Sauce Labs Backpack"]),
+    ("//XCUIElementTypeStaticText[contains(text(),'$')]", []),
+])
+def test_xpath(snap, xpath, expected):
+    assert labels(snap, AppiumBy.XPATH, xpath) == expected
+
+
+def test_ids_and_class_names_use_the_index(snap):
+    assert labels(snap, AppiumBy.ACCESSIBILITY_ID, "test-Item title") == ["Sauce Labs Backpack", "Sauce Labs Onesie"]
+    assert len(snap.find_elements(AppiumBy.CLASS_NAME, "XCUIElementTypeOther")) == 2
+
+
+def test_unsupported_locators_raise():
+    with pytest.raises(QuerySyntaxError):
+        compile_locator(AppiumBy.ANDROID_UIAUTOMATOR, 'new UiSelector().text("LOGIN")')
+    with pytest.raises(QuerySyntaxError):
+        compile_locator(AppiumBy.IOS_PREDICATE, "label CONTAINS")
+
+
+def test_page_object_locators_on_stored_sources():
+    snap = PageSnapshot.from_file(os.path.join(ARTIFACTS, "pagesource.xml"))
+    assert len(snap.find_elements(AppiumBy.ACCESSIBILITY_ID, "test-Username")) == 1
+    assert snap.find_elements(AppiumBy.IOS_PREDICATE, "type == 'XCUIElementTypeSecureTextField'")
@@ -0,0 +1,129 @@
+# tests/test_locator_chain.py
+import threading
+import time
+
+import pytest
+from appium.webdriver.common.appiumby import AppiumBy
+from selenium.common.exceptions import InvalidSelectorException
+
+from pages import locator_chain
+from pages.locator_cache import LocatorCache
+from pages.locator_chain import LocatorChain
+
+
+@pytest.fixture(autouse=True)
+def no_shared_cache(monkeypatch):
+    # keep fake resolves out of the run's .locator_cache.json
+    monkeypatch.setattr(locator_chain, "get_locator_cache", lambda: None)
+    # FakeDriver answers the locators exactly as written
+    monkeypatch.setattr(locator_chain, "rewrite_locator", lambda by, value: (by, value))
+    monkeypatch.setattr(locator_chain, "note_sent", lambda by, value: None)
+
+
+class FakeDriver:
+    """Answers find_elements from a {(by, value): [elements]} map and records every call."""
+
+    def __init__(self, present=None):
+        self.present = present or {}
+        self.calls = []
+
+    def find_elements(self, by, value):
+        self.calls.append((by, value))
+        if by == AppiumBy.ANDROID_UIAUTOMATOR:
+            raise InvalidSelectorException("Locator Strategy '-android uiautomator' is not supported")
+        if by == AppiumBy.IOS_PREDICATE and " OR " in value and (by, value) not in self.present:
+            # compound probe: hit when any merged part is present
+            hit = any(k[1] in value or f"'{k[1]}'" in value for k in self.present)
+            return ["compound"] if hit else []
+        return self.present.get((by, value), [])
+
+
+CANDIDATES = [
+    (AppiumBy.ACCESSIBILITY_ID, "test-Sort"),
+    (AppiumBy.IOS_PREDICATE, "label CONTAINS 'Sort'"),
+    (AppiumBy.XPATH, "//*[@label='Sort']"),
+    (AppiumBy.ANDROID_UIAUTOMATOR, 'new UiSelector().descriptionContains("sort")'),
+]
+
+
+def test_miss_costs_one_timeout_not_the_sum():
+    driver = FakeDriver()
+    start = time.time()
+    assert LocatorChain("sort", CANDIDATES, poll=0.05).resolve(driver, timeout=0.3) is None
+    assert time.time() - start < 0.6
+    # the unsupported android strategy is dropped after the first poll
+    assert sum(1 for by, _ in driver.calls if by == AppiumBy.ANDROID_UIAUTOMATOR) == 1
+
+
+def test_predicate_candidates_are_merged_into_one_probe():
+    driver = FakeDriver()
+    LocatorChain("sort", CANDIDATES).resolve(driver, timeout=0)
+    assert driver.calls[0] == (AppiumBy.IOS_PREDICATE, "(name == 'test-Sort') OR (label CONTAINS 'Sort')")
+    assert (AppiumBy.ACCESSIBILITY_ID, "test-Sort") not in driver.calls
+
+
+def test_earliest_matching_candidate_wins():
+    driver = FakeDriver({
+        (AppiumBy.IOS_PREDICATE, "label CONTAINS 'Sort'"): ["by-predicate"],
+        (AppiumBy.XPATH, "//*[@label='Sort']"): ["by-xpath"],
+    })
+    match = LocatorChain("sort", CANDIDATES).resolve(driver, timeout=0)
+    assert (match.element, match.index, match.by) == ("by-predicate", 1, AppiumBy.IOS_PREDICATE)
+
+
+def test_cache_puts_historical_winner_first_and_evicts_on_new_build(tmp_path, monkeypatch):
+    path = str(tmp_path / "locators.json")
+    cache = LocatorCache(path, "bs://build-1")
+    monkeypatch.setattr(locator_chain, "get_locator_cache", lambda: cache)
+    driver = FakeDriver({(AppiumBy.XPATH, "//*[@label='Sort']"): ["by-xpath"]})
+    LocatorChain("ProductsPage.sort_btn", CANDIDATES).resolve(driver, timeout=0)
+    cache.save()
+
+    reloaded = LocatorCache(path, "bs://build-1")
+    # the exact XPath won: tried first next time; candidates never probed get no attempt
+    assert reloaded.ranked("ProductsPage.sort_btn", CANDIDATES) == [2, 0, 1, 3]
+    assert ("ProductsPage.sort_btn", "accessibility id|test-Sort", 1) in reloaded.never_won()
+    assert not any("uiautomator" in key for _, key, _ in reloaded.never_won())
+
+    exact = [(AppiumBy.ACCESSIBILITY_ID, "test-Sort"), (AppiumBy.XPATH, "//*[@label='Sort']"),
+             (AppiumBy.XPATH, "//*[contains(@label,'sort')]")]
+    driver = FakeDriver({(AppiumBy.XPATH, "//*[@label='Sort']"): ["by-xpath"],
+                         (AppiumBy.XPATH, "//*[contains(@label,'sort')]"): ["loose"]})
+    LocatorChain("ProductsPage.sort_btn", exact).resolve(driver, timeout=0)
+    assert cache.ranked("ProductsPage.sort_btn", exact) == [1, 0, 2]
+    assert LocatorCache(path, "bs://build-2").ranked("ProductsPage.sort_btn", CANDIDATES) == [0, 1, 2, 3]
+
+
+def test_cache_reorders_page_object_chains_but_never_shadows_an_exact_winner(tmp_path, monkeypatch):
+    from pages.cart_page import CartPage
+    from pages.login_page import LoginPage
+
+    cache = LocatorCache(str(tmp_path / "locators.json"), "bs://build-1")
+    monkeypatch.setattr(locator_chain, "get_locator_cache", lambda: cache)
+    # this build has no test-Cart id: the label predicate wins, and is tried first from then on
+    cart = CartPage(FakeDriver({(AppiumBy.IOS_PREDICATE, "type == 'XCUIElementTypeButton' and label CONTAINS 'Cart'"): ["cart"]}))
+    assert cart.cart_btn_chain.find(cart.driver, timeout=0) == "cart"
+    assert cache.ranked("CartPage.cart_btn", cart.cart_btn_candidates) == [1, 0]
+
+    login = LoginPage(FakeDriver())
+    fields = login.username_candidates
+    cache.record("LoginPage.username", fields, 0, 0.4)
+    cache.record("LoginPage.username", fields, 2, 0.1)
+    # the catch-all //XCUIElementTypeTextField is faster but the exact id has won: it stays first
+    assert cache.ranked("LoginPage.username", fields) == [0, 2, 1]
+
+
+
+def test_concurrent_saves_keep_every_workers_counts(tmp_path):
+    path = str(tmp_path / "locators.json")
+    caches = [LocatorCache(path, "bs://build-1") for _ in range(8)]
+    for cache in caches:
+        cache.record("ProductsPage.sort_btn", CANDIDATES, 2, 0.1)
+    threads = [threading.Thread(target=cache.save) for cache in caches]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = LocatorCache(path, "bs://build-1")._stats["ProductsPage.sort_btn"]
+    assert stats["xpath|//*[@label='Sort']"]["wins"] == len(caches)
@@ -0,0 +1,46 @@
+# tests/test_locator_index.py
+import os
+
+from pages.snapshot import PageSnapshot
+from utils.locator_index import LocatorIndex, build
+
+ARTIFACTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "artifacts")
+
+
+def test_suggestions_are_unique_and_agree_with_local_evaluation(tmp_path):
+    index, parsed = build([ARTIFACTS], str(tmp_path / "index.json"), workers=2)
+    assert parsed > 0 and index.stats()["screens"] > 1
+
+    login = os.path.join(ARTIFACTS, "pagesource.xml")
+    screen = index.files[login]["screen"]
+    best = index.suggest(name="test-LOGIN", screen=screen, top=10)
+    assert (best[0].by, best[0].value, best[0].hits_here) == ("accessibility id", "test-LOGIN", 1)
+    unique = [s for s in best if s.hits_here == 1 and not s.fragile]
+    # cheaper lookups first among equally unique candidates
+    assert [s.tier for s in unique] == sorted(s.tier for s in unique)
+
+    # what the index counts on a screen is what the locator finds there
+    snap = PageSnapshot.from_file(login)
+    for target in ("test-Username", "test-LOGIN", "LOGIN"):
+        for s in index.suggest(target, screen=screen, top=20):
+            assert len(snap.find_elements(s.by, s.value)) == s.hits_here, s
+
+
+def test_rebuild_only_parses_changed_files(tmp_path):
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    source = open(os.path.join(ARTIFACTS, "pagesource_cart.xml"), encoding="utf-8").read()
+    (corpus / "a.xml").write_text(source, encoding="utf-8")
+    (corpus / "b.xml").write_text(source, encoding="utf-8")
+    (corpus / "torn.xml").write_text(source[:500], encoding="utf-8")
+    path = str(tmp_path / "index.json")
+
+    index, parsed = build([str(corpus)], path)
+    assert parsed == 3
+    assert len(index.screens) == 1 and len(index.files) == 2     # duplicates share a screen, torn file skipped
+
+    os.remove(corpus / "b.xml")
+    index, parsed = build([str(corpus)], path)
+    assert parsed == 1                                           # only the torn file is retried
+    assert list(index.files) == [str(corpus / "a.xml")]
+    assert LocatorIndex.load(path).stats() == index.stats()
@@ -0,0 +1,96 @@
+# tests/test_locator_rewrite.py
+import glob
+import os
+import re
+
+import pytest
+from appium.webdriver.common.appiumby import AppiumBy
+
+from pages.ios_query import find_all
+from pages.locator_rewrite import rewrite_locator
+from pages.login_page import LoginPage
+from pages.products_page import ProductsPage
+from pages.snapshot import PageSnapshot
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+SOURCES = sorted(glob.glob(os.path.join(ROOT, "artifacts", "*.xml")))
+
+# plain XPath literals in the page objects and dump scripts (f-string templates are expanded below)
+_XPATH_LITERAL = re.compile(r"""(?<![f\w])"((?://[\w*]|ancestor::)[^"{}]*)"(?!\s*%)""")
+
+# literals no stored source exercises: screens that were never dumped, string-value matches
+# (elements carry no text nodes) and relative paths
+UNCHECKED = {
+    "//*[contains(., 'Products') or contains(., 'PRODUCTS')]",
+    "//*[contains(., 'UI Elements') or contains(., 'UI elements') or contains(., 'UI ELEMENTS')]",
+    "//*[contains(translate(@label,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'ok') or contains(translate(@text,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'ok')]",
+    "//XCUIElementTypeButton[contains(translate(@label,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'login') or contains(translate(@name,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'login')]",
+    "ancestor::XCUIElementTypeOther",
+}
+
+
+def _literal_xpaths():
+    found = set()
+    for path in glob.glob(os.path.join(ROOT, "pages", "*.py")) + glob.glob(os.path.join(ROOT, "tests", "dump_*.py")):
+        with open(path, encoding="utf-8") as f:
+            found.update(_XPATH_LITERAL.findall(f.read()))
+    return found
+
+
+def _xpaths():
+    xpaths = _literal_xpaths()
+    lp, pp = LoginPage(None), ProductsPage(None)
+    for by, value in lp.username_candidates + lp.password_candidates + lp.login_btn_candidates + lp.error_candidates + pp.sort_btn_candidates:
+        if by == AppiumBy.XPATH:
+            xpaths.add(value)
+    for option in ("Name (A to Z)", "Price (low to high)", "Price (high to low)"):
+        xpaths.update(v for by, v in pp.sort_option_candidates(option) if by == AppiumBy.XPATH)
+    xpaths.update(v for by, v in pp.sort_option_fallbacks() if by == AppiumBy.XPATH)
+    xpaths.add("//XCUIElementTypeStaticText[contains(translate(@label,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'sauce labs backpack')]")
+    # child paths -> class chain
+    xpaths.add("//XCUIElementTypeOther[@name='test-Item']/XCUIElementTypeOther")
+    xpaths.add("//XCUIElementTypeWindow/XCUIElementTypeOther/XCUIElementTypeOther[contains(@name,'PRODUCTS')]")
+    return sorted(xpaths - UNCHECKED)
+
+
+XPATHS = _xpaths()
+
+
+@pytest.fixture(scope="module")
+def snapshots():
+    return [PageSnapshot.from_file(path) for path in SOURCES]
+
+
+@pytest.mark.parametrize("xpath", XPATHS)
+def test_rewrite_is_equivalent_on_stored_sources(snapshots, xpath):
+    by, value = rewrite_locator(AppiumBy.XPATH, xpath)
+    matched = 0
+    for snap in snapshots:
+        expected = find_all(snap, AppiumBy.XPATH, xpath)
+        assert [id(n) for n in find_all(snap, by, value)] == [id(n) for n in expected], (by, value)
+        matched += len(expected)
+    # an XPath that matches nothing anywhere proves nothing about the rewrite
+    assert matched, f"{xpath} matches no stored source"
+
+
+def test_common_idioms_leave_xpath():
+    rewritten = {x: rewrite_locator(AppiumBy.XPATH, x)[0] for x in XPATHS}
+    assert all(by != AppiumBy.XPATH for by in rewritten.values())
+    assert rewritten["//XCUIElementTypeOther[@name='test-Item']/XCUIElementTypeOther"] == AppiumBy.IOS_CLASS_CHAIN
+
+
+@pytest.mark.parametrize("xpath, expected", [
+    ("//XCUIElementTypeButton[contains(translate(@label,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'login')"
+     " or contains(translate(@text,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'login')]",
+     (AppiumBy.IOS_PREDICATE, "type == 'XCUIElementTypeButton' AND label CONTAINS[c] 'login'")),
+    ("//XCUIElementTypeStaticText | //android.widget.TextView",
+     (AppiumBy.IOS_PREDICATE, "type == 'XCUIElementTypeStaticText'")),
+    ("//XCUIElementTypeOther[@name='test-Item']/XCUIElementTypeStaticText",
+     (AppiumBy.IOS_CLASS_CHAIN, "**/XCUIElementTypeOther[`name == 'test-Item'`]/XCUIElementTypeStaticText")),
+    # translate() only lowers A-Z: an upper-case needle can never match, CONTAINS[c] would
+    ("//*[contains(translate(@label,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'Sort')]", None),
+    ("//*[contains(translate(@label,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'préfér')]", None),
+    ("ancestor::XCUIElementTypeOther", None),
+])
+def test_rewrites(xpath, expected):
+    assert rewrite_locator(AppiumBy.XPATH, xpath) == (expected or (AppiumBy.XPATH, xpath))
@@ -1,6 +1,7 @@
 # tests/test_login.py
 import pytest
 from pages.login_page import LoginPage
+from pages.screen_graph import MENU_OPEN, go_to
 from appium.webdriver.common.appiumby import AppiumBy
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -9,6 +10,7 @@ from selenium.webdriver.support import expected_conditions as EC
 VALID_USER = "standard_user"
 VALID_PASS = "secret_sauce"
 
+@pytest.mark.app_state("login_screen")
 def test_valid_login(driver):
     """User can log in with valid credentials."""
     lp = LoginPage(driver)
@@ -21,6 +23,7 @@ def test_valid_login(driver):
     )
     assert products_title is not None, "Products page not visible after login"
 
+@pytest.mark.app_state("login_screen")
 def test_invalid_login_shows_error(driver):
     """Invalid login should display an error message."""
     lp = LoginPage(driver)
@@ -28,16 +31,13 @@ def test_invalid_login_shows_error(driver):
     error_text = lp.get_error_text()
     assert error_text.strip() != "", "Expected an error message for invalid login"
 
+@pytest.mark.app_state("products_logged_in")
 def test_logout(driver):
     """User can log out after logging in."""
     lp = LoginPage(driver)
-    lp.login(VALID_USER, VALID_PASS)
 
-    # open menu (hamburger icon usually on top-left)
-    menu_btn = WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((AppiumBy.ACCESSIBILITY_ID, "test-Menu"))
-    )
-    menu_btn.click()
+    # open the side menu (hamburger icon on top-left)
+    assert go_to(driver, MENU_OPEN), "Side menu did not open"
 
     # tap logout
     logout_btn = lp._find_first(lp.logout_btn_candidates)
@@ -0,0 +1,50 @@
+# tests/test_page_snapshot.py
+import os
+
+from selenium.webdriver.remote.command import Command
+
+from pages.products_page import ProductsPage
+from pages.snapshot import snapshot_for
+
+ARTIFACTS = os.path.join(os.path.dirname(__file__), "..", "artifacts")
+
+
+class SourceOnlyDriver:
+    """Serves page_source from a stored artifact and counts every remote command."""
+
+    def __init__(self, artifact):
+        with open(os.path.join(ARTIFACTS, artifact), encoding="utf-8") as f:
+            self.source = f.read()
+        self.commands = []
+
+    def execute(self, driver_command, params=None):
+        self.commands.append(driver_command)
+        return {"value": self.source if driver_command == Command.GET_PAGE_SOURCE else None}
+
+    @property
+    def page_source(self):
+        return self.execute(Command.GET_PAGE_SOURCE)["value"]
+
+    def find_elements(self, by, value):
+        raise AssertionError("read-only queries should be answered from the snapshot")
+
+
+def test_product_titles_and_prices_cost_one_request():
+    driver = SourceOnlyDriver("pagesource_post_login.xml")
+    pp = ProductsPage(driver)
+    titles = pp.get_all_product_titles()
+    prices = pp.collect_visible_prices()
+    assert titles[:2] == ["Sauce Labs Backpack", "Sauce Labs Bike Light"]
+    assert prices[:2] == [29.99, 9.99]
+    assert driver.commands == [Command.GET_PAGE_SOURCE]
+
+
+def test_ui_changing_command_invalidates_snapshot():
+    driver = SourceOnlyDriver("pagesource_post_login.xml")
+    first = snapshot_for(driver)
+    assert snapshot_for(driver) is first
+    driver.execute(Command.FIND_ELEMENTS, {})
+    assert snapshot_for(driver) is first
+    driver.execute(Command.CLICK_ELEMENT, {"id": "1"})
+    assert snapshot_for(driver) is not first
+    assert driver.commands.count(Command.GET_PAGE_SOURCE) == 2
@@ -0,0 +1,74 @@
+# tests/test_screen_crawler.py
+import json
+import os
+
+from selenium.webdriver.remote.command import Command
+
+from utils.screen_crawler import Crawler
+
+# screen -> [(name, type, y, next screen)]; every element is 100x40 at x=0
+APP = {
+    "home": [("test-Menu", "XCUIElementTypeButton", 0, "menu"), ("test-Item 1", "XCUIElementTypeOther", 50, "item"),
+             ("test-Item 2", "XCUIElementTypeOther", 100, "item"), ("Badge", "XCUIElementTypeStaticText", 150, None)],
+    "menu": [("test-Close", "XCUIElementTypeButton", 0, "home"), ("test-About", "XCUIElementTypeButton", 50, "about")],
+    "item": [("test-BACK", "XCUIElementTypeButton", 0, "home")],
+    "about": [("test-BACK", "XCUIElementTypeButton", 0, "menu"), ("Version", "XCUIElementTypeStaticText", 50, None)],
+}
+
+
+class FakeApp:
+    """Serves APP as page sources; W3C taps move between screens. The home badge counts taps."""
+
+    def __init__(self):
+        self.screen = "home"
+        self.taps = 0
+
+    @property
+    def page_source(self):
+        nodes = "".join(
+            f'<{kind} type="{kind}" name="{name.replace("1", str(self.taps)) if name == "Badge" else name}" '
+            f'accessible="true" visible="true" x="0" y="{y}" width="100" height="40"/>'
+            for name, kind, y, _ in APP[self.screen])
+        # an earlier screen kept around invisible, like the React Native tree does
+        hidden = '<XCUIElementTypeButton name="test-Hidden" visible="false" x="0" y="0" width="9" height="9"/>'
+        return f"<AppiumAUT><XCUIElementTypeApplication>{nodes}{hidden}</XCUIElementTypeApplication></AppiumAUT>"
+
+    def execute(self, command, params=None):
+        if command == Command.W3C_ACTIONS:
+            move = next(a for a in params["actions"][0]["actions"] if a["type"] == "pointerMove")
+            for name, kind, y, target in APP[self.screen]:
+                if y <= move["y"] < y + 40 and target:
+                    self.taps += 1
+                    self.screen = target
+        return {}
+
+
+def restart(driver):
+    driver.screen = "home"
+
+
+def test_crawl_dedups_screens_and_writes_the_corpus(tmp_path):
+    drivers = [FakeApp(), FakeApp()]
+    corpus = Crawler(str(tmp_path), restart=restart, settle_s=1).crawl(drivers)
+
+    screens = corpus["screens"]
+    # the two items open the same screen; the badge text changing doesn't make a new home
+    assert len(screens) == 4
+    assert sorted(s["depth"] for s in screens.values()) == [0, 1, 1, 2]
+    about = next(s for s in screens.values() if s["depth"] == 2)
+    assert about["path"] == ["tap test-Menu", "tap test-About"]
+    # every action of every screen explored once: home 3, menu 2, item 1, about 1
+    assert len(corpus["edges"]) == 7
+    targets = {e[1]: e[2] for e in corpus["edges"] if e[0] == corpus["root"]}
+    assert targets["tap test-Item 1"] == targets["tap test-Item 2"]
+
+    on_disk = json.loads((tmp_path / "corpus.json").read_text())
+    assert on_disk["root"] == corpus["root"]
+    assert sorted(os.listdir(tmp_path / "screens")) == sorted(f"{fp}.xml" for fp in screens)
+    assert "test-Hidden" not in json.dumps(corpus["edges"])
+
+
+def test_limits(tmp_path):
+    corpus = Crawler(str(tmp_path), restart=restart, settle_s=1, max_depth=1, skip={"test-Menu"}).crawl([FakeApp()])
+    assert [s["depth"] for s in corpus["screens"].values()] == [0, 1]
+    assert all(e[1] != "tap test-Menu" for e in corpus["edges"])
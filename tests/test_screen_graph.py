@@ -0,0 +1,91 @@
+# tests/test_screen_graph.py
+import json
+import threading
+
+from pages.screen_graph import ScreenGraph
+
+
+class FakeDriver:
+    """Serves a one-node page source naming the current screen; actions move it around."""
+
+    def __init__(self, screen):
+        self.screen = screen
+
+    @property
+    def page_source(self):
+        return f'<AppiumAUT><XCUIElementTypeOther name="{self.screen}" visible="true"/></AppiumAUT>'
+
+    def execute(self, command, params=None):
+        return {}
+
+
+def graph(costs_path=None):
+    g = ScreenGraph(costs_path=costs_path)
+    for name in ("login", "products", "cart", "menu", "popup"):
+        g.add_screen(name, [f"name == '{name}' AND visible == 1"])
+
+    def move(to, ok=True):
+        def action(driver):
+            driver.screen = to
+            return ok
+        return action
+
+    g.add_edge("login", "products", move("products"), cost=8)
+    g.add_edge("products", "cart", move("cart"), cost=2)
+    g.add_edge("products", "menu", move("menu"), cost=1)
+    g.add_edge("menu", "login", move("login"), cost=1)
+    g.add_edge("cart", "login", move("popup", ok=False), cost=1)   # lands on an unexpected popup
+    g.add_edge("cart", "products", move("products"), cost=2)
+    g.add_edge("popup", "products", move("products"), cost=1)
+    return g
+
+
+def test_cheapest_path_and_unreachable():
+    g = graph()
+
+    assert [e.key for e in g.path("cart", "login")] == ["cart->login"]
+    assert [e.key for e in g.path("products", "login")] == ["products->menu", "menu->login"]
+    assert g.path("login", "login") == []
+    assert g.path("login", "popup") is None
+    assert g.path(None, "login") is None
+
+
+def test_go_to_replans_from_unexpected_screen_and_measures_costs(tmp_path):
+    costs = tmp_path / "costs.json"
+    g = graph(str(costs))
+    driver = FakeDriver("cart")
+
+    assert g.go_to(driver, "login")
+    assert driver.screen == "login"
+    assert g.stats["replans"] == 1
+    assert g.stats["cart->login"] == 1 and g.stats["popup->products"] == 1
+    # the failed edge now looks expensive; successful ones moved toward their (near zero) run time
+    assert g.edge("cart", "login").cost > 10
+    assert g.edge("menu", "login").cost < 1
+
+    assert g.go_to(driver, "login")
+    assert g.stats["in_place"] == 1
+
+    g.save_costs()
+    saved = json.loads(costs.read_text())
+    assert set(saved) == {"cart->login", "popup->products", "products->menu", "menu->login"}
+    # a new process plans with the measured costs
+    assert [e.key for e in graph(str(costs)).path("cart", "login")] == ["cart->products", "products->menu", "menu->login"]
+
+
+def test_concurrent_workers_keep_each_others_costs(tmp_path):
+    costs = str(tmp_path / "costs.json")
+    keys = [("login", "products"), ("products", "cart"), ("products", "menu"), ("menu", "login"),
+            ("cart", "login"), ("cart", "products"), ("popup", "products")]
+    graphs = []
+    for src, dst in keys:
+        g = graph(costs)
+        g.edge(src, dst).runs = 1  # as if this worker ran only that edge
+        graphs.append(g)
+    threads = [threading.Thread(target=g.save_costs) for g in graphs]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert set(json.loads((tmp_path / "costs.json").read_text())) == {f"{src}->{dst}" for src, dst in keys}
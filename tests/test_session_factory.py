@@ -0,0 +1,117 @@
+# tests/test_session_factory.py
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import urllib3
+from selenium.common.exceptions import SessionNotCreatedException, WebDriverException
+
+from utils import session_factory
+
+
+class FlakyHub(BaseHTTPRequestHandler):
+    """Hub whose first new-session request finds every parallel slot busy."""
+
+    protocol_version = "HTTP/1.1"
+    sessions = 0
+    requests = []
+
+    def _reply(self, status, value):
+        payload = json.dumps({"value": value}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        FlakyHub.requests.append(("POST", self.path))
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        FlakyHub.sessions += 1
+        if FlakyHub.sessions == 1:
+            self._reply(500, {"error": "session not created", "message": "All parallel tests are currently in use"})
+        else:
+            self._reply(200, {"sessionId": "abc123", "capabilities": {"platformName": "iOS"}})
+
+    def do_GET(self):
+        FlakyHub.requests.append(("GET", self.path))
+        if "/session/gone/" in self.path:
+            self._reply(404, {"error": "invalid session id", "message": "session is gone"})
+        elif self.path.endswith("/timeouts"):
+            self._reply(200, {"implicit": 0, "pageLoad": 300000, "script": 30000})
+        else:
+            self._reply(200, "<AppiumAUT/>")
+
+    def do_DELETE(self):
+        FlakyHub.requests.append(("DELETE", self.path))
+        self._reply(200, None)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def own_stats(monkeypatch):
+    # keep these fake sessions out of the run's "[conftest] hub HTTP" summary
+    monkeypatch.setattr(session_factory, "_stats", [])
+
+
+@pytest.fixture
+def hub():
+    FlakyHub.sessions = 0
+    FlakyHub.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/wd/hub"
+    server.shutdown()
+    server.server_close()
+
+
+def test_retries_busy_hub_and_reuses_one_connection(hub, monkeypatch):
+    monkeypatch.setattr(session_factory, "CREATE_BACKOFF_S", 0.01)
+    driver = session_factory.create_session("test_login", hub=hub, user="u", key="k", app="bs://app")
+    for _ in range(3):
+        assert driver.page_source == "<AppiumAUT/>"
+
+    stats = session_factory.http_stats(driver)
+    assert stats["create_attempts"] == 2
+    # two new-session attempts + three sources, all on one kept-alive socket
+    assert (stats["requests"], stats["connections"], stats["reused"]) == (5, 1, 4)
+    assert "1 creation retries" in session_factory.summary()
+
+
+def test_options_and_transient_errors(monkeypatch):
+    monkeypatch.setenv("BROWSERSTACK_BUILD_NAME", "nightly")
+    monkeypatch.setenv("OS_VERSION", "18")
+    caps = session_factory.build_options("test_x", user="u", key="k", app="bs://app").to_capabilities()
+    bstack = caps["bstack:options"]
+    assert (bstack["buildName"], bstack["sessionName"], bstack["osVersion"]) == ("nightly", "test_x", "18")
+    assert caps["appium:app"] == "bs://app"
+
+    assert session_factory.is_transient(SessionNotCreatedException("All parallel tests are currently in use"))
+    assert session_factory.is_transient(ConnectionRefusedError())
+    assert session_factory.is_transient(urllib3.exceptions.MaxRetryError(
+        None, "/wd/hub/session", urllib3.exceptions.NewConnectionError(None, "refused")))
+    # the hub got the request: the session may still be booting
+    assert not session_factory.is_transient(urllib3.exceptions.ReadTimeoutError(None, "/wd/hub/session", "read timed out"))
+    assert not session_factory.is_transient(ConnectionResetError())
+    assert not session_factory.is_transient(WebDriverException("Authorization Required"))
+    assert not session_factory.is_transient(WebDriverException("[BROWSERSTACK_INVALID_APP_URL] timeout"))
+
+
+def test_attach_runs_on_the_kept_session_and_detaches(hub, tmp_path, monkeypatch):
+    keeper = tmp_path / "keeper.json"
+    keeper.write_text(json.dumps({"session_id": "kept-1", "hub": hub, "capabilities": {"bundleId": "com.swaglabs"}}))
+    monkeypatch.setattr(session_factory, "KEEPER_FILE", str(keeper))
+    monkeypatch.setattr(session_factory, "ATTACH_SESSION", "keeper")
+
+    driver = session_factory.open_session("dump-page-source")
+    assert driver.page_source == "<AppiumAUT/>"
+    assert driver.capabilities["bundleId"] == "com.swaglabs"
+    driver.quit()
+    # no session created, none deleted
+    assert FlakyHub.requests == [("GET", "/wd/hub/session/kept-1/timeouts"), ("GET", "/wd/hub/session/kept-1/source")]
+
+    with pytest.raises(RuntimeError, match="not alive"):
+        session_factory.attach_session("gone", hub=hub)
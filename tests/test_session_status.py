@@ -0,0 +1,47 @@
+# tests/test_session_status.py
+import json
+
+from utils import session_status
+
+
+def test_records_fold_per_session_and_flush(tmp_path):
+    path = str(tmp_path / "status.jsonl")
+    session_status.record("s1", "tests/test_login.py::test_valid_login", "passed", path=path)
+    session_status.record("s1", "tests/test_login.py::test_logout", "failed", "AssertionError: still logged in", path=path)
+    session_status.record("s2", "tests/test_ui_elements.py::test_open_ui_elements", "passed", path=path)
+    # a worker killed mid-write
+    with open(path, "a") as f:
+        f.write('{"session": "s3", "te')
+
+    statuses = session_status.fold(session_status.load_records(path))
+    assert statuses["s1"] == ("failed", "1/2 failed: test_logout | AssertionError: still logged in")
+    assert statuses["s2"] == ("passed", "All assertions passed")
+
+    report = tmp_path / "report.json"
+    assert session_status.flush(session_status.LocalReporter(str(report)), path) == (2, 0)
+    assert json.loads(report.read_text())["s1"]["status"] == "failed"
+    assert not (tmp_path / "status.jsonl").exists()
+
+
+def test_unreported_sessions_are_kept(tmp_path):
+    path = str(tmp_path / "status.jsonl")
+    session_status.record("ok", "t::a", "passed", path=path)
+    session_status.record("down", "t::b", "failed", "boom", path=path)
+
+    class Flaky:
+        def report(self, session_id, status, reason):
+            if session_id == "down":
+                raise ConnectionError("api unreachable")
+            return True
+
+    assert session_status.flush(Flaky(), path) == (1, 1)
+    assert [r["session"] for r in session_status.load_records(path)] == ["down"]
+    assert session_status.flush(None, path) == (0, 0)
+    assert session_status.get_reporter("off") is None
+
+
+def test_browserstack_reporter_uses_the_session_credentials(monkeypatch):
+    monkeypatch.delenv("BROWSERSTACK_USERNAME", raising=False)
+    monkeypatch.delenv("BROWSERSTACK_ACCESS_KEY", raising=False)
+    reporter = session_status.get_reporter("browserstack", user="me", key="secret")
+    assert (reporter.user, reporter.key) == ("me", "secret")
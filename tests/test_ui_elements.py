@@ -5,8 +5,13 @@ from pages.sample_page import SamplePage
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+# tests start on the UI Elements screen (pages/app_state.py opens it)
+pytestmark = pytest.mark.app_state("ui_elements")
+
 @pytest.mark.smoke
+@pytest.mark.app_state("login_screen")
 def test_open_ui_elements(driver):
+    # exercises the navigation itself, so it starts from the app's first screen
     sp = SamplePage(driver)
     sp.wait_for_app()
     sp.open_ui_elements()
@@ -18,16 +23,12 @@ def test_open_ui_elements(driver):
 
 def test_text_button_shows_text(driver):
     sp = SamplePage(driver)
-    sp.wait_for_app()
-    sp.open_ui_elements()
     sp.tap_text_button()
     text = sp.get_static_text()
     assert text and text.strip() != "", f"Expected static text after pressing Text Button, got: '{text}'"
 
 def test_alert_opens_and_closes(driver):
     sp = SamplePage(driver)
-    sp.wait_for_app()
-    sp.open_ui_elements()
     sp.tap_alert()
     assert sp.is_alert_present(), "Expected alert to appear after tapping Alert"
     sp.close_alert_ok()
@@ -0,0 +1,53 @@
+# tests/test_ui_settle.py
+from pages import ui_settle
+from pages.snapshot import snapshot_for
+
+
+class SlidingDriver:
+    """A drawer that moves for `frames` polls, then stays put; the label text keeps ticking."""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.polls = 0
+
+    @property
+    def page_source(self):
+        self.polls += 1
+        x = max(0, self.frames - self.polls) * 40
+        return ('<AppiumAUT><XCUIElementTypeOther name="drawer" x="%d" y="0" width="300" height="800" visible="true">'
+                '<XCUIElementTypeStaticText name="clock" value="%d" visible="true"/></XCUIElementTypeOther></AppiumAUT>'
+                % (x, self.polls))
+
+    def execute(self, command, params=None):
+        return {}
+
+
+def test_returns_once_the_screen_stops_moving():
+    driver = SlidingDriver(frames=3)
+    result = ui_settle.wait_for_settle(driver, timeout=5)
+
+    assert result.settled
+    # frames 1-2 move, 3 and 4 match (the ticking text value is ignored)
+    assert result.snapshots == 4
+    assert result.snapshot.find("XCUIElementTypeOther")[0].get("x") == "0"
+    # the settled snapshot is the one later queries reuse
+    assert snapshot_for(driver) is result.snapshot
+
+
+def test_times_out_with_the_last_snapshot():
+    driver = SlidingDriver(frames=1000)
+    result = ui_settle.wait_for_settle(driver, timeout=0.2)
+
+    assert not result.settled
+    assert result.snapshot is not None and result.snapshots == driver.polls
+
+
+def test_fingerprint_ignores_text_but_not_geometry():
+    driver = SlidingDriver(frames=5)
+    moving, moved = snapshot_for(driver, refresh=True), snapshot_for(driver, refresh=True)
+    driver.frames = 0
+    still, ticked = snapshot_for(driver, refresh=True), snapshot_for(driver, refresh=True)
+
+    assert ui_settle.fingerprint(still) == ui_settle.fingerprint(ticked)
+    assert ui_settle.fingerprint(moving)[0] == ui_settle.fingerprint(moved)[0]
+    assert ui_settle.fingerprint(moving)[1] != ui_settle.fingerprint(moved)[1]
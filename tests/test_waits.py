@@ -0,0 +1,87 @@
+# tests/test_waits.py
+import pytest
+
+from pages import waits
+from pages.waits import WaitBudgetExceeded, all_of, any_of, poll_intervals, present, wait_until
+
+
+class FakeDriver:
+    """Elements appear after `after` polls; records implicit wait changes."""
+
+    def __init__(self, after=None, implicit=3):
+        self.after = after or {}
+        self.polls = 0
+        self.implicit_calls = []
+        waits.set_implicit_wait(self, implicit)
+        self.implicit_calls.clear()
+
+    def implicitly_wait(self, seconds):
+        self.implicit_calls.append(seconds)
+
+    def find_elements(self, by, value):
+        self.polls += 1
+        after = self.after.get(value)
+        return [f"<{value}>"] if after is not None and self.polls > after else []
+
+
+@pytest.fixture(autouse=True)
+def no_budget():
+    waits.end_budget()
+    yield
+    waits.end_budget()
+
+
+def test_any_of_all_of_with_implicit_wait_suspended_once():
+    driver = FakeDriver({"b": 2, "c": 0})
+
+    hit = wait_until(driver, any_of(("id", "a"), ("id", "b")), 2, poll=0.001)
+    assert hit == (1, "<b>")
+    assert wait_until(driver, all_of(("id", "b"), present("id", "c")), 1) == ["<b>", "<c>"]
+    assert wait_until(driver, present("id", "a"), 0.05) is None
+    # each wait turns the implicit wait off once and back on once, however many polls it made
+    assert driver.implicit_calls == [0, 3] * 3
+
+
+def test_poll_interval_follows_measured_cost():
+    assert next(poll_intervals(None)) == waits.MIN_POLL_S
+    slow = poll_intervals(0.6)
+    assert [round(next(slow), 2) for _ in range(4)] == [0.3, 0.45, 0.67, 1.0]
+
+
+def test_budget_fails_fast_with_breakdown():
+    driver = FakeDriver()
+    budget = waits.start_budget("t", limit_s=0.2)
+
+    assert wait_until(driver, present("id", "x"), 0.1, label="Page.x") is None
+    with pytest.raises(WaitBudgetExceeded) as e:
+        wait_until(driver, present("id", "y"), 5, label="Page.y")
+    # the second wait was cut to what was left, then nothing waits any more
+    assert budget.spent < 0.35
+    polls = driver.polls
+    with pytest.raises(WaitBudgetExceeded):
+        wait_until(driver, present("id", "z"), 5, label="Page.z")
+    assert driver.polls == polls
+    assert {label: timeouts for label, _, _, timeouts in budget.breakdown()} == {"Page.x": 1, "Page.y": 1, "Page.z": 1}
+    assert "Page.y" in str(e.value)
+
+
+def test_budget_only_charges_the_thread_that_started_it():
+    import threading
+
+    budget = waits.start_budget("t", limit_s=1)
+    errors = []
+
+    def boot():
+        # e.g. the pre-warm thread waiting for a new session's login screen
+        try:
+            wait_until(FakeDriver(), present("id", "login"), 1.5, label="boot")
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=boot)
+    thread.start()
+    assert wait_until(FakeDriver(), present("id", "x"), 0.2, label="Page.x") is None
+    thread.join()
+    assert errors == []
+    assert [label for label, _, _, _ in budget.breakdown()] == ["Page.x"]
+    assert budget.spent < 0.5
@@ -0,0 +1,57 @@
+# tests/test_wd_trace.py
+import time
+from types import SimpleNamespace
+
+from utils import wd_trace
+
+
+class FakeExecutor:
+    """Shaped like RemoteConnection: execute() issues one or more _request() calls."""
+
+    def __init__(self):
+        self.resends = {"getPageSource": 1}
+
+    def execute(self, command, params):
+        for _ in range(self.resends.get(command, 0)):
+            self._request("GET", "/retry")
+        return self._request("POST", f"/{command}", params)
+
+    def _request(self, method, url, body=None):
+        if url == "/findElements":
+            time.sleep(0.01)
+            return {"value": []}
+        if url == "/findElement":
+            return {"status": 404, "value": "no such element"}
+        return {"value": "ok"}
+
+
+def test_trace_is_off_unless_enabled(monkeypatch):
+    monkeypatch.setattr(wd_trace, "TRACE_ENABLED", False)
+    executor = FakeExecutor()
+    original = executor.execute
+    assert wd_trace.install_trace(SimpleNamespace(command_executor=executor)) is None
+    assert executor.execute == original
+
+
+def test_summary_per_test_window(monkeypatch):
+    monkeypatch.setattr(wd_trace, "TRACE_ENABLED", True)
+    driver = SimpleNamespace(command_executor=FakeExecutor())
+    trace = wd_trace.install_trace(driver)
+    assert wd_trace.install_trace(driver) is trace
+
+    driver.command_executor.execute("getPageSource", {})  # before begin(): not summarized
+    trace.begin()
+    execute = driver.command_executor.execute
+    execute("findElements", {"using": "-ios predicate string", "value": "type == 'XCUIElementTypeButton'"})
+    execute("findElement", {"using": "accessibility id", "value": "test-Menu"})
+    execute("getPageSource", {})
+    summary = trace.summary()
+
+    assert summary["round_trips"] == 3
+    assert summary["retries"] == 1
+    assert summary["errors"] == 1
+    assert summary["find_miss_ms"] >= 10
+    assert summary["slowest"][0]["command"] == "findElements"
+    assert summary["slowest"][0]["using"] == "-ios predicate string"
+    assert set(summary["by_command"]) == {"findElements", "findElement", "getPageSource"}
+    assert summary["bytes_out"] > 0
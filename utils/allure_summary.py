@@ -0,0 +1,291 @@
+# utils/allure_summary.py
+"""
+Fast run summaries from allure-results without `allure generate`.
+
+ingest streams the *-result.json files (containers are not needed) through a bounded
+thread pool, splits them into runs and appends one compact, columnar line per run to a
+history file (ALLURE_HISTORY, default allure-history.jsonl):
+
+    {"run": "...", "host": ..., "start": ms, "stop": ms,
+     "fullName": [...], "historyId": [...], "status": "PPFB...",   one char per result
+     "offset": [...], "duration": [...],                           ms, relative to the run start
+     "message": {"<i>": "first line of the failure"}}
+
+A run is one pytest process (the host and pid from the `thread` label); xdist workers
+whose results overlap in time are merged into one run. Only files modified after the
+newest result already in the history are read again, so re-ingesting is cheap and the
+history is only ever appended to.
+
+    python -m utils.allure_summary ingest [allure-results]
+    python -m utils.allure_summary runs
+    python -m utils.allure_summary failed [--run -1]
+    python -m utils.allure_summary slower [--window 5] [--ratio 1.5]
+    python -m utils.allure_summary flaky [--window 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+HISTORY_PATH = os.environ.get("ALLURE_HISTORY", os.path.join(os.getcwd(), "allure-history.jsonl"))
+
+_STATUS = {"passed": "P", "failed": "F", "broken": "B", "skipped": "S"}
+_FAILED = "FB"
+# file mtimes and result stop times come from different clocks/rounding; re-read a little more
+_MTIME_SLACK_MS = 60_000
+
+
+# ---------- ingest ----------
+def _read_result(path):
+    """One result file -> row dict (or None if unreadable)."""
+    try:
+        with open(path, "rb") as f:
+            r = json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+    start = r.get("start") or r.get("stop") or 0
+    labels = {l.get("name"): l.get("value") for l in r.get("labels") or ()}
+    host = labels.get("host")
+    pid = (labels.get("thread") or "").split("-", 1)[0]
+    row = {
+        "fullName": r.get("fullName") or r.get("name"),
+        "historyId": r.get("historyId"),
+        "status": _STATUS.get(r.get("status"), "U"),
+        "start": start,
+        "stop": r.get("stop") or start,
+        "proc": f"{host}:{pid}" if host or pid else None,
+    }
+    if row["status"] in _FAILED:
+        message = (r.get("statusDetails") or {}).get("message") or ""
+        row["message"] = message.strip().split("\n", 1)[0][:200]
+    return row
+
+
+def _read_chunk(paths):
+    return [row for row in map(_read_result, paths) if row is not None]
+
+
+def _result_paths(allure_dir, since_ms=0):
+    with os.scandir(allure_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith("-result.json"):
+                continue
+            if since_ms and entry.stat().st_mtime * 1000 < since_ms - _MTIME_SLACK_MS:
+                continue
+            yield entry.path
+
+
+def stream_results(allure_dir, workers=8, since_ms=0, chunk=256):
+    """
+    Yield result rows, reading files on `workers` threads with at most 2 * workers chunks
+    in flight, so memory stays bounded however many files there are.
+    """
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="allure-summary") as pool:
+        pending = deque()
+        batch = []
+        for path in _result_paths(allure_dir, since_ms):
+            batch.append(path)
+            if len(batch) == chunk:
+                pending.append(pool.submit(_read_chunk, batch))
+                batch = []
+                if len(pending) >= 2 * workers:
+                    yield from pending.popleft().result()
+        if batch:
+            pending.append(pool.submit(_read_chunk, batch))
+        while pending:
+            yield from pending.popleft().result()
+
+
+def split_runs(rows):
+    """Group rows into runs: one per pytest process, merging processes that overlap in time (xdist)."""
+    groups = {}
+    loose = []
+    for row in rows:
+        if row["proc"]:
+            groups.setdefault(row["proc"], []).append(row)
+        else:
+            loose.append([row])
+    spans = sorted(list(groups.values()) + loose, key=lambda g: min(r["start"] for r in g))
+    runs = []
+    run_stop = None
+    for group in spans:
+        start = min(r["start"] for r in group)
+        stop = max(r["stop"] for r in group)
+        if runs and start <= run_stop:
+            runs[-1].extend(group)
+            run_stop = max(run_stop, stop)
+        else:
+            runs.append(list(group))
+            run_stop = stop
+    return [_columnar(rows) for rows in runs]
+
+
+def _columnar(rows):
+    rows.sort(key=lambda r: r["start"])
+    start = rows[0]["start"]
+    procs = sorted({r["proc"] for r in rows if r["proc"]})
+    run = {
+        "run": f"{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime(start / 1000))}-{procs[0] if procs else 'local'}",
+        "host": procs[0].split(":", 1)[0] if procs else None,
+        "start": start,
+        "stop": max(r["stop"] for r in rows),
+        "fullName": [r["fullName"] for r in rows],
+        "historyId": [r["historyId"] for r in rows],
+        "status": "".join(r["status"] for r in rows),
+        "offset": [r["start"] - start for r in rows],
+        "duration": [r["stop"] - r["start"] for r in rows],
+        "message": {str(i): r["message"] for i, r in enumerate(rows) if r.get("message")},
+    }
+    return run
+
+
+# ---------- history ----------
+def load_history(path=None):
+    runs = []
+    try:
+        with open(path or HISTORY_PATH, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    runs.append(json.loads(line))
+    except FileNotFoundError:
+        pass
+    return runs
+
+
+def ingest(allure_dir, history_path=None, workers=8, since_ms=None):
+    """Append the runs in allure_dir that are not in the history yet; returns the new runs."""
+    history_path = history_path or HISTORY_PATH
+    history = load_history(history_path)
+    watermark = max((run["stop"] for run in history), default=0)
+    since_ms = watermark if since_ms is None else since_ms
+    rows = [r for r in stream_results(allure_dir, workers=workers, since_ms=since_ms) if r["start"] > watermark]
+    if not rows:
+        return []
+    known = {run["run"] for run in history}
+    runs = [run for run in split_runs(rows) if run["run"] not in known]
+    parent = os.path.dirname(os.path.abspath(history_path))
+    os.makedirs(parent, exist_ok=True)
+    with open(history_path, "a", encoding="utf-8") as f:
+        for run in runs:
+            f.write(json.dumps(run, separators=(",", ":")) + "\n")
+    return runs
+
+
+# ---------- queries ----------
+def _key(run, i):
+    return run["historyId"][i] or run["fullName"][i]
+
+
+def failed(run):
+    """[(fullName, status, duration_ms, message)] of the failed/broken results of a run."""
+    return [
+        (run["fullName"][i], run["status"][i], run["duration"][i], run["message"].get(str(i), ""))
+        for i, status in enumerate(run["status"]) if status in _FAILED
+    ]
+
+
+def slower(runs, window=5, ratio=1.5, min_delta_ms=1000):
+    """
+    Tests of the last run whose duration exceeds ratio x their median over the previous
+    `window` runs (and by at least min_delta_ms): [(fullName, median_ms, now_ms)].
+    """
+    if len(runs) < 2:
+        return []
+    last, previous = runs[-1], runs[-1 - window:-1]
+    past = {}
+    for run in previous:
+        for i, status in enumerate(run["status"]):
+            if status != "S":
+                past.setdefault(_key(run, i), []).append(run["duration"][i])
+    out = []
+    for i, status in enumerate(last["status"]):
+        durations = past.get(_key(last, i))
+        if status == "S" or not durations:
+            continue
+        median = statistics.median(durations)
+        now = last["duration"][i]
+        if now > median * ratio and now - median >= min_delta_ms:
+            out.append((last["fullName"][i], round(median), now))
+    return sorted(out, key=lambda t: t[1] - t[2])
+
+
+def flaky(runs, window=10):
+    """
+    Tests that both passed and failed over the last `window` runs:
+    [(fullName, passes, failures, flips)], flips = status changes between consecutive results.
+    """
+    seq = {}
+    names = {}
+    for run in runs[-window:]:
+        for i, status in enumerate(run["status"]):
+            if status in "P" + _FAILED:
+                key = _key(run, i)
+                seq.setdefault(key, []).append(status in _FAILED)
+                names[key] = run["fullName"][i]
+    out = []
+    for key, fails in seq.items():
+        n_fail = sum(fails)
+        if 0 < n_fail < len(fails):
+            flips = sum(1 for a, b in zip(fails, fails[1:]) if a != b)
+            out.append((names[key], len(fails) - n_fail, n_fail, flips))
+    return sorted(out, key=lambda t: (-t[3], t[0]))
+
+
+# ---------- CLI ----------
+def _fmt_ms(ms):
+    return f"{ms / 1000:.1f}s"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summaries of Allure results without allure generate")
+    parser.add_argument("--history", default=HISTORY_PATH)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    ing = sub.add_parser("ingest")
+    ing.add_argument("allure_dir", nargs="?", default="allure-results")
+    ing.add_argument("--workers", type=int, default=8)
+    sub.add_parser("runs")
+    fail = sub.add_parser("failed")
+    fail.add_argument("--run", type=int, default=-1, help="index into the history (default: last run)")
+    slow = sub.add_parser("slower")
+    slow.add_argument("--window", type=int, default=5)
+    slow.add_argument("--ratio", type=float, default=1.5)
+    slow.add_argument("--min-delta-ms", type=int, default=1000)
+    flk = sub.add_parser("flaky")
+    flk.add_argument("--window", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    started = time.time()
+    if args.cmd == "ingest":
+        runs = ingest(args.allure_dir, args.history, workers=args.workers)
+        print(f"[allure_summary] {len(runs)} new run(s), {sum(len(r['status']) for r in runs)} results "
+              f"-> {args.history} ({(time.time() - started) * 1000:.0f} ms)")
+        return
+    runs = load_history(args.history)
+    if not runs:
+        print(f"[allure_summary] no runs in {args.history}; run `ingest` first")
+        return
+    if args.cmd == "runs":
+        for i, run in enumerate(runs):
+            counts = {s: run["status"].count(s) for s in "PFBS"}
+            print(f"{i:>4}  {run['run']:<40} {len(run['status']):>4} tests  "
+                  f"passed {counts['P']} failed {counts['F']} broken {counts['B']} skipped {counts['S']}  "
+                  f"{_fmt_ms(run['stop'] - run['start'])}")
+    elif args.cmd == "failed":
+        run = runs[args.run]
+        rows = failed(run)
+        print(f"{run['run']}: {len(rows)} failed/broken")
+        for name, status, duration, message in rows:
+            print(f"  {status} {name:<60} {_fmt_ms(duration):>7}  {message}")
+    elif args.cmd == "slower":
+        for name, median, now in slower(runs, args.window, args.ratio, args.min_delta_ms):
+            print(f"  {name:<60} {_fmt_ms(median):>7} -> {_fmt_ms(now):>7}")
+    elif args.cmd == "flaky":
+        for name, passes, fails, flips in flaky(runs, args.window):
+            print(f"  {name:<60} passed {passes} failed {fails} flips {flips}")
+
+
+if __name__ == "__main__":
+    main()
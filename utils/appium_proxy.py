@@ -0,0 +1,258 @@
+# utils/appium_proxy.py
+"""
+Record/replay HTTP proxy for the W3C/Appium wire protocol.
+
+    # record: forward to BrowserStack and write every command + response to a cassette
+    python -m utils.appium_proxy record cassettes/products.jsonl
+    APPIUM_HUB_URL=http://127.0.0.1:4723/wd/hub pytest tests/test_products_cart_sorting.py
+
+    # replay: answer from the cassette, no device needed (--latency re-applies recorded timings)
+    python -m utils.appium_proxy replay cassettes/products.jsonl [--latency [--latency-scale 0.5]]
+    APPIUM_HUB_URL=http://127.0.0.1:4723/wd/hub pytest tests/test_products_cart_sorting.py
+
+The cassette is JSONL, one exchange per line:
+    {"seq", "t_ms", "elapsed_ms", "method", "path", "body", "status", "response"}
+Credentials in request bodies (userName / accessKey) are redacted before writing.
+
+Replay matches requests by (method, normalized path, normalized body): session ids in
+the path are replaced by a placeholder and JSON bodies are compared key-sorted. Each key
+is answered with its recorded responses in order, so polling loops see the same
+sequence of misses and hits as in the recording; once a key's responses are used up
+the last one is repeated. New-session requests match on method + path only because
+their capabilities carry run-specific build/session names.
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_UPSTREAM = "https://hub-cloud.browserstack.com"
+
+_SESSION_IN_PATH = re.compile(r"(/session/)([^/]+)")
+_SECRET_KEYS = {"userName", "accessKey", "username", "access_key", "password"}
+# hop-by-hop / connection headers that must not be forwarded
+_SKIP_HEADERS = {"host", "connection", "keep-alive", "proxy-connection", "transfer-encoding",
+                 "content-length", "accept-encoding", "upgrade", "te", "trailer"}
+
+
+def normalize_path(path):
+    return _SESSION_IN_PATH.sub(r"\1:sessionId", path.split("?", 1)[0].rstrip("/"))
+
+
+def _redact(value):
+    if isinstance(value, dict):
+        return {k: ("***" if k in _SECRET_KEYS else _redact(v)) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_redact(v) for v in value]
+    return value
+
+
+def _parse_body(raw):
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw.decode("utf-8", "replace") if isinstance(raw, bytes) else raw
+
+
+def request_key(method, path, body):
+    """Matching key for one request; `body` is the parsed (already redacted) JSON body."""
+    norm = normalize_path(path)
+    if method == "POST" and norm.endswith("/session"):
+        return method, norm, None
+    return method, norm, json.dumps(body, sort_keys=True) if body is not None else None
+
+
+class Cassette:
+    """Recorded exchanges of one or more sessions, in order."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._queues = {}
+        self._last = {}
+
+    # ---------- recording ----------
+    def start_recording(self):
+        parent = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(parent, exist_ok=True)
+        open(self.path, "w", encoding="utf-8").close()
+
+    def append(self, exchange):
+        with self._lock:
+            self._seq += 1
+            exchange = dict(exchange, seq=self._seq)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(exchange) + "\n")
+
+    # ---------- replay ----------
+    def load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                ex = json.loads(line)
+                key = request_key(ex["method"], ex["path"], ex.get("body"))
+                self._queues.setdefault(key, deque()).append(ex)
+        return self
+
+    def answer(self, method, path, body):
+        """Next recorded exchange for this request, or None when it was never recorded."""
+        key = request_key(method, path, body)
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue:
+                ex = queue.popleft()
+                self._last[key] = ex
+                return ex
+            return self._last.get(key)
+
+    def remaining(self):
+        with self._lock:
+            return sum(len(q) for q in self._queues.values())
+
+
+class AppiumProxy:
+    """
+    Local proxy in front of an Appium/BrowserStack hub.
+    mode="record" forwards to `upstream` and appends every exchange to the cassette;
+    mode="replay" answers from the cassette (with the recorded latency when latency=True).
+    """
+
+    def __init__(self, mode, cassette, upstream=DEFAULT_UPSTREAM, host="127.0.0.1", port=4723,
+                 latency=False, latency_scale=1.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"mode must be 'record' or 'replay', not {mode!r}")
+        self.mode = mode
+        self.cassette = Cassette(cassette)
+        self.upstream = upstream.rstrip("/")
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self.started_at = time.time()
+        self.misses = 0
+        if mode == "record":
+            self.cassette.start_recording()
+        else:
+            self.cassette.load()
+        self.server = ThreadingHTTPServer((host, port), _handler_for(self))
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/wd/hub"
+
+    def start(self):
+        """Serve in a background thread; returns the hub URL to give the client."""
+        self._thread = threading.Thread(target=self.server.serve_forever, name="appium-proxy", daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    # ---------- exchanges ----------
+    def forward(self, method, path, raw_body, headers):
+        started = time.time()
+        req = urllib.request.Request(self.upstream + path, data=raw_body if method != "GET" else None, method=method)
+        for k, v in headers.items():
+            if k.lower() not in _SKIP_HEADERS:
+                req.add_header(k, v)
+        try:
+            with urllib.request.urlopen(req, timeout=600) as resp:
+                status, payload = resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            status, payload = e.code, e.read()
+        elapsed_ms = (time.time() - started) * 1000.0
+        self.cassette.append({
+            "t_ms": round((started - self.started_at) * 1000.0, 1),
+            "elapsed_ms": round(elapsed_ms, 1),
+            "method": method,
+            "path": path,
+            "body": _redact(_parse_body(raw_body)),
+            "status": status,
+            # the new-session response echoes the capabilities, credentials included
+            "response": _redact(_parse_body(payload)),
+        })
+        return status, payload
+
+    def replay(self, method, path, raw_body):
+        ex = self.cassette.answer(method, path, _redact(_parse_body(raw_body)))
+        if ex is None:
+            self.misses += 1
+            print(f"[appium_proxy] not in cassette: {method} {normalize_path(path)} {raw_body[:200]!r}")
+            error = {"value": {"error": "unknown error", "message": f"appium_proxy: {method} {path} not in cassette"}}
+            return 500, json.dumps(error).encode("utf-8")
+        if self.latency and ex.get("elapsed_ms"):
+            time.sleep(ex["elapsed_ms"] / 1000.0 * self.latency_scale)
+        response = ex.get("response")
+        payload = response if isinstance(response, str) else json.dumps(response)
+        return ex["status"], payload.encode("utf-8")
+
+
+def _handler_for(proxy):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real hub
+
+        def _handle(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            try:
+                if proxy.mode == "record":
+                    status, payload = proxy.forward(self.command, self.path, raw, dict(self.headers))
+                else:
+                    status, payload = proxy.replay(self.command, self.path, raw)
+            except Exception as e:
+                status = 502
+                payload = json.dumps({"value": {"error": "unknown error", "message": f"appium_proxy: {e}"}}).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_POST = do_DELETE = _handle
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record/replay proxy for Appium/BrowserStack sessions")
+    parser.add_argument("mode", choices=("record", "replay"))
+    parser.add_argument("cassette", help="JSONL file to write (record) or read (replay)")
+    parser.add_argument("--upstream", default=os.environ.get("APPIUM_PROXY_UPSTREAM", DEFAULT_UPSTREAM),
+                        help="hub origin to forward to in record mode")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4723)
+    parser.add_argument("--latency", action="store_true", help="replay with the recorded per-command latency")
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    proxy = AppiumProxy(args.mode, args.cassette, upstream=args.upstream, host=args.host, port=args.port,
+                        latency=args.latency, latency_scale=args.latency_scale)
+    print(f"[appium_proxy] {args.mode} {args.cassette} on {proxy.url} (set APPIUM_HUB_URL to this)")
+    try:
+        proxy.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        proxy.server.server_close()
+        if args.mode == "replay":
+            print(f"[appium_proxy] {proxy.cassette.remaining()} recorded exchange(s) unused, {proxy.misses} miss(es)")
+
+
+if __name__ == "__main__":
+    main()
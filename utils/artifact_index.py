@@ -0,0 +1,453 @@
+# utils/artifact_index.py
+"""
+Single index file for everything the artifact store writes, with a size/age budget.
+
+artifacts/index.json records every file the run produced -- content-addressed blobs
+under artifacts/blobs/ and the files allure-pytest writes to allure-results/ -- with its
+size, creation and last-use time, and for Allure results the test, status and the
+attachments they reference. Listing, sizing and pruning read the index only; the one
+directory listing is the tracker matching this run's Allure result files at the end.
+
+gc() applies the budget (ARTIFACTS_MAX_MB, ARTIFACTS_MAX_AGE_DAYS): it drops everything
+older than the age limit, then least-recently-used files until the total fits, but never
+the artifacts of the latest failure of each test (its capture blobs, its Allure result,
+the result's attachments and containers).
+
+Several pytest-xdist workers share the index: each process keeps what it added in memory
+and merges it into the file under a lock on save().
+
+    python -m utils.artifact_index stats
+    python -m utils.artifact_index ls [--test test_logout]
+    python -m utils.artifact_index gc [--max-mb 200] [--max-age-days 7] [--dry-run]
+    python -m utils.artifact_index adopt --allure-dir allure-results   # index files written before the index existed
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+try:
+    from allure_commons import hookimpl
+    from attr import asdict
+except ImportError:  # allure not installed: nothing to track
+    hookimpl = None
+
+MAX_MB = float(os.environ.get("ARTIFACTS_MAX_MB", "500"))
+MAX_AGE_DAYS = float(os.environ.get("ARTIFACTS_MAX_AGE_DAYS", "14"))
+
+INDEX_NAME = "index.json"
+_FAILED = ("failed", "broken")
+
+
+class ArtifactIndex:
+    def __init__(self, root):
+        self.root = root
+        self.path = os.path.join(root, INDEX_NAME)
+        self._lock = threading.Lock()
+        self._files = {}  # relpath -> entry, added by this process since the last save
+        self._captures = []
+        os.makedirs(root, exist_ok=True)
+        with _FileLock(self.path):
+            self.data = self._read()
+
+    # ---------- recording ----------
+    def rel(self, path):
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def abspath(self, rel):
+        return os.path.normpath(os.path.join(self.root, rel))
+
+    def add_file(self, path, kind, size, **meta):
+        """Record (or refresh the last use of) a file written on behalf of the store."""
+        now = round(time.time(), 3)
+        rel = self.rel(path)
+        with self._lock:
+            entry = self.data["files"].get(rel) or {"kind": kind, "bytes": size, "t": now}
+            entry.update(meta, used=now)
+            self.data["files"][rel] = entry
+            self._files[rel] = entry
+
+    def add_capture(self, entry):
+        with self._lock:
+            self.data["captures"].append(entry)
+            self._captures.append(entry)
+
+    def captures(self):
+        with self._lock:
+            return list(self.data["captures"])
+
+    def files(self):
+        with self._lock:
+            return dict(self.data["files"])
+
+    # ---------- persistence ----------
+    def save(self):
+        """Merge what this process added into index.json (other workers may have saved meanwhile)."""
+        with self._lock:
+            files, self._files = self._files, {}
+            captures, self._captures = self._captures, []
+        if not files and not captures:
+            return
+        with _FileLock(self.path):
+            data = self._read()
+            for rel, entry in files.items():
+                known = data["files"].get(rel)
+                if known:
+                    merged = dict(known, **entry)
+                    merged.update(t=min(known["t"], entry["t"]), used=max(known["used"], entry["used"]))
+                    entry = merged
+                data["files"][rel] = entry
+            data["captures"].extend(captures)
+            self._write(data)
+        with self._lock:
+            # pick up what the other workers added
+            data["files"].update(self._files)
+            data["captures"].extend(self._captures)
+            self.data = data
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == 1:
+                return data
+        except (OSError, ValueError):
+            pass
+        return {"version": 1, "files": {}, "captures": []}
+
+    def _write(self, data):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    # ---------- budget ----------
+    def gc(self, max_mb=None, max_age_days=None, dry_run=False, now=None):
+        """
+        Apply the size/age budget. Returns a report dict; with dry_run nothing is deleted.
+        """
+        self.save()
+        max_bytes = (MAX_MB if max_mb is None else max_mb) * 1024 * 1024
+        max_age = (MAX_AGE_DAYS if max_age_days is None else max_age_days) * 86400
+        now = time.time() if now is None else now
+        with _FileLock(self.path):
+            data = self._read()
+            files = data["files"]
+            keep, failed_tests = _latest_failures(data)
+            units = _eviction_units(files)
+            total = sum(e["bytes"] for e in files.values())
+            removed = set()
+
+            def evict(unit):
+                nonlocal total
+                for rel in unit["files"]:
+                    if rel not in removed:
+                        removed.add(rel)
+                        total -= files[rel]["bytes"]
+                # attachments go with the last result that references them
+                for rel in unit["refs"]:
+                    refs[rel] -= 1
+                    if refs[rel] == 0 and rel in files and rel not in keep and rel not in removed:
+                        removed.add(rel)
+                        total -= files[rel]["bytes"]
+
+            refs = {}
+            for e in files.values():
+                for rel in e.get("refs", ()):
+                    refs[rel] = refs.get(rel, 0) + 1
+            candidates = sorted((u for u in units if not keep.intersection(u["files"])), key=lambda u: u["used"])
+            for unit in candidates:
+                if now - unit["used"] > max_age or total > max_bytes:
+                    evict(unit)
+            # containers (fixture set-up/tear-down) whose tests are all gone
+            live = {e.get("uuid") for rel, e in files.items() if e["kind"] == "result" and rel not in removed}
+            for rel, e in files.items():
+                if e["kind"] == "container" and rel not in keep and not live.intersection(e.get("children", ())):
+                    evict({"files": [rel], "refs": e.get("refs", [])})
+
+            freed = sum(files[rel]["bytes"] for rel in removed)
+            report = {"removed": len(removed), "freed_bytes": freed, "total_bytes": total, "kept_failures": len(failed_tests)}
+            if dry_run:
+                report["would_remove"] = sorted(removed)
+                return report
+            for rel in removed:
+                try:
+                    os.remove(self.abspath(rel))
+                except FileNotFoundError:
+                    pass
+                except OSError as ex:
+                    print(f"[artifact_index] could not remove {rel}: {ex}")
+                del files[rel]
+            data["captures"] = [c for c in data["captures"] if c.get("blob") in files]
+            self._write(data)
+        with self._lock:
+            self.data = data
+        return report
+
+    # ---------- adoption ----------
+    def adopt(self, allure_dir):
+        """
+        One-off: index the files already in allure_dir (written before the index existed) so
+        they count against the budget.
+        """
+        added = 0
+        for name in os.listdir(allure_dir):
+            path = os.path.join(allure_dir, name)
+            if self.rel(path) in self.data["files"] or name.endswith(".tmp"):
+                continue
+            size = os.path.getsize(path)
+            mtime = os.path.getmtime(path)
+            meta = {}
+            if name.endswith("-result.json") or name.endswith("-container.json"):
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        item = json.load(f)
+                except (OSError, ValueError):
+                    item = {}
+                meta = _item_meta(item, allure_dir, self)
+            kind = "result" if name.endswith("-result.json") else "container" if name.endswith("-container.json") else "attachment"
+            if kind == "result" and item.get("stop"):
+                mtime = item["stop"] / 1000.0
+            self.add_file(path, kind, size, **meta)
+            self._files[self.rel(path)].update(t=mtime, used=mtime)
+            added += 1
+        self.save()
+        return added
+
+
+class AllureResultsTracker:
+    """
+    allure_commons plugin that records every file allure-pytest writes into the index.
+
+    Attachments are named by the caller and indexed as they are written. The stock logger names
+    result and container files after a random prefix it doesn't expose, so report_result /
+    report_container only remember the item (uuid, test, status, attachments); resolve() then
+    matches them to the files written since the tracker started, by the uuid inside each file.
+    That is one listing of allure_dir per process, at the end (ArtifactStore.close()).
+    """
+
+    _SUFFIXES = (("-result.json", "result"), ("-container.json", "container"))
+
+    def __init__(self, index, allure_dir):
+        self.index = index
+        self.allure_dir = allure_dir
+        self.started = time.time()
+        self._pending = {}      # item uuid -> (kind, meta)
+        self._lock = threading.Lock()
+
+    def _path(self, file_name):
+        return os.path.join(self.allure_dir, file_name)
+
+    def _remember(self, item, kind):
+        meta = _item_meta(asdict(item), self.allure_dir, self.index)
+        with self._lock:
+            self._pending[item.uuid] = (kind, meta)
+
+    def resolve(self):
+        """Index the result/container files of the remembered items; returns how many were found."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            names = os.listdir(self.allure_dir)
+        except OSError:
+            return 0
+        known = self.index.files()
+        found = 0
+        for name in names:
+            kind = next((k for suffix, k in self._SUFFIXES if name.endswith(suffix)), None)
+            path = self._path(name)
+            if kind is None or self.index.rel(path) in known:
+                continue
+            try:
+                # only what this run wrote (allure_dir keeps earlier runs too)
+                if os.path.getmtime(path) < self.started - 1:
+                    continue
+                size = os.path.getsize(path)
+                with open(path, encoding="utf-8") as f:
+                    uuid = json.load(f).get("uuid")
+            except (OSError, ValueError):
+                continue
+            if uuid in pending and pending[uuid][0] == kind:
+                self.index.add_file(path, kind, size, **pending.pop(uuid)[1])
+                found += 1
+        with self._lock:
+            # not written yet (or by another logger): keep for a later resolve()
+            self._pending.update(pending)
+        return found
+
+    if hookimpl is not None:
+        @hookimpl
+        def report_result(self, result):
+            self._remember(result, "result")
+
+        @hookimpl
+        def report_container(self, container):
+            self._remember(container, "container")
+
+        @hookimpl
+        def report_attached_data(self, body, file_name):
+            size = len(body.encode("utf-8")) if isinstance(body, str) else len(body)
+            self.index.add_file(self._path(file_name), "attachment", size)
+
+        @hookimpl
+        def report_attached_file(self, source, file_name):
+            try:
+                size = os.path.getsize(source)
+            except OSError:
+                size = 0
+            self.index.add_file(self._path(file_name), "attachment", size)
+
+
+def _item_meta(item, allure_dir, index):
+    """Test, status, uuid, children and referenced attachments of a result/container dict."""
+    meta = {"uuid": item.get("uuid")}
+    if item.get("fullName") or item.get("name"):
+        meta["test"] = item.get("fullName") or item.get("name")
+    if item.get("status"):
+        meta["status"] = item["status"]
+    if item.get("children"):
+        meta["children"] = item["children"]
+    sources = []
+
+    def walk(node):
+        for att in node.get("attachments") or ():
+            sources.append(index.rel(os.path.join(allure_dir, att["source"])))
+        for key in ("steps", "befores", "afters"):
+            for child in node.get(key) or ():
+                walk(child)
+
+    walk(item)
+    if sources:
+        meta["refs"] = sources
+    return meta
+
+
+def _latest_failures(data):
+    """Files that hold the latest failure of each test (protected from eviction), and those tests."""
+    keep = set()
+    latest = {}
+    for c in data["captures"]:
+        if c.get("test") and (c["test"] not in latest or c["t"] >= latest[c["test"]]["t"]):
+            latest[c["test"]] = c
+    for c in data["captures"]:
+        last = latest.get(c.get("test"))
+        if last and c.get("capture", c["t"]) == last.get("capture", last["t"]):
+            keep.add(c["blob"])
+    files = data["files"]
+    results = {}
+    for rel, e in files.items():
+        if e["kind"] == "result" and e.get("status") in _FAILED:
+            test = e.get("test")
+            if test not in results or e["t"] >= files[results[test]]["t"]:
+                results[test] = rel
+    uuids = set()
+    for rel in results.values():
+        keep.add(rel)
+        keep.update(files[rel].get("refs", ()))
+        uuids.add(files[rel].get("uuid"))
+    for rel, e in files.items():
+        if e["kind"] == "container" and uuids.intersection(e.get("children", ())):
+            keep.add(rel)
+            keep.update(e.get("refs", ()))
+    return keep, set(latest) | set(results)
+
+
+def _eviction_units(files):
+    """Blobs and Allure results (with the attachments they reference) evicted as one unit each."""
+    referenced = set()
+    units = []
+    for rel, e in files.items():
+        if e["kind"] in ("result", "container"):
+            referenced.update(e.get("refs", ()))
+    for rel, e in files.items():
+        if e["kind"] == "result":
+            units.append({"files": [rel], "refs": e.get("refs", []), "used": e["used"]})
+        elif e["kind"] in ("blob", "attachment") and rel not in referenced:
+            units.append({"files": [rel], "refs": [], "used": e["used"]})
+    return units
+
+
+class _FileLock:
+    """Cross-process lock on <path>.lock (O_EXCL create; works on every OS)."""
+
+    def __init__(self, path, timeout=30.0, stale=120.0):
+        self.path = f"{path}.lock"
+        self.timeout = timeout
+        self.stale = stale
+
+    def __enter__(self):
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.path) > self.stale:
+                        os.remove(self.path)  # left behind by a killed process
+                        continue
+                except OSError:
+                    continue
+                if time.time() > deadline:
+                    raise TimeoutError(f"could not lock {self.path}")
+                time.sleep(0.02)
+
+    def __exit__(self, *exc):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def _mb(n):
+    return f"{n / 1024 / 1024:.1f} MB"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List, size and prune the artifact store via its index")
+    parser.add_argument("--root", default=os.path.join(os.getcwd(), "artifacts"))
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("stats")
+    ls = sub.add_parser("ls")
+    ls.add_argument("--test", help="substring of the test node id")
+    gc = sub.add_parser("gc")
+    gc.add_argument("--max-mb", type=float)
+    gc.add_argument("--max-age-days", type=float)
+    gc.add_argument("--dry-run", action="store_true")
+    adopt = sub.add_parser("adopt")
+    adopt.add_argument("--allure-dir", default=os.path.join(os.getcwd(), "allure-results"))
+    args = parser.parse_args(argv)
+
+    index = ArtifactIndex(args.root)
+    if args.cmd == "stats":
+        by_kind = {}
+        for e in index.files().values():
+            agg = by_kind.setdefault(e["kind"], [0, 0])
+            agg[0] += 1
+            agg[1] += e["bytes"]
+        for kind, (count, size) in sorted(by_kind.items()):
+            print(f"{kind:<11} {count:>6} files {_mb(size):>10}")
+        print(f"{'total':<11} {sum(c for c, _ in by_kind.values()):>6} files "
+              f"{_mb(sum(s for _, s in by_kind.values())):>10}  (budget {_mb(MAX_MB * 1024 * 1024)}, {MAX_AGE_DAYS:g} days)")
+    elif args.cmd == "ls":
+        for c in sorted(index.captures(), key=lambda c: -c["t"]):
+            if args.test and args.test not in (c.get("test") or ""):
+                continue
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(c["t"]))
+            print(f"{stamp}  {c.get('test') or '-':<50} {c['name']:<45} {c['blob']}")
+    elif args.cmd == "gc":
+        report = index.gc(args.max_mb, args.max_age_days, dry_run=args.dry_run)
+        for rel in report.pop("would_remove", ()):
+            print(f"would remove {rel}")
+        print(f"[artifact_index] {'would remove' if args.dry_run else 'removed'} {report['removed']} files "
+              f"({_mb(report['freed_bytes'])}), {_mb(report['total_bytes'])} left, "
+              f"latest failure of {report['kept_failures']} tests kept")
+    elif args.cmd == "adopt":
+        print(f"[artifact_index] indexed {index.adopt(args.allure_dir)} files from {args.allure_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# utils/artifacts.py
+"""
+Content-addressed store for failure artifacts (page sources, screenshots).
+
+capture() fetches page_source and the screenshot concurrently (the session is still on
+the failing screen), hashes them and returns at once; writing the blobs, the Allure
+copies and the index entries happens on a background executor so the next test is
+not held up by disk I/O. Screenshots go through utils/screenshots.py (downscale,
+re-encode, perceptual hash) on the fetch thread, overlapping the page_source request;
+a frame within the pHash threshold of one stored earlier for the same test and capture
+name reuses that blob. Frames of other tests are never matched (a different error banner
+is a small pHash distance but the wrong evidence); identical bytes are stored once globally.
+
+Layout:
+    artifacts/blobs/<sha256>.<ext>   each distinct content stored once
+    artifacts/index.json             every capture (test, name, kind, blob, bytes) and every
+                                     file under blobs/ and allure-results/, see artifact_index.py
+    allure-results/<sha256>-attachment.<ext>
+                                     Allure attachments reference the blob's hash, so an
+                                     identical capture is written to allure-results once too
+"""
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import screenshots
+from utils.artifact_index import AllureResultsTracker, ArtifactIndex
+
+BlobRef = namedtuple("BlobRef", "sha256 ext path size")
+
+_MIME = {"xml": "application/xml", "png": "image/png", "jpg": "image/jpeg", "webp": "image/webp", "json": "application/json"}
+
+
+class ArtifactStore:
+    def __init__(self, root, allure_dir=None, workers=2):
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        self.allure_dir = allure_dir
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.index = ArtifactIndex(root)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="artifacts")
+        self._lock = threading.Lock()
+        self._pending = []
+        self._frames = self._load_frames()  # (test, name) -> [(phash, BlobRef)] of stored screenshots
+        self._tracker = self._track_allure_results()
+
+    # ---------- capture ----------
+    def capture(self, driver, prefix, test=None, attach=True):
+        """
+        Grab page source + screenshot of the current screen and store them.
+        Returns (source BlobRef or None, screenshot BlobRef or None); files are written in the background.
+        """
+        shot = self._executor.submit(lambda: screenshots.process(driver.get_screenshot_as_png()))
+        try:
+            source = (driver.page_source or "").encode("utf-8")
+        except Exception as e:
+            print(f"[artifacts] could not fetch page_source: {e}")
+            source = None
+        try:
+            frame = shot.result()
+        except Exception as e:
+            print(f"[artifacts] could not fetch screenshot: {e}")
+            frame = None
+        capture_id = uuid.uuid4().hex[:12]
+        src_ref = self.put(source, "xml", f"{prefix}_pagesource", test=test, attach=attach, capture=capture_id) if source else None
+        png_ref = None
+        if frame is not None:
+            png_ref = self.put(frame.data, frame.ext, f"{prefix}_screenshot", test=test, attach=attach,
+                               phash=frame.phash, capture=capture_id)
+        return src_ref, png_ref
+
+    def put(self, data, ext, name, test=None, attach=False, phash=None, capture=None):
+        """
+        Store bytes under their hash (async write) and optionally attach them to the running Allure test.
+        With a perceptual hash, a near-identical frame stored for the same test and name is
+        referenced instead of storing a new blob (the index entry names it in near_duplicate_of).
+        """
+        sha = hashlib.sha256(data).hexdigest()
+        ref = BlobRef(sha, ext, os.path.join(self.blob_dir, f"{sha}.{ext}"), len(data))
+        near = self._near_frame(phash, ref, (test, name)) if phash is not None else None
+        entry = {"t": round(time.time(), 3), "test": test, "name": name, "kind": ext}
+        if capture:
+            entry["capture"] = capture
+        if phash is not None:
+            entry["phash"] = f"{phash:016x}"
+        # the Allure copy always carries this frame's own bytes, under its own hash
+        allure_name = self._attach(ref, name) if attach else None
+        if near is not None:
+            entry["near_duplicate_of"] = near.sha256
+            ref = near
+        entry.update(blob=f"blobs/{ref.sha256}.{ref.ext}", bytes=ref.size)
+        self._submit(self._write, ref, data, allure_name, entry, near is None)
+        return ref
+
+    def _near_frame(self, phash, ref, scope):
+        """Frame of `scope` (test, name) within the pHash threshold (registering `ref` when there is none)."""
+        with self._lock:
+            frames = self._frames.setdefault(scope, [])
+            for known, known_ref in frames:
+                if screenshots.is_near_duplicate(phash, known):
+                    return None if known_ref.sha256 == ref.sha256 else known_ref
+            frames.append((phash, ref))
+        return None
+
+    def _load_frames(self):
+        frames = {}
+        for e in self.index.captures():
+            if e.get("phash") and "near_duplicate_of" not in e:
+                sha, ext = os.path.splitext(os.path.basename(e["blob"]))
+                path = os.path.join(self.root, e["blob"])
+                frames.setdefault((e.get("test"), e.get("name")), []).append(
+                    (int(e["phash"], 16), BlobRef(sha, ext[1:], path, e["bytes"])))
+        return frames
+
+    # ---------- background work ----------
+    def _submit(self, fn, *args):
+        future = self._executor.submit(fn, *args)
+        with self._lock:
+            self._pending = [f for f in self._pending if not f.done()] + [future]
+
+    def _write(self, ref, data, allure_name, entry, store_blob=True):
+        if store_blob:
+            _write_once(ref.path, data)
+        self.index.add_file(ref.path, "blob", ref.size)
+        if allure_name:
+            path = os.path.join(self.allure_dir, allure_name)
+            _write_once(path, data)
+            self.index.add_file(path, "attachment", len(data))
+        self.index.add_capture(entry)
+
+    def flush(self):
+        """Wait for every pending write (call before the process exits) and save the index."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for future in pending:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"[artifacts] background write failed: {e}")
+        try:
+            self.index.save()
+        except Exception as e:
+            print(f"[artifacts] could not save {self.index.path}: {e}")
+
+    def close(self, gc=False):
+        """
+        Flush and stop tracking; with gc=True apply the size/age budget afterwards
+        (only the process that outlives the others should, i.e. not an xdist worker).
+        """
+        if self._tracker is not None:
+            from allure_commons import plugin_manager
+            plugin_manager.unregister(self._tracker)
+            # allure-pytest names its result files itself: find this run's by their uuid
+            self._tracker.resolve()
+            self._tracker = None
+        self.flush()
+        self._executor.shutdown(wait=True)
+        if gc:
+            report = self.index.gc()
+            if report["removed"]:
+                print(f"[artifacts] pruned {report['removed']} files ({report['freed_bytes'] / 1048576:.1f} MB), "
+                      f"{report['total_bytes'] / 1048576:.1f} MB left")
+            return report
+        return None
+
+    # ---------- allure ----------
+    def _track_allure_results(self):
+        """Record what allure-pytest writes into allure_dir in the index (no directory walks later)."""
+        if not self.allure_dir:
+            return None
+        try:
+            from allure_commons import plugin_manager
+        except ImportError:
+            return None
+        tracker = AllureResultsTracker(self.index, self.allure_dir)
+        plugin_manager.register(tracker)
+        return tracker
+
+    def _attach(self, ref, name):
+        """Register <sha>-attachment.<ext> on the current Allure test/fixture; returns the file name or None."""
+        if not self.allure_dir:
+            return None
+        logger = _allure_logger()
+        if logger is None:
+            return None
+        try:
+            from allure_commons.model2 import Attachment, ExecutableItem
+            item = logger.get_last_item(ExecutableItem)
+            if item is None:
+                return None
+            file_name = f"{ref.sha256}-attachment.{ref.ext}"
+            item.attachments.append(Attachment(source=file_name, name=name, type=_MIME.get(ref.ext)))
+            return file_name
+        except Exception as e:
+            print(f"[artifacts] could not attach {name} to allure: {e}")
+            return None
+
+
+def _allure_logger():
+    """The AllureReporter of the running allure-pytest listener, or None."""
+    try:
+        from allure_commons import plugin_manager
+    except ImportError:
+        return None
+    for plugin in plugin_manager.get_plugins():
+        logger = getattr(plugin, "allure_logger", None)
+        if logger is not None:
+            return logger
+    return None
+
+
+def _write_once(path, data):
+    """Write data to path unless it already exists; returns True when written."""
+    if os.path.exists(path):
+        return False
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return True
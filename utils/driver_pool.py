@@ -0,0 +1,253 @@
+# utils/driver_pool.py
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from appium.webdriver.common.appiumby import AppiumBy
+from pages.locator_chain import LocatorChain
+from pages.waits import present, wait_until
+
+# Locators that prove the app is back on its login screen
+LOGIN_SCREEN_LOCATORS = [
+    (AppiumBy.ACCESSIBILITY_ID, "test-Username"),
+    (AppiumBy.IOS_PREDICATE, "type == 'XCUIElementTypeTextField'"),
+]
+
+
+def wait_for_login_screen(driver, timeout=15):
+    """Return True once one of LOGIN_SCREEN_LOCATORS is present (explicit wait, no sleeps)."""
+    return LocatorChain("login_screen", LOGIN_SCREEN_LOCATORS).exists(driver, timeout=timeout)
+
+
+def bundle_id_for(driver):
+    """Best-effort bundle id of the app under test (env override, then session caps)."""
+    bundle_id = os.environ.get("APP_BUNDLE_ID")
+    if bundle_id:
+        return bundle_id
+    try:
+        caps = driver.capabilities or {}
+    except Exception:
+        caps = {}
+    return caps.get("bundleId") or caps.get("appium:bundleId")
+
+
+def _tap_if_present(driver, accessibility_id, timeout=3):
+    try:
+        el = wait_until(driver, present(AppiumBy.ACCESSIBILITY_ID, accessibility_id), timeout, label="driver_pool.tap")
+        if el is None:
+            return False
+        el.click()
+        return True
+    except Exception:
+        return False
+
+
+def logout_to_login(driver, timeout=10):
+    """In-app fallback reset: menu -> RESET APP STATE -> LOGOUT, then verify the login screen."""
+    if not _tap_if_present(driver, "test-Menu"):
+        return False
+    _tap_if_present(driver, "test-RESET APP STATE", timeout=2)
+    if not _tap_if_present(driver, "test-LOGOUT"):
+        return False
+    return wait_for_login_screen(driver, timeout=timeout)
+
+
+def reset_app(driver, timeout=10):
+    """
+    Put the app back on the login screen without a new session.
+    Uses terminate/activate of the app under test (or the in-app logout when the
+    bundle id is unknown) and verifies the login screen.
+    Returns True only when the reset could be verified.
+    """
+    bundle_id = bundle_id_for(driver)
+    if not bundle_id:
+        return logout_to_login(driver, timeout=timeout)
+    try:
+        driver.terminate_app(bundle_id)
+    except Exception:
+        pass
+    try:
+        driver.activate_app(bundle_id)
+    except Exception:
+        return logout_to_login(driver, timeout=timeout)
+    return wait_for_login_screen(driver, timeout=timeout)
+
+
+class PoolStats:
+    def __init__(self):
+        self.created = 0
+        self.reused = 0
+        self.in_place = 0
+        self.reset_failures = 0
+        self.prewarmed = 0
+        self.prewarm_hits = 0
+        self.prewarm_discarded = 0
+
+    def as_dict(self):
+        return {
+            "created": self.created,
+            "reused": self.reused,
+            "in_place": self.in_place,
+            "reset_failures": self.reset_failures,
+            "prewarmed": self.prewarmed,
+            "prewarm_hits": self.prewarm_hits,
+            "prewarm_discarded": self.prewarm_discarded,
+        }
+
+
+class DriverPool:
+    """
+    Hands out live Appium sessions and recycles them between tests.
+
+    - factory(session_name) must return a ready driver (login screen confirmed).
+    - reset(driver) must return True when the app is verifiably back in its start state.
+    - prepare(driver), passed to acquire(), moves the app to the state the test starts from
+      and returns True when it got there. A reused session is first prepared in place,
+      without a reset; only when that fails is it reset and prepared again.
+    Sessions whose reset (or prepare after it) can't be verified are quit and replaced by a fresh one.
+
+    With prewarm=True and reuse=False the next session is booted in a background thread
+    while the current test runs, so the next test gets an already-booted session. With reuse
+    on, prewarm is ignored: a spare would only serve the rare failed reset while idling (and
+    billed) all run. Unused pre-warmed sessions are quit in close().
+    """
+
+    def __init__(self, factory, reset=reset_app, reuse=True, prewarm=False):
+        self.factory = factory
+        self.reset = reset
+        self.reuse = reuse
+        self.prewarm = prewarm and not reuse
+        self.stats = PoolStats()
+        self._idle = []
+        self._lock = threading.Lock()
+        self._spare = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="driver-prewarm") if self.prewarm else None
+
+    def acquire(self, session_name, prepare=None):
+        driver = None
+        with self._lock:
+            if self._idle:
+                driver = self._idle.pop()
+        if driver is not None:
+            if prepare is not None and self._prepare(prepare, driver):
+                self.stats.reused += 1
+                self.stats.in_place += 1
+                self._rename(driver, session_name)
+                self._start_prewarm()
+                return driver
+            if self.reset(driver) and (prepare is None or self._prepare(prepare, driver)):
+                self.stats.reused += 1
+                self._rename(driver, session_name)
+                self._start_prewarm()
+                return driver
+            self.stats.reset_failures += 1
+            self._quit(driver)
+        driver = self._take_spare()
+        if driver is not None:
+            self.stats.prewarm_hits += 1
+            self._rename(driver, session_name)
+        else:
+            self.stats.created += 1
+            driver = self.factory(session_name)
+        self._start_prewarm()
+        if prepare is not None and not self._prepare(prepare, driver):
+            # nothing left to fall back on: the test runs and reports what it finds
+            print(f"[driver_pool] {session_name}: could not prepare a fresh session")
+        return driver
+
+    def release(self, driver):
+        """Return a driver to the pool (or quit it when reuse is disabled)."""
+        if not self.reuse:
+            self._quit(driver)
+            return
+        with self._lock:
+            self._idle.append(driver)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+            spare, self._spare = self._spare, None
+        for driver in idle:
+            self._quit(driver)
+        if spare is not None and not spare.cancel():
+            # already booting/booted: wait for it so the device isn't left running (and billed)
+            driver = self._spare_result(spare)
+            if driver is not None:
+                self.stats.prewarm_discarded += 1
+                self._quit(driver)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def summary(self):
+        s = self.stats
+        line = f"driver pool: {s.created} session(s) created, {s.reused} reused"
+        if s.in_place:
+            line += f" ({s.in_place} without a reset)"
+        line += f", {s.reset_failures} reset failure(s)"
+        if self.prewarm:
+            line += f"; {s.prewarmed} pre-warmed, {s.prewarm_hits} used, {s.prewarm_discarded} discarded"
+        return line
+
+    # ---------- pre-warming ----------
+    def _start_prewarm(self):
+        if self._executor is None:
+            return
+        with self._lock:
+            if self._spare is not None:
+                return
+            self._spare = self._executor.submit(self._boot_spare)
+
+    def _boot_spare(self):
+        driver = self.factory("prewarm")
+        with self._lock:
+            self.stats.prewarmed += 1
+        return driver
+
+    def _take_spare(self):
+        """Return the pre-warmed session if it is still on a confirmed login screen."""
+        with self._lock:
+            spare, self._spare = self._spare, None
+        if spare is None:
+            return None
+        driver = self._spare_result(spare)
+        if driver is None:
+            return None
+        # the spare may have idled for a while (hub idle timeout): confirm before handing out
+        if wait_for_login_screen(driver, timeout=4):
+            return driver
+        self.stats.prewarm_discarded += 1
+        self._quit(driver)
+        return None
+
+    @staticmethod
+    def _spare_result(future):
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"[driver_pool] pre-warming a session failed: {e}")
+            return None
+
+    @staticmethod
+    def _prepare(prepare, driver):
+        try:
+            return bool(prepare(driver))
+        except Exception as e:
+            print(f"[driver_pool] preparing the app failed: {e}")
+            return False
+
+    @staticmethod
+    def _rename(driver, session_name):
+        # keep BrowserStack session/video labelled with the test currently using it
+        try:
+            payload = json.dumps({"action": "setSessionName", "arguments": {"name": session_name}})
+            driver.execute_script(f"browserstack_executor: {payload}")
+        except Exception:
+            pass
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
@@ -0,0 +1,280 @@
+# utils/duration_scheduler.py
+"""
+Duration-aware test ordering: longest processing time (LPT) first.
+
+Past durations come from the run history utils/allure_summary.py appends to
+(allure-history.jsonl, or the raw allure-results when there is no history yet) and from
+the `allure generate` history (allure-report/history/history.json), keyed by historyId.
+A test's estimate is the median of its last few non-skipped runs. Tests without history
+get the median of their module, else the median of all known tests, else
+SCHEDULER_DEFAULT_SECONDS.
+
+Serially, pytest_collection_modifyitems runs the longest tests first. Under xdist, every
+worker sorts its collection the same way, and LPTScheduling hands the next-longest test
+to whichever worker frees up first. That is list scheduling in LPT order, so workers
+finish close together and the wall clock approaches total work / workers.
+lpt_partition() computes the same plan up front, for the start-of-run report.
+
+With an affinity map ({nodeid: group}, e.g. the app state a test starts from), a worker
+gets the longest pending test of the group its last test belonged to, as long as that test
+is at least AFFINITY_RATIO of the longest pending one; otherwise plain LPT wins.
+
+LPTScheduling overrides LoadScheduling internals (_send_tests, check_schedule, remove_node);
+on a pytest-xdist other than 3.x, or one without them, LPTScheduling is None and xdist's own
+LoadScheduling runs.
+
+TEST_SCHEDULER=off keeps pytest's collection order.
+"""
+import heapq
+import json
+import os
+import statistics
+
+from utils import allure_summary
+
+SCHEDULER_ENABLED = os.environ.get("TEST_SCHEDULER", "lpt") != "off"
+DEFAULT_SECONDS = float(os.environ.get("SCHEDULER_DEFAULT_SECONDS", "30"))
+AFFINITY_RATIO = float(os.environ.get("SCHEDULER_AFFINITY_RATIO", "0.5"))
+REPORT_HISTORY = os.path.join(os.getcwd(), "allure-report", "history", "history.json")
+ALLURE_RESULTS = os.path.join(os.getcwd(), "allure-results")
+
+try:
+    import xdist
+    from xdist.scheduler import LoadScheduling
+except ImportError:  # xdist not installed: serial ordering only
+    xdist = LoadScheduling = None
+
+# what LPTScheduling relies on, checked against pytest-xdist 3.x
+_XDIST_MAJOR = "3"
+_LOAD_SCHEDULING_INTERNALS = ("_send_tests", "check_schedule", "remove_node",
+                              "_check_nodes_have_same_collection", "collection_is_completed")
+
+
+def _xdist_compatible():
+    if LoadScheduling is None:
+        return False
+    if str(getattr(xdist, "__version__", "")).split(".")[0] != _XDIST_MAJOR:
+        return False
+    return all(hasattr(LoadScheduling, name) for name in _LOAD_SCHEDULING_INTERNALS)
+
+
+class DurationModel:
+    def __init__(self, samples, names=None, window=5):
+        """samples: {historyId or fullName: [seconds, oldest first]}; names: {historyId: fullName}."""
+        self.window = window
+        self.by_key = {k: statistics.median(v[-window:]) for k, v in samples.items() if v}
+        by_name = {}
+        for key, seconds in self.by_key.items():
+            by_name.setdefault((names or {}).get(key, key), []).append(seconds)
+        self.by_name = {name: max(v) for name, v in by_name.items()}
+        by_module = {}
+        for name, seconds in self.by_name.items():
+            by_module.setdefault(name.split("#", 1)[0], []).append(seconds)
+        self.by_module = {m: statistics.median(v) for m, v in by_module.items()}
+        self.default = statistics.median(self.by_name.values()) if self.by_name else DEFAULT_SECONDS
+
+    def __bool__(self):
+        return bool(self.by_key)
+
+    @classmethod
+    def load(cls, history_path=None, allure_dir=None, report_history=None, window=5):
+        samples, names = {}, {}
+
+        def add(key, name, ms):
+            if ms and ms > 0:
+                samples.setdefault(key, []).append(ms / 1000.0)
+                if name:
+                    names[key] = name
+
+        # allure generate's history first (older), then the run history (newer)
+        try:
+            with open(report_history or REPORT_HISTORY, encoding="utf-8") as f:
+                report = json.load(f)
+            for history_id, entry in report.items():
+                for item in sorted(entry.get("items") or (), key=lambda i: i.get("time", {}).get("start", 0)):
+                    if item.get("status") != "skipped":
+                        add(history_id, None, item.get("time", {}).get("duration"))
+        except (OSError, ValueError, AttributeError):
+            pass
+        runs = allure_summary.load_history(history_path)
+        if runs:
+            for run in runs:
+                for i, status in enumerate(run["status"]):
+                    if status != "S":
+                        add(run["historyId"][i] or run["fullName"][i], run["fullName"][i], run["duration"][i])
+        elif os.path.isdir(allure_dir or ALLURE_RESULTS):
+            rows = sorted(allure_summary.stream_results(allure_dir or ALLURE_RESULTS), key=lambda r: r["start"])
+            for r in rows:
+                if r["status"] != "S":
+                    add(r["historyId"] or r["fullName"], r["fullName"], r["stop"] - r["start"])
+        return cls(samples, names, window)
+
+    def estimate(self, history_ids=(), full_name=None):
+        """(seconds, known) for a test; falls back to its module's median, then the overall median."""
+        for history_id in history_ids:
+            if history_id in self.by_key:
+                return self.by_key[history_id], True
+        if full_name in self.by_name:
+            return self.by_name[full_name], True
+        module = (full_name or "").split("#", 1)[0]
+        return self.by_module.get(module, self.default), False
+
+
+def nodeid_full_name(nodeid):
+    """'tests/test_login.py::TestX::test_y[p]' -> 'tests.test_login.TestX#test_y' (allure's fullName)."""
+    parts = nodeid.split("::")
+    module = parts[0][:-3] if parts[0].endswith(".py") else parts[0]
+    package = module.replace("/", ".").replace("\\", ".")
+    test = parts[-1].split("[", 1)[0]
+    classes = "".join(f".{c}" for c in parts[1:-1])
+    return f"{package}{classes}#{test}"
+
+
+def item_history_ids(item):
+    """
+    historyIds allure-pytest gives this item: md5(fullName, *parameter values) in current
+    versions, md5(nodeid) in the older one that wrote the stored results.
+    """
+    try:
+        from allure_commons.utils import md5
+        from allure_pytest.utils import allure_full_name
+    except ImportError:
+        return ()
+    params = getattr(getattr(item, "callspec", None), "params", {})
+    return md5(allure_full_name(item), *(params[name] for name in sorted(params))), md5(item.nodeid)
+
+
+def nodeid_history_ids(nodeid):
+    """The historyIds the controller can derive without the item: md5(nodeid) (older allure-pytest)."""
+    try:
+        from allure_commons.utils import md5
+    except ImportError:
+        return ()
+    return (md5(nodeid),)
+
+
+def lpt_order(items, model):
+    """Items sorted longest estimate first (stable for ties); returns (items, estimates by nodeid, unknown count)."""
+    estimates = {}
+    unknown = 0
+    for item in items:
+        seconds, known = model.estimate(item_history_ids(item), nodeid_full_name(item.nodeid))
+        estimates[item.nodeid] = seconds
+        unknown += not known
+    return sorted(items, key=lambda it: -estimates[it.nodeid]), estimates, unknown
+
+
+def lpt_partition(durations, workers):
+    """
+    Greedy LPT bin packing: each job, longest first, goes to the least loaded worker.
+    Returns (bins of job indices, per-bin loads); the makespan is at most 4/3 of optimal.
+    """
+    workers = max(1, workers)
+    bins = [[] for _ in range(workers)]
+    loads = [0.0] * workers
+    heap = [(0.0, w) for w in range(workers)]
+    for job in sorted(range(len(durations)), key=lambda j: -durations[j]):
+        load, w = heapq.heappop(heap)
+        bins[w].append(job)
+        loads[w] = load + durations[job]
+        heapq.heappush(heap, (loads[w], w))
+    return bins, loads
+
+
+def plan_summary(durations, workers, unknown=0):
+    _, loads = lpt_partition(durations, workers)
+    total = sum(durations)
+    text = (f"[scheduler] {len(durations)} tests, ~{total:.0f}s of work on {workers} worker(s): "
+            f"planned finish {max(loads, default=0):.0f}s (ideal {total / max(workers, 1):.0f}s)")
+    if unknown:
+        text += f"; {unknown} without history estimated"
+    return text
+
+
+if _xdist_compatible():
+    class LPTScheduling(LoadScheduling):
+        """
+        xdist scheduler: the collection goes out longest estimate first, and each worker gets one more test
+        whenever it is down to one (a worker needs its next test queued before running the current one).
+        affinity: callable returning {nodeid: group}, read once the collection is known.
+        """
+
+        def __init__(self, config, log=None, model=None, affinity=None):
+            super().__init__(config, log)
+            self.model = model if model is not None else DurationModel.load()
+            self.estimates = []
+            self.affinity = affinity
+            self.groups = []
+            self.node2group = {}
+            self.affinity_hits = 0
+
+        def schedule(self):
+            assert self.collection_is_completed
+            if self.collection is not None:
+                for node in self.nodes:
+                    self.check_schedule(node)
+                return
+            if not self._check_nodes_have_same_collection():
+                self.log("**Different tests collected, aborting run**")
+                return
+            self.collection = next(iter(self.node2collection.values()))
+            if not self.collection:
+                return
+            # the controller has nodeids only, no items: the historyId by nodeid, then the fullName
+            known = [self.model.estimate(nodeid_history_ids(nodeid), nodeid_full_name(nodeid)) for nodeid in self.collection]
+            self.estimates = [seconds for seconds, _ in known]
+            self.pending[:] = sorted(range(len(self.collection)), key=lambda i: -self.estimates[i])
+            print(plan_summary(self.estimates, len(self.nodes), sum(1 for _, k in known if not k)))
+            if self.affinity is not None:
+                try:
+                    groups = self.affinity() or {}
+                except Exception as e:
+                    print(f"[scheduler] no affinity groups: {e}")
+                    groups = {}
+                self.groups = [groups.get(nodeid) for nodeid in self.collection]
+
+            # two rounds, the second in reverse, so the longest test is paired with the shortest of the first 2N
+            nodes = self.nodes
+            for node in nodes:
+                self._send_tests(node, 1)
+            for node in nodes[::-1]:
+                self._send_next(node)
+            if not self.pending:
+                for node in nodes:
+                    node.shutdown()
+
+        def check_schedule(self, node, duration=0):
+            if node.shutting_down:
+                return
+            if self.pending:
+                if len(self.node2pending[node]) < 2:
+                    self._send_next(node)
+            else:
+                node.shutdown()
+
+        def _send_tests(self, node, num):
+            if self.groups and self.pending[:num]:
+                self.node2group[node] = self.groups[self.pending[:num][-1]]
+            super()._send_tests(node, num)
+
+        def _send_next(self, node):
+            """Send one test: the longest of the node's current group when it is long enough, else the longest."""
+            group = self.node2group.get(node)
+            if group is not None and self.pending and self.groups[self.pending[0]] != group:
+                floor = self.estimates[self.pending[0]] * AFFINITY_RATIO
+                for pos, index in enumerate(self.pending):
+                    if self.estimates[index] < floor:
+                        break
+                    if self.groups[index] == group:
+                        self.pending.insert(0, self.pending.pop(pos))
+                        self.affinity_hits += 1
+                        break
+            self._send_tests(node, 1)
+
+        def remove_node(self, node):
+            crashitem = super().remove_node(node)
+            # tests handed back by a crashed worker go back in LPT position
+            self.pending.sort(key=lambda i: -self.estimates[i] if self.estimates else 0)
+            return crashitem
+else:
+    LPTScheduling = None
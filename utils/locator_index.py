@@ -0,0 +1,355 @@
+# utils/locator_index.py
+"""
+Inverted index over every stored page source, answering "how do I locate this element?".
+
+build() reads each page source once, in a process pool: chunks are hashed and fed to an
+ET.XMLPullParser as they arrive, and elements are cleared as soon as they close. Per distinct
+screen (content hash) it keeps one compact record per node: type, name, label, value, visible
+and its nearest named ancestors. Postings map each
+attribute value to the nodes carrying it; both go to LOCATOR_INDEX_PATH (default
+.locator_index.json). Re-building only re-parses files whose size or mtime changed.
+
+suggest() takes a target (text matching name/label/value, or exact attributes), generates
+the candidate locators of each matching node and counts what every candidate would match on
+every indexed screen, straight from the postings. Candidates are ranked by
+
+    1. unique on the target's own screen,
+    2. not positional (an XPath [k] breaks when the list changes),
+    3. share of the screens it matches where it matches exactly one element,
+    4. lookup speed: accessibility id < predicate < class chain < XPath.
+
+Sources: artifacts/ (dumps, failure captures, blobs/) and crawl-corpus/screens/ (utils/screen_crawler.py).
+
+    python -m utils.locator_index build [roots...] [--workers 4]
+    python -m utils.locator_index suggest LOGIN [--type XCUIElementTypeOther] [--top 5]
+    python -m utils.locator_index stats
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+INDEX_PATH = os.environ.get("LOCATOR_INDEX_PATH", os.path.join(os.getcwd(), ".locator_index.json"))
+DEFAULT_ROOTS = ("artifacts", "crawl-corpus")
+# below this many files the process pool costs more than it saves
+_POOL_MIN_FILES = 8
+# bytes read (hashed and fed to the parser) at a time
+_CHUNK = 64 * 1024
+# named ancestors kept per node (class-chain candidates)
+_ANCESTORS = 3
+_VERSION = 1
+
+# node record layout
+TYPE, NAME, LABEL, VALUE, VISIBLE, ANCESTORS = range(6)
+_ATTRS = {"type": TYPE, "name": NAME, "label": LABEL, "value": VALUE}
+
+# lookup-speed tiers
+TIER_ACCESSIBILITY_ID, TIER_PREDICATE, TIER_CLASS_CHAIN, TIER_XPATH = range(4)
+_BY = {TIER_ACCESSIBILITY_ID: "accessibility id", TIER_PREDICATE: "-ios predicate string",
+       TIER_CLASS_CHAIN: "-ios class chain", TIER_XPATH: "xpath"}
+
+Suggestion = namedtuple("Suggestion", "by value tier hits_here screens unique_screens matches fragile")
+
+
+# ---------- parsing (runs in worker processes) ----------
+def parse_source(path):
+    """(path, content hash, [node records]) of one page source, or (path, None, error); one streaming read."""
+    try:
+        digest = hashlib.sha1()
+        parser = ET.XMLPullParser(events=("start", "end"))
+        nodes = []
+        stack = []      # [(type, name)] of the open elements
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(_CHUNK)
+                if chunk:
+                    digest.update(chunk)
+                    parser.feed(chunk)
+                else:
+                    parser.close()
+                for event, el in parser.read_events():
+                    if event == "end":
+                        stack.pop()
+                        el.clear()
+                        continue
+                    a = el.attrib
+                    kind = a.get("type", el.tag)
+                    name = a.get("name") or ""
+                    if stack:   # the AppiumAUT root itself is not a node
+                        named = [f"{t}|{n}" for t, n in reversed(stack) if n][:_ANCESTORS]
+                        nodes.append([kind, name, a.get("label") or "", a.get("value") or "",
+                                      1 if a.get("visible") == "true" else 0, named])
+                    stack.append((kind, name))
+                if not chunk:
+                    break
+        return path, digest.hexdigest()[:16], nodes
+    except (OSError, ET.ParseError) as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+
+def _source_files(roots):
+    for root in roots:
+        if os.path.isfile(root):
+            yield root
+            continue
+        for dirpath, _, names in os.walk(root):
+            for name in sorted(names):
+                if name.endswith(".xml"):
+                    yield os.path.join(dirpath, name)
+
+
+# ---------- the index ----------
+class LocatorIndex:
+    def __init__(self, files=None, screens=None):
+        self.files = files or {}        # path -> {mtime, size, screen}
+        self.screens = screens or {}    # screen hash -> {paths, nodes}
+        self.postings = {}              # attr -> value -> [(screen, node index)]
+        self._index()
+
+    def _index(self):
+        self.postings = {attr: {} for attr in _ATTRS}
+        for sid in sorted(self.screens):
+            for i, node in enumerate(self.screens[sid]["nodes"]):
+                for attr, col in _ATTRS.items():
+                    if node[col]:
+                        self.postings[attr].setdefault(node[col], []).append((sid, i))
+
+    # ---------- persistence ----------
+    @classmethod
+    def load(cls, path=None):
+        try:
+            with open(path or INDEX_PATH, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if data.get("version") != _VERSION:
+            return cls()
+        return cls(data.get("files"), data.get("screens"))
+
+    def save(self, path=None):
+        path = path or INDEX_PATH
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": _VERSION, "files": self.files, "screens": self.screens}, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def update(self, roots=DEFAULT_ROOTS, workers=None):
+        """Re-parse new/changed files under roots (in parallel), drop vanished ones; returns files parsed."""
+        current = {}
+        for path in _source_files(roots):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            current[path] = (st.st_mtime, st.st_size)
+        stale = [p for p, (mtime, size) in current.items()
+                 if p not in self.files or (self.files[p]["mtime"], self.files[p]["size"]) != (mtime, size)]
+        workers = workers or min(8, os.cpu_count() or 1)
+        if len(stale) >= _POOL_MIN_FILES and workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parsed = list(pool.map(parse_source, stale, chunksize=4))
+        else:
+            parsed = [parse_source(p) for p in stale]
+
+        files = {p: meta for p, meta in self.files.items() if p in current and p not in stale}
+        for path, digest, nodes in parsed:
+            if digest is None:
+                print(f"[locator_index] skipped {path}: {nodes}")
+                continue
+            mtime, size = current[path]
+            files[path] = {"mtime": mtime, "size": size, "screen": digest}
+            self.screens.setdefault(digest, {"paths": [], "nodes": nodes})
+        # keep only screens some file still holds, with their current paths
+        paths = {}
+        for path, meta in sorted(files.items()):
+            paths.setdefault(meta["screen"], []).append(path)
+        self.screens = {sid: {"paths": paths[sid], "nodes": s["nodes"]} for sid, s in self.screens.items() if sid in paths}
+        self.files = files
+        self._index()
+        return len(stale)
+
+    # ---------- matching ----------
+    def node(self, ref):
+        sid, i = ref
+        return self.screens[sid]["nodes"][i]
+
+    def match(self, visible=False, ancestor=None, **attrs):
+        """[(screen, node)] whose attributes equal attrs (type/name/label/value), optionally visible / under ancestor."""
+        lists = [self.postings[a].get(v, ()) for a, v in attrs.items() if v]
+        if not lists:
+            return []
+        refs = min(lists, key=len)
+        out = []
+        for ref in refs:
+            node = self.node(ref)
+            if any(node[_ATTRS[a]] != v for a, v in attrs.items() if v):
+                continue
+            if visible and not node[VISIBLE]:
+                continue
+            if ancestor and ancestor not in node[ANCESTORS]:
+                continue
+            out.append(ref)
+        return out
+
+    def targets(self, text=None, screen=None, **attrs):
+        """Nodes to locate: text equal to name, label or value (plus exact attrs); visible ones when any."""
+        if text:
+            refs = {r for a in ("name", "label", "value") for r in self.postings[a].get(text, ())}
+            if attrs:
+                keep = set(self.match(**attrs))
+                refs &= keep
+        else:
+            refs = set(self.match(**attrs))
+        if screen:
+            refs = {r for r in refs if r[0].startswith(screen)}
+        visible = {r for r in refs if self.node(r)[VISIBLE]}
+        return sorted(visible or refs)
+
+    # ---------- suggestions ----------
+    def suggest(self, text=None, top=5, screen=None, **attrs):
+        """Ranked Suggestions for the element(s) matching text / attrs (best first)."""
+        best = {}
+        for target in self.targets(text, screen=screen, **attrs):
+            for s in self._candidates(target):
+                key = (s.by, s.value)
+                if key not in best or _rank(s) < _rank(best[key]):
+                    best[key] = s
+        return sorted(best.values(), key=_rank)[:top]
+
+    def _candidates(self, ref):
+        sid = ref[0]
+        kind, name, label, value, _, ancestors = self.node(ref)
+        out = []
+
+        def add(tier, locator, refs, fragile=False):
+            per_screen = {}
+            for r in refs:
+                per_screen[r[0]] = per_screen.get(r[0], 0) + 1
+            out.append(Suggestion(_BY[tier], locator, tier, per_screen.get(sid, 0), len(per_screen),
+                                  sum(1 for n in per_screen.values() if n == 1), len(refs), fragile))
+
+        def predicate(visible=False, **eq):
+            text_ = " AND ".join(f"{a} == {_quote(v)}" for a, v in eq.items())
+            return text_ + (" AND visible == 1" if visible else "")
+
+        if name:
+            add(TIER_ACCESSIBILITY_ID, name, self.match(name=name))
+        combos = []
+        if name:
+            combos.append({"type": kind, "name": name})
+        if label and label != name:
+            combos.append({"label": label})
+        if label:
+            combos.append({"type": kind, "label": label})
+        if value and value not in (name, label):
+            combos.append({"type": kind, "value": value})
+        for eq in combos:
+            refs = self.match(**eq)
+            add(TIER_PREDICATE, predicate(**eq), refs)
+            visible_refs = self.match(visible=True, **eq)
+            if len(visible_refs) < len(refs):
+                # the React Native tree keeps hidden screens around
+                add(TIER_PREDICATE, predicate(visible=True, **eq), visible_refs)
+        if ancestors and (label or name):
+            atype, aname = ancestors[0].split("|", 1)
+            attr, val = ("label", label) if label else ("name", name)
+            chain = f"**/{atype}[`name == {_quote(aname)}`]/**/{kind}[`{attr} == {_quote(val)}`]"
+            add(TIER_CLASS_CHAIN, chain, self.match(ancestor=ancestors[0], type=kind, **{attr: val}))
+        for attr, val in (("name", name), ("label", label)):
+            if val and _xpath_literal(val):
+                base = f"//{kind}[@{attr}={_xpath_literal(val)}]"
+                refs = self.match(type=kind, **{attr: val})
+                add(TIER_XPATH, base, refs)
+                here = [r for r in refs if r[0] == sid]
+                if len(here) > 1:
+                    k = here.index(ref) + 1
+                    # k-th match in document order, on every screen that has k of them
+                    counts = {}
+                    for r in refs:
+                        counts[r[0]] = counts.get(r[0], 0) + 1
+                    add(TIER_XPATH, f"({base})[{k}]", [(s, 0) for s, n in counts.items() if n >= k], fragile=True)
+        return out
+
+    def stats(self):
+        nodes = sum(len(s["nodes"]) for s in self.screens.values())
+        return {"files": len(self.files), "screens": len(self.screens), "nodes": nodes,
+                "names": len(self.postings["name"]), "labels": len(self.postings["label"])}
+
+
+def _rank(s):
+    unique_share = s.unique_screens / s.screens if s.screens else 0.0
+    return (s.hits_here != 1, s.fragile, -unique_share, s.tier, len(s.value))
+
+
+def _quote(value):
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def _xpath_literal(value):
+    """Quoted XPath 1.0 string literal, or None when the value has both quote kinds."""
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    return None
+
+
+def build(roots=DEFAULT_ROOTS, path=None, workers=None):
+    """Load the persistent index, bring it up to date with roots and save it; returns (index, files parsed)."""
+    index = LocatorIndex.load(path)
+    parsed = index.update(roots, workers)
+    if parsed or not os.path.exists(path or INDEX_PATH):
+        index.save(path)
+    return index, parsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Locator suggestions from an index of the stored page sources")
+    parser.add_argument("--index", default=INDEX_PATH)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build")
+    b.add_argument("roots", nargs="*", default=list(DEFAULT_ROOTS))
+    b.add_argument("--workers", type=int, default=None)
+    s = sub.add_parser("suggest")
+    s.add_argument("text", nargs="?", help="name, label or value of the element")
+    for attr in ("type", "name", "label", "value"):
+        s.add_argument(f"--{attr}")
+    s.add_argument("--screen", help="screen hash prefix the target is on")
+    s.add_argument("--top", type=int, default=5)
+    sub.add_parser("stats")
+    args = parser.parse_args(argv)
+
+    started = time.time()
+    if args.cmd == "build":
+        index, parsed = build(args.roots, args.index, args.workers)
+        st = index.stats()
+        print(f"[locator_index] {parsed} file(s) parsed; {st['files']} files, {st['screens']} distinct screens, "
+              f"{st['nodes']} nodes -> {args.index} ({(time.time() - started) * 1000:.0f} ms)")
+        return
+    index = LocatorIndex.load(args.index)
+    if not index.screens:
+        print(f"[locator_index] {args.index} is empty; run `build` first")
+        return
+    if args.cmd == "stats":
+        print(json.dumps(index.stats(), indent=2))
+        return
+    loaded = time.time()
+    attrs = {a: getattr(args, a) for a in ("type", "name", "label", "value") if getattr(args, a)}
+    suggestions = index.suggest(args.text, top=args.top, screen=args.screen, **attrs)
+    took = (time.time() - loaded) * 1000
+    if not suggestions:
+        print(f"[locator_index] no element matches {args.text or attrs}")
+        return
+    for s in suggestions:
+        flag = " (positional)" if s.fragile else ""
+        print(f"{s.by:22} {s.value}\n{'':22} {s.hits_here} here, unique on {s.unique_screens}/{s.screens} "
+              f"screen(s), {s.matches} match(es) overall{flag}")
+    print(f"[locator_index] query {took:.1f} ms (index load {(loaded - started) * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
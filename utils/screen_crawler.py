@@ -0,0 +1,292 @@
+# utils/screen_crawler.py
+"""
+Breadth-first crawl of the app into a deduplicated page-source corpus.
+
+Starting from the launch screen, the crawler taps every actionable element of each new screen
+(visible, enabled, named buttons / cells / accessible containers found in the snapshot; an
+empty login form is filled with the standard user instead), waits for the UI to settle
+(pages/ui_settle.py) and fingerprints the screen it lands on. The fingerprint is structural:
+the element types and names of the visible nodes, with digits masked and repeated list cells
+collapsed, so the same screen with a different cart badge or list length is only kept once.
+
+Each screen remembers the shortest tap path from launch; to explore a screen the crawler
+restarts the app (terminate/activate, utils/driver_pool.reset_app) and replays that path,
+unless the session is already on it. With several sessions the frontier is shared and each
+session prefers work on the screen it is showing.
+
+The corpus (CRAWL_CORPUS_DIR, default crawl-corpus/):
+
+    screens/<fingerprint>.xml   one page source per unique screen
+    corpus.json                 {"root", "screens": {fp: {name, depth, path, source, actions}},
+                                 "edges": [[from_fp, action, to_fp], ...], "stats"}
+
+    python -m utils.screen_crawler [--sessions 2] [--max-screens 60] [--max-depth 5] [--skip test-LOGOUT]
+
+ATTACH_SESSION (utils/session_factory.py) lets the first session be a running one.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import deque, namedtuple
+
+from pages.input_batch import InputBatch
+from pages.ui_settle import wait_for_settle
+
+CORPUS_DIR = os.environ.get("CRAWL_CORPUS_DIR", os.path.join(os.getcwd(), "crawl-corpus"))
+MAX_SCREENS = int(os.environ.get("CRAWL_MAX_SCREENS", "60"))
+MAX_DEPTH = int(os.environ.get("CRAWL_MAX_DEPTH", "5"))
+MAX_ACTIONS = int(os.environ.get("CRAWL_MAX_ACTIONS", "25"))
+SETTLE_S = float(os.environ.get("CRAWL_SETTLE_S", "4"))
+
+# element types worth a tap; XCUIElementTypeOther only when marked accessible or carrying the
+# app's testID prefix (React Native touchables show up as plain, often inaccessible, Others)
+TAPPABLE_TYPES = {"XCUIElementTypeButton", "XCUIElementTypeCell", "XCUIElementTypeLink",
+                  "XCUIElementTypeSwitch", "XCUIElementTypeOther"}
+TEST_ID_PREFIX = "test-"
+
+Action = namedtuple("Action", "kind label x y")
+
+_DIGITS = re.compile(r"\d+")
+
+
+def _visible(el):
+    return el.get("visible") == "true"
+
+
+def screen_fingerprint(snap):
+    """Structural hash of the visible part of a snapshot (types + masked names, repeats collapsed)."""
+    digest = hashlib.blake2b(digest_size=8)
+    previous = None
+    for el in snap.nodes:
+        if not _visible(el):
+            continue
+        token = f"{el.get('type', el.tag)}|{_DIGITS.sub('#', el.get('name') or '')}"
+        if token == previous:
+            continue
+        previous = token
+        digest.update(token.encode("utf-8") + b"\n")
+    return digest.hexdigest()
+
+
+def actions_for(snap, max_actions=MAX_ACTIONS, skip=()):
+    """Actions to try on a screen: fill an empty login form, then tap each named tappable element once."""
+    actions = []
+    fields = [el for el in snap.nodes if _visible(el) and el.get("name") in ("test-Username", "test-Password")]
+    if len(fields) == 2 and all((f.get("value") or "") in ("", f.get("placeholderValue") or "") for f in fields):
+        actions.append(Action("login", "login standard_user", 0, 0))
+    seen = set()
+    for el in snap.nodes:
+        name = el.get("name")
+        kind = el.get("type", el.tag)
+        if not name or name in seen or name in skip or kind not in TAPPABLE_TYPES:
+            continue
+        if not _visible(el) or el.get("enabled") == "false":
+            continue
+        if kind == "XCUIElementTypeOther" and el.get("accessible") != "true" and not name.startswith(TEST_ID_PREFIX):
+            continue
+        width, height = float(el.get("width") or 0), float(el.get("height") or 0)
+        if width <= 0 or height <= 0:
+            continue
+        seen.add(name)
+        x = int(float(el.get("x") or 0) + width / 2)
+        y = int(float(el.get("y") or 0) + height / 2)
+        actions.append(Action("tap", f"tap {name}", x, y))
+    return actions[:max_actions]
+
+
+def perform(driver, action):
+    if action.kind == "login":
+        from pages.login_page import LoginPage
+        return LoginPage(driver).login("standard_user", "secret_sauce")
+    if InputBatch(driver).tap((action.x, action.y)).perform():
+        return True
+    driver.execute_script("mobile: tap", {"x": action.x, "y": action.y})
+    return True
+
+
+def _restart(driver):
+    from utils.driver_pool import reset_app
+    # the result only says whether the Swag Labs login screen came back; the fingerprint decides
+    reset_app(driver)
+
+
+class Crawler:
+    def __init__(self, out_dir=None, restart=_restart, max_screens=MAX_SCREENS, max_depth=MAX_DEPTH,
+                 max_actions=MAX_ACTIONS, skip=(), settle_s=SETTLE_S):
+        self.out_dir = out_dir or CORPUS_DIR
+        self.restart = restart
+        self.max_screens = max_screens
+        self.max_depth = max_depth
+        self.max_actions = max_actions
+        self.skip = set(skip)
+        self.settle_s = settle_s
+        self.root = None
+        self.screens = {}        # fp -> {name, depth, path, source, actions}
+        self.paths = {}          # fp -> [Action] from launch
+        self.edges = []          # [from_fp, action label, to_fp]
+        self.stats = {"taps": 0, "replays": 0, "unreachable": 0, "failed_actions": 0}
+        self._tasks = deque()    # (fp, Action)
+        self._busy = 0
+        self._cv = threading.Condition()
+
+    # ---------- crawling ----------
+    def crawl(self, drivers):
+        """Explore with every driver in parallel (one thread each); returns the corpus dict."""
+        os.makedirs(os.path.join(self.out_dir, "screens"), exist_ok=True)
+        started = time.time()
+        self.restart(drivers[0])
+        self.root = self._register(self._settle(drivers[0]), None, None)
+        threads = [threading.Thread(target=self._worker, args=(d, self.root if i == 0 else None),
+                                    name=f"crawler-{i}", daemon=True) for i, d in enumerate(drivers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.stats["seconds"] = round(time.time() - started, 1)
+        return self.save()
+
+    def _worker(self, driver, current):
+        while True:
+            task = self._next_task(current)
+            if task is None:
+                return
+            fp, action = task
+            try:
+                if current != fp:
+                    current = self._replay(driver, fp)
+                    if current != fp:
+                        self._count("unreachable")
+                        print(f"[screen_crawler] could not get back to {fp}; skipping {action.label}")
+                        continue
+                try:
+                    perform(driver, action)
+                except Exception as e:
+                    self._count("failed_actions")
+                    print(f"[screen_crawler] {action.label} on {fp} failed: {type(e).__name__}: {e}")
+                    current = None
+                    continue
+                self._count("taps")
+                dst = self._register(self._settle(driver), fp, action)
+                with self._cv:
+                    self.edges.append([fp, action.label, dst])
+                current = dst
+            finally:
+                with self._cv:
+                    self._busy -= 1
+                    self._cv.notify_all()
+
+    def _next_task(self, current):
+        """Next (fp, action), preferring the screen this session shows; None once all work is done."""
+        with self._cv:
+            while not self._tasks:
+                if self._busy == 0:
+                    self._cv.notify_all()
+                    return None
+                self._cv.wait()
+            task = next((t for t in self._tasks if t[0] == current), None) or self._tasks[0]
+            self._tasks.remove(task)
+            self._busy += 1
+            return task
+
+    def _count(self, key):
+        with self._cv:
+            self.stats[key] += 1
+
+    def _settle(self, driver):
+        return wait_for_settle(driver, timeout=self.settle_s, label="screen_crawler.settle").snapshot
+
+    def _replay(self, driver, fp):
+        self._count("replays")
+        try:
+            self.restart(driver)
+            for action in self.paths[fp]:
+                perform(driver, action)
+                wait_for_settle(driver, timeout=self.settle_s, label="screen_crawler.replay")
+            return screen_fingerprint(self._settle(driver))
+        except Exception as e:
+            print(f"[screen_crawler] replaying the path to {fp} failed: {type(e).__name__}: {e}")
+            return None
+
+    def _register(self, snap, parent, action):
+        """Fingerprint of snap; a new screen is saved and its actions queued (within the limits)."""
+        fp = screen_fingerprint(snap)
+        with self._cv:
+            if fp in self.screens or len(self.screens) >= self.max_screens:
+                return fp
+            path = (self.paths[parent] + [action]) if parent is not None else []
+            actions = actions_for(snap, self.max_actions, self.skip) if len(path) < self.max_depth else []
+            self.paths[fp] = path
+            self.screens[fp] = {
+                "name": _screen_name(snap),
+                "depth": len(path),
+                "path": [a.label for a in path],
+                "source": f"screens/{fp}.xml",
+                "actions": len(actions),
+            }
+            self._tasks.extend((fp, a) for a in actions)
+            self._cv.notify_all()
+        with open(os.path.join(self.out_dir, "screens", f"{fp}.xml"), "w", encoding="utf-8") as f:
+            f.write(snap.source)
+        return fp
+
+    # ---------- corpus ----------
+    def save(self):
+        corpus = {"root": self.root, "screens": self.screens, "edges": self.edges, "stats": self.stats}
+        path = os.path.join(self.out_dir, "corpus.json")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(corpus, f, indent=1)
+        os.replace(tmp, path)
+        return corpus
+
+
+def _screen_name(snap):
+    """Known screen name from pages/screen_graph.py, if the screen is one of them."""
+    try:
+        from pages.screen_graph import GRAPH
+        return GRAPH.detect(None, snap)
+    except Exception:
+        return None
+
+
+def load_corpus(out_dir=None):
+    with open(os.path.join(out_dir or CORPUS_DIR, "corpus.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Breadth-first crawl of the app into a page-source corpus")
+    parser.add_argument("--out", default=CORPUS_DIR)
+    parser.add_argument("--sessions", type=int, default=1, help="sessions crawling in parallel")
+    parser.add_argument("--max-screens", type=int, default=MAX_SCREENS)
+    parser.add_argument("--max-depth", type=int, default=MAX_DEPTH)
+    parser.add_argument("--max-actions", type=int, default=MAX_ACTIONS, help="taps tried per screen")
+    parser.add_argument("--skip", action="append", default=[], help="element name never to tap (repeatable)")
+    args = parser.parse_args(argv)
+
+    from utils import session_factory
+    drivers = []
+    try:
+        drivers.append(session_factory.open_session("screen-crawler-1", "screen-crawler"))
+        for i in range(2, args.sessions + 1):
+            drivers.append(session_factory.create_session(f"screen-crawler-{i}", "screen-crawler"))
+        crawler = Crawler(args.out, max_screens=args.max_screens, max_depth=args.max_depth,
+                          max_actions=args.max_actions, skip=args.skip)
+        corpus = crawler.crawl(drivers)
+    finally:
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+    stats = corpus["stats"]
+    print(f"[screen_crawler] {len(corpus['screens'])} unique screen(s), {len(corpus['edges'])} edge(s), "
+          f"{stats['taps']} taps, {stats['replays']} replays in {stats['seconds']}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
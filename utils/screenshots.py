@@ -0,0 +1,125 @@
+# utils/screenshots.py
+"""
+Screenshot pipeline: downscale, re-encode and perceptual hash.
+
+Device screenshots arrive as full-resolution PNGs (1-2 MB for a 1170x2532 iPhone frame).
+process() scales them to SCREENSHOT_MAX_WIDTH and re-encodes them as SCREENSHOT_FORMAT:
+
+    webp       lossy WebP at SCREENSHOT_QUALITY (default)
+    jpeg       lossy JPEG at SCREENSHOT_QUALITY
+    webp-lossless / png
+               lossless re-encoding of the downscaled frame
+    original   keep the device PNG untouched
+
+and computes a 64-bit DCT perceptual hash (pHash), so near-identical frames (a clock in
+the status bar, a blinking caret) can be stored once: see is_near_duplicate().
+
+Pillow and NumPy are optional: without them process() returns the original PNG and no hash.
+"""
+import io
+import os
+from collections import namedtuple
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:  # pipeline degrades to "store the original PNG"
+    np = None
+    Image = None
+
+MAX_WIDTH = int(os.environ.get("SCREENSHOT_MAX_WIDTH", "540"))
+FORMAT = os.environ.get("SCREENSHOT_FORMAT", "webp").lower()
+QUALITY = int(os.environ.get("SCREENSHOT_QUALITY", "75"))
+# max Hamming distance (of 64 bits) for two frames to count as the same picture
+PHASH_THRESHOLD = int(os.environ.get("SCREENSHOT_PHASH_THRESHOLD", "4"))
+
+Screenshot = namedtuple("Screenshot", "data ext width height phash")
+
+_EXT = {"webp": "webp", "webp-lossless": "webp", "jpeg": "jpg", "jpg": "jpg", "png": "png", "original": "png"}
+_HASH_SIZE, _DCT_SIZE = 8, 32
+
+
+def available():
+    return Image is not None and np is not None
+
+
+def process(png_bytes, max_width=None, fmt=None, quality=None):
+    """Return Screenshot(data, ext, width, height, phash) for one device PNG."""
+    fmt = (fmt or FORMAT).lower()
+    if not available():
+        return Screenshot(png_bytes, "png", None, None, None)
+    max_width = MAX_WIDTH if max_width is None else max_width
+    quality = QUALITY if quality is None else quality
+
+    try:
+        img = Image.open(io.BytesIO(png_bytes))
+        img.load()
+    except Exception:
+        # not a decodable image: store it as it came
+        return Screenshot(png_bytes, "png", None, None, None)
+    phash = perceptual_hash(img)
+    if fmt == "original":
+        return Screenshot(png_bytes, "png", img.width, img.height, phash)
+
+    img = img.convert("RGB")
+    if max_width and img.width > max_width:
+        img = img.resize((max_width, round(img.height * max_width / img.width)), Image.LANCZOS)
+    out = io.BytesIO()
+    if fmt == "webp":
+        img.save(out, "WEBP", quality=quality, method=4)
+    elif fmt == "webp-lossless":
+        img.save(out, "WEBP", lossless=True, quality=100, method=4)
+    elif fmt in ("jpeg", "jpg"):
+        img.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+    else:
+        img.save(out, "PNG", optimize=True)
+    return Screenshot(out.getvalue(), _EXT.get(fmt, "png"), img.width, img.height, phash)
+
+
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    m = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    m[0, :] = np.sqrt(1.0 / n)
+    return m
+
+
+_DCT = None
+
+
+def perceptual_hash(img):
+    """64-bit pHash: 2-D DCT of a 32x32 grayscale thumbnail, low 8x8 frequencies vs. their median."""
+    global _DCT
+    if _DCT is None:
+        _DCT = _dct_matrix(_DCT_SIZE)
+    gray = np.asarray(img.convert("L").resize((_DCT_SIZE, _DCT_SIZE), Image.LANCZOS), dtype=np.float64)
+    coeffs = (_DCT @ gray @ _DCT.T)[:_HASH_SIZE, :_HASH_SIZE].ravel()
+    bits = coeffs[1:] > np.median(coeffs[1:])  # DC term left out: it only encodes brightness
+    return int(np.packbits(np.concatenate(([False], bits))).view(">u8")[0])
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def is_near_duplicate(a, b, threshold=None):
+    if a is None or b is None:
+        return False
+    return hamming(a, b) <= (PHASH_THRESHOLD if threshold is None else threshold)
+
+
+def save_screenshot(driver, path):
+    """
+    Take a screenshot, run it through the pipeline and write it next to `path` with the
+    pipeline's extension (e.g. artifacts/screenshot_cart.png -> artifacts/screenshot_cart.webp).
+    Returns the written path.
+    """
+    shot = process(driver.get_screenshot_as_png())
+    root, _ = os.path.splitext(path)
+    final = f"{root}.{shot.ext}"
+    parent = os.path.dirname(final)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    with open(final, "wb") as f:
+        f.write(shot.data)
+    return final
@@ -0,0 +1,361 @@
+# utils/session_factory.py
+"""
+One place that builds capabilities and opens Appium sessions on the hub.
+
+create_session(session_name) builds the BrowserStack capabilities from the environment, opens
+the session over a tuned keep-alive connection and returns the driver:
+
+- the HTTP pool keeps HUB_POOL_SIZE connections per host (default 4) alive, so parallel
+  captures (page source + screenshot) and the commands after them reuse sockets instead of
+  paying a new TLS handshake each time urllib3's default single-connection pool overflows;
+- connect and read timeouts are separate (HUB_CONNECT_TIMEOUT 10 s, HUB_READ_TIMEOUT 120 s):
+  a hub that doesn't answer the SYN fails in seconds instead of hanging a worker;
+- only failed connects are retried at the HTTP level (the request never left, so nothing
+  runs twice); session creation is retried SESSION_CREATE_RETRIES times with exponential
+  backoff from SESSION_CREATE_BACKOFF seconds when the hub was never reached or answered
+  that it couldn't start one (queue full, 5xx). A read timeout is not retried: the hub got
+  the request and may still be booting that session;
+- every request of the session is counted: http_stats(driver) gives requests, new
+  connections (handshakes), errors, timeouts and time on the wire, summary() the totals.
+
+attach_session(session_id) returns a driver on a session that is already running (e.g. one
+held by `python -m utils.session_keeper`) without creating one; its quit() only detaches.
+open_session() is what the dump/check scripts call: it attaches when ATTACH_SESSION is set
+(a session id, or "keeper" for the session keeper's file) and creates a session otherwise.
+
+Capabilities come from BROWSERSTACK_USERNAME / BROWSERSTACK_ACCESS_KEY / BROWSERSTACK_APP
+(APP_ID also accepted), DEVICE (or DUMP_DEVICE), OS_VERSION, DUMP_PLATFORM and
+BROWSERSTACK_BUILD_NAME; APPIUM_HUB_URL points everything at another hub (e.g. utils/appium_proxy.py).
+"""
+import json
+import os
+import random
+import socket
+import threading
+import time
+
+import urllib3
+from appium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+try:
+    from appium.webdriver.appium_connection import AppiumConnection
+    from appium.webdriver.client_config import AppiumClientConfig
+except Exception:
+    # older clients: plain webdriver.Remote(hub) without a tuned pool
+    AppiumConnection = AppiumClientConfig = None
+
+# Try importing AppiumOptions from likely locations (compatible with multiple client versions)
+try:
+    # appium-python-client >= 3.x
+    from appium.options.common.base import AppiumOptions
+except Exception:
+    try:
+        # older packaging path
+        from appium.options.appium_options import AppiumOptions
+    except Exception:
+        # minimal fallback options-like object
+        class AppiumOptions(dict):
+            def set_capability(self, k, v):
+                self[k] = v
+            def to_capabilities(self):
+                return dict(self)
+            def load_capabilities(self, caps):
+                for k, v in caps.items():
+                    self.set_capability(k, v)
+
+HUB_URL = os.environ.get("APPIUM_HUB_URL", "https://hub-cloud.browserstack.com/wd/hub")
+CONNECT_TIMEOUT_S = float(os.environ.get("HUB_CONNECT_TIMEOUT", "10"))
+# session creation on a real device takes a while; keep this above its worst case
+READ_TIMEOUT_S = float(os.environ.get("HUB_READ_TIMEOUT", "120"))
+POOL_SIZE = int(os.environ.get("HUB_POOL_SIZE", "4"))
+CREATE_RETRIES = int(os.environ.get("SESSION_CREATE_RETRIES", "2"))
+CREATE_BACKOFF_S = float(os.environ.get("SESSION_CREATE_BACKOFF", "5"))
+# session id to attach to instead of creating one ("keeper": the one in KEEPER_FILE)
+ATTACH_SESSION = os.environ.get("ATTACH_SESSION", "")
+KEEPER_FILE = os.environ.get("SESSION_KEEPER_FILE", os.path.join(os.getcwd(), ".session_keeper.json"))
+_MAX_BACKOFF_S = 60.0
+
+# substrings of session-creation errors worth another attempt / never worth one
+_TRANSIENT_HINTS = ("parallel", "queue", "timed out", "timeout", "502", "503", "504", "bad gateway",
+                    "service unavailable", "connection", "could not start", "try again")
+_FATAL_HINTS = ("authoriz", "unauthori", "invalid", "not found", "access key", "app_url")
+
+
+def credentials(user=None, key=None, app=None):
+    """(user, key, app) from the arguments, else the environment; RuntimeError when one is missing."""
+    user = user or os.environ.get("BROWSERSTACK_USERNAME") or os.environ.get("BROWSERSTACK_USER")
+    key = key or os.environ.get("BROWSERSTACK_ACCESS_KEY") or os.environ.get("BROWSERSTACK_KEY")
+    app = app or os.environ.get("BROWSERSTACK_APP") or os.environ.get("APP_ID")
+    if not (user and key and app):
+        raise RuntimeError("Set BROWSERSTACK_USERNAME, BROWSERSTACK_ACCESS_KEY and BROWSERSTACK_APP (or APP_ID)")
+    return user, key, app
+
+
+def build_options(session_name, build_name=None, user=None, key=None, app=None, extra_caps=None):
+    """AppiumOptions for one BrowserStack session; extra_caps (dict) are set last and win."""
+    user, key, app = credentials(user, key, app)
+    opts = AppiumOptions()
+    platform = os.environ.get("DUMP_PLATFORM", "iOS")
+    opts.set_capability("platformName", platform)
+    opts.set_capability("deviceName", os.environ.get("DEVICE") or os.environ.get("DUMP_DEVICE", "iPhone 14"))
+    opts.set_capability("automationName", "XCUITest" if platform.lower() == "ios" else "UiAutomator2")
+    opts.set_capability("app", app)
+    bstack = {
+        "userName": user,
+        "accessKey": key,
+        "buildName": build_name or os.environ.get("BROWSERSTACK_BUILD_NAME", "mobile-tests"),
+        "sessionName": session_name,  # ensures video/session labelled with the test name
+    }
+    if os.environ.get("OS_VERSION"):
+        bstack["osVersion"] = os.environ["OS_VERSION"]
+    if os.environ.get("APPIUM_VERSION"):
+        bstack["appiumVersion"] = os.environ["APPIUM_VERSION"]
+    if os.environ.get("BROWSERSTACK_PROJECT_NAME"):
+        bstack["projectName"] = os.environ["BROWSERSTACK_PROJECT_NAME"]
+    try:
+        opts.load_capabilities({"bstack:options": bstack})
+    except Exception:
+        opts.set_capability("bstack:options", bstack)
+    for k, v in (extra_caps or {}).items():
+        opts.set_capability(k, v)
+    return opts
+
+
+# ---------- HTTP channel ----------
+class HttpStats:
+    """Request counters of one session's command channel."""
+
+    def __init__(self, name=None):
+        self.name = name
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.wire_ms = 0.0
+        self.create_attempts = 0
+        self.pool = None    # urllib3 PoolManager of the connection (new-connection counts live there)
+        self._lock = threading.Lock()
+
+    def connections(self):
+        """Connections opened so far (each one a TCP + TLS handshake)."""
+        pools = getattr(self.pool, "pools", None)
+        if pools is None:
+            return 0
+        total = 0
+        for key in list(pools.keys()):
+            try:
+                total += pools[key].num_connections
+            except KeyError:
+                pass
+        return total
+
+    def as_dict(self):
+        connections = self.connections()
+        return {
+            "session": self.name,
+            "requests": self.requests,
+            "connections": connections,
+            "reused": max(0, self.requests - connections),
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "wire_ms": round(self.wire_ms, 1),
+            "avg_ms": round(self.wire_ms / self.requests, 1) if self.requests else 0.0,
+            "create_attempts": self.create_attempts,
+        }
+
+
+_stats = []
+
+
+def client_config(hub=None):
+    """Keep-alive client config with a POOL_SIZE pool, connect/read timeouts and connect-only retries."""
+    pool_args = {
+        "maxsize": POOL_SIZE,
+        "block": False,
+        # a failed connect never reached the hub: safe to retry, even for POST
+        "retries": urllib3.Retry(total=5, connect=2, read=0, status=0, other=0, redirect=3, backoff_factor=0.5),
+    }
+    return AppiumClientConfig(
+        hub or HUB_URL,
+        keep_alive=True,
+        timeout=urllib3.Timeout(connect=CONNECT_TIMEOUT_S, read=READ_TIMEOUT_S),
+        # selenium reads the pool arguments from this nested key
+        init_args_for_pool_manager={"init_args_for_pool_manager": pool_args},
+    )
+
+
+def _instrument(connection, stats):
+    """Count every HTTP request the connection sends (wraps its _request)."""
+    stats.pool = getattr(connection, "_conn", None)
+    original = connection._request
+
+    def _request(method, url, body=None):
+        started = time.time()
+        try:
+            return original(method, url, body=body)
+        except Exception as e:
+            with stats._lock:
+                stats.errors += 1
+                if "timeout" in type(e).__name__.lower() or "timed out" in str(e).lower():
+                    stats.timeouts += 1
+            raise
+        finally:
+            with stats._lock:
+                stats.requests += 1
+                stats.wire_ms += (time.time() - started) * 1000.0
+
+    connection._request = _request
+
+
+def new_connection(hub=None, name=None):
+    """(command executor, HttpStats) for one session; the hub URL itself on clients without ClientConfig."""
+    stats = HttpStats(name)
+    _stats.append(stats)
+    if AppiumConnection is None:
+        return hub or HUB_URL, stats
+    connection = AppiumConnection(client_config=client_config(hub))
+    _instrument(connection, stats)
+    return connection, stats
+
+
+def http_stats(driver):
+    """Counters of the driver's command channel (None for drivers not made here)."""
+    stats = getattr(driver, "_http_stats", None)
+    return stats.as_dict() if stats else None
+
+
+# ---------- session creation ----------
+def is_transient(error):
+    """
+    Whether a session-creation failure is worth another attempt: the connection was never made,
+    or the hub answered it couldn't start a session. A read timeout or a connection dropped
+    mid-request is not: the session may be queued or booting, and a retry would hold a second
+    parallel slot until the hub's idle timeout.
+    """
+    if isinstance(error, urllib3.exceptions.MaxRetryError) and error.reason is not None:
+        error = error.reason
+    if isinstance(error, (urllib3.exceptions.ConnectTimeoutError, urllib3.exceptions.NewConnectionError,
+                          ConnectionRefusedError, socket.gaierror)):
+        return True
+    if isinstance(error, WebDriverException):
+        text = str(error).lower()
+        if any(h in text for h in _FATAL_HINTS):
+            return False
+        return any(h in text for h in _TRANSIENT_HINTS)
+    return False
+
+
+def backoff_delays(retries=None, base=None):
+    """Sleeps before each retry: base, 2*base, 4*base... (capped, with up to 20 % jitter)."""
+    retries = CREATE_RETRIES if retries is None else retries
+    base = CREATE_BACKOFF_S if base is None else base
+    return [min(_MAX_BACKOFF_S, base * 2 ** i) * (1 + random.random() * 0.2) for i in range(retries)]
+
+
+def create_session(session_name, build_name=None, hub=None, options=None, retries=None, **caps):
+    """
+    Open a session (options default to build_options(session_name, build_name, **caps)) and
+    return the driver; transient failures are retried with backoff, the last error is raised.
+    """
+    options = options or build_options(session_name, build_name, **caps)
+    executor, stats = new_connection(hub, session_name)
+    delays = backoff_delays(retries)
+    attempt = 0
+    while True:
+        stats.create_attempts += 1
+        try:
+            driver = webdriver.Remote(command_executor=executor, options=options)
+            break
+        except Exception as e:
+            if attempt >= len(delays) or not is_transient(e):
+                raise
+            first_line = str(e).strip().splitlines()[0] if str(e).strip() else ""
+            print(f"[session_factory] session creation failed ({type(e).__name__}: {first_line[:200]}); "
+                  f"retrying in {delays[attempt]:.0f}s ({attempt + 1}/{len(delays)})")
+            time.sleep(delays[attempt])
+            attempt += 1
+    try:
+        driver._http_stats = stats
+    except Exception:
+        pass
+    return driver
+
+
+# ---------- attaching ----------
+class AttachedDriver(webdriver.Remote):
+    """Driver on a session owned by someone else: no new session on start, quit() only detaches."""
+
+    def __init__(self, session_id, command_executor, capabilities=None):
+        self._attach_id = session_id
+        self._attach_caps = dict(capabilities or {})
+        super().__init__(command_executor=command_executor, options=AppiumOptions())
+
+    def start_session(self, capabilities, browser_profile=None):
+        self.session_id = self._attach_id
+        self.caps = self._attach_caps
+
+    def quit(self):
+        # leave the session running for its owner; just drop our connections
+        try:
+            self.command_executor.close()
+        except Exception:
+            pass
+
+
+def read_keeper(path=None):
+    """The session keeper's record ({session_id, hub, capabilities, ...}) or None."""
+    try:
+        with open(path or KEEPER_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def attach_session(session_id, hub=None, capabilities=None):
+    """
+    Driver on the running session `session_id` ("keeper" reads KEEPER_FILE); RuntimeError
+    when there is no such session or it no longer answers.
+    """
+    if session_id == "keeper":
+        kept = read_keeper()
+        if not kept:
+            raise RuntimeError(f"no session keeper record at {KEEPER_FILE}; start `python -m utils.session_keeper` first")
+        session_id, hub = kept["session_id"], hub or kept.get("hub")
+        capabilities = capabilities or kept.get("capabilities")
+    executor, stats = new_connection(hub, f"attached {session_id}")
+    driver = AttachedDriver(session_id, executor, capabilities)
+    try:
+        # cheap read-only command: proves the session is alive before any capture runs
+        driver.timeouts
+    except Exception as e:
+        driver.quit()
+        raise RuntimeError(f"session {session_id} is not alive on {hub or HUB_URL}: {type(e).__name__}: {e}")
+    try:
+        driver._http_stats = stats
+    except Exception:
+        pass
+    return driver
+
+
+def open_session(session_name, build_name=None, **kwargs):
+    """Attach to ATTACH_SESSION when it is set, else create_session(); the driver's quit() does the right thing."""
+    if ATTACH_SESSION:
+        driver = attach_session(ATTACH_SESSION, hub=kwargs.get("hub"))
+        print(f"[session_factory] attached to session {driver.session_id} (quit() detaches, the session keeps running)")
+        return driver
+    return create_session(session_name, build_name, **kwargs)
+
+
+def summary():
+    """One line of HTTP totals over every session opened by this process, or None."""
+    if not _stats:
+        return None
+    rows = [s.as_dict() for s in _stats]
+    requests = sum(r["requests"] for r in rows)
+    connections = sum(r["connections"] for r in rows)
+    retries = sum(max(0, r["create_attempts"] - 1) for r in rows)
+    wire_ms = sum(r["wire_ms"] for r in rows)
+    avg = wire_ms / requests if requests else 0.0
+    return (f"hub HTTP: {len(rows)} session(s), {retries} creation retries, {requests} requests over "
+            f"{connections} connection(s), {sum(r['errors'] for r in rows)} errors "
+            f"({sum(r['timeouts'] for r in rows)} timeouts), avg {avg:.0f} ms")
@@ -0,0 +1,97 @@
+# utils/session_keeper.py
+"""
+Keep one remote session alive for interactive debugging.
+
+    python -m utils.session_keeper [--name debug-session] [--interval 30] [--max-minutes 60]
+
+Boots a session through utils/session_factory.py, writes its id, hub and capabilities to
+SESSION_KEEPER_FILE (default .session_keeper.json) and sends a cheap read-only command
+every --interval seconds so the hub's idle timeout never fires. Meanwhile the dump/check
+scripts attach to it instead of booting their own device:
+
+    ATTACH_SESSION=keeper python tests/dump_page_source.py
+
+Ctrl+C (or --max-minutes, so a forgotten keeper doesn't burn device time) quits the session
+and removes the file.
+"""
+import argparse
+import json
+import os
+import time
+
+from utils import session_factory
+
+
+def write_record(driver, hub, name, path):
+    record = {
+        "session_id": driver.session_id,
+        "hub": hub,
+        "name": name,
+        "capabilities": getattr(driver, "capabilities", None) or {},
+        "pid": os.getpid(),
+        "started": round(time.time(), 3),
+    }
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2, default=str)
+    os.replace(tmp, path)
+    return record
+
+
+def keep_alive(driver, interval, max_minutes, sleep=time.sleep):
+    """Ping until max_minutes run out (True) or the session stops answering (False)."""
+    deadline = time.time() + max_minutes * 60 if max_minutes else None
+    while deadline is None or time.time() < deadline:
+        sleep(interval)
+        try:
+            driver.timeouts
+        except Exception as e:
+            print(f"[session_keeper] session {driver.session_id} stopped answering: {type(e).__name__}: {e}")
+            return False
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep a remote session alive for the dump/check scripts to attach to")
+    parser.add_argument("--name", default="session-keeper")
+    parser.add_argument("--build", default="debug-sessions")
+    parser.add_argument("--hub", default=session_factory.HUB_URL)
+    parser.add_argument("--interval", type=float, default=30.0, help="seconds between keep-alive commands")
+    parser.add_argument("--max-minutes", type=float, default=60.0, help="quit after this long (0 = never)")
+    parser.add_argument("--file", default=session_factory.KEEPER_FILE)
+    args = parser.parse_args(argv)
+
+    existing = session_factory.read_keeper(args.file)
+    if existing:
+        print(f"[session_keeper] {args.file} already names session {existing.get('session_id')} "
+              f"(pid {existing.get('pid')}); stop that keeper or delete the file first")
+        return 1
+
+    print("[session_keeper] starting session...")
+    driver = session_factory.create_session(args.name, args.build, hub=args.hub)
+    alive = True
+    try:
+        write_record(driver, args.hub, args.name, args.file)
+        print(f"[session_keeper] session {driver.session_id} is up; attach with ATTACH_SESSION=keeper "
+              f"(or ATTACH_SESSION={driver.session_id}). Ctrl+C to quit.")
+        alive = keep_alive(driver, args.interval, args.max_minutes)
+        if alive:
+            print(f"[session_keeper] --max-minutes {args.max_minutes:g} reached")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        try:
+            os.remove(args.file)
+        except OSError:
+            pass
+        if alive:
+            print(f"[session_keeper] quitting session {driver.session_id}")
+            try:
+                driver.quit()
+            except Exception:
+                pass
+    return 0 if alive else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,219 @@
+# utils/session_status.py
+"""
+BrowserStack session status, recorded locally during the run and reported in bulk afterwards.
+
+record(session_id, nodeid, status, reason) appends one JSON line to SESSION_STATUS_PATH
+(default .session_status.jsonl) instead of running setSessionStatus on the device: no round
+trip in the test's critical path, and the line is on disk even if the session (or the xdist
+worker) dies a moment later.
+
+flush() runs once at the end (the controller's pytest_sessionfinish, or by hand with
+`python -m utils.session_status flush`). A pooled session runs several tests, so the
+records are folded per session: failed if any of its tests failed (the reason names them),
+passed otherwise. Statuses are then sent through the reporter picked by
+SESSION_STATUS_REPORTER:
+
+    browserstack   PUT /app-automate/sessions/<id>.json on the REST API (default)
+    local          writes {session_id: {status, reason}} to SESSION_STATUS_REPORT (tests, dry runs)
+    off            keeps the records, reports nothing
+    pkg.mod:attr   any object with report(session_id, status, reason) -> bool
+
+Sessions that could not be reported stay in the record file for the next flush.
+
+    python -m utils.session_status show
+    python -m utils.session_status flush [--reporter local]
+"""
+import argparse
+import importlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import urllib3
+
+RECORD_PATH = os.environ.get("SESSION_STATUS_PATH", os.path.join(os.getcwd(), ".session_status.jsonl"))
+REPORT_PATH = os.environ.get("SESSION_STATUS_REPORT", os.path.join(os.getcwd(), "session_status_report.json"))
+API_URL = os.environ.get("BROWSERSTACK_API_URL", "https://api-cloud.browserstack.com/app-automate")
+# BrowserStack truncates reasons beyond this
+_MAX_REASON = 255
+
+_lock = threading.Lock()
+
+
+# ---------- recording ----------
+def record(session_id, nodeid, status, reason="", path=None):
+    """Append one test outcome of a session (status "passed" / "failed")."""
+    if not session_id:
+        return
+    line = json.dumps({"session": session_id, "test": nodeid, "status": status,
+                       "reason": (reason or "")[:_MAX_REASON], "at": round(time.time(), 3)})
+    with _lock:
+        # one short O_APPEND write per line: safe with several xdist workers on the same file
+        with open(path or RECORD_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def load_records(path=None):
+    records = []
+    try:
+        with open(path or RECORD_PATH, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # a worker killed mid-write leaves a torn last line
+                    continue
+    except OSError:
+        pass
+    return records
+
+
+def fold(records):
+    """{session_id: (status, reason)}: failed if any of the session's tests failed."""
+    by_session = {}
+    for rec in records:
+        by_session.setdefault(rec["session"], []).append(rec)
+    statuses = {}
+    for sid, recs in by_session.items():
+        failed = [r for r in recs if r.get("status") != "passed"]
+        if not failed:
+            reason = "All assertions passed" if len(recs) == 1 else f"All {len(recs)} tests passed"
+            statuses[sid] = ("passed", reason)
+            continue
+        if len(recs) == 1:
+            reason = failed[0].get("reason") or "failed"
+        else:
+            names = ", ".join(r["test"].rsplit("::", 1)[-1] for r in failed)
+            first = failed[0].get("reason") or ""
+            reason = f"{len(failed)}/{len(recs)} failed: {names}" + (f" | {first}" if first else "")
+        statuses[sid] = ("failed", reason[:_MAX_REASON])
+    return statuses
+
+
+# ---------- reporters ----------
+class BrowserStackReporter:
+    """REST reporter: one keep-alive pool, basic auth, PUT per session."""
+
+    def __init__(self, user=None, key=None, api_url=None, timeout=15):
+        self.user = user or os.environ.get("BROWSERSTACK_USERNAME")
+        self.key = key or os.environ.get("BROWSERSTACK_ACCESS_KEY")
+        self.api_url = (api_url or API_URL).rstrip("/")
+        self.http = urllib3.PoolManager(maxsize=4, timeout=urllib3.Timeout(connect=5, read=timeout),
+                                        retries=urllib3.Retry(total=3, backoff_factor=0.5,
+                                                              status_forcelist=(429, 500, 502, 503, 504),
+                                                              allowed_methods=None))
+        self.headers = urllib3.make_headers(basic_auth=f"{self.user}:{self.key}")
+        self.headers["Content-Type"] = "application/json"
+
+    def report(self, session_id, status, reason):
+        if not (self.user and self.key):
+            print("[session_status] BROWSERSTACK_USERNAME / BROWSERSTACK_ACCESS_KEY not set; nothing reported")
+            return False
+        body = json.dumps({"status": status, "reason": reason}).encode("utf-8")
+        try:
+            r = self.http.request("PUT", f"{self.api_url}/sessions/{session_id}.json", body=body, headers=self.headers)
+        except Exception as e:
+            print(f"[session_status] {session_id}: {type(e).__name__}: {e}")
+            return False
+        if r.status >= 300:
+            print(f"[session_status] {session_id}: HTTP {r.status} {r.data[:200]!r}")
+            return False
+        return True
+
+
+class LocalReporter:
+    """Stand-in for the REST API: merges the statuses into a JSON file."""
+
+    def __init__(self, path=None):
+        self.path = path or REPORT_PATH
+        self._lock = threading.Lock()
+
+    def report(self, session_id, status, reason):
+        with self._lock:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    reported = json.load(f)
+            except (OSError, ValueError):
+                reported = {}
+            reported[session_id] = {"status": status, "reason": reason}
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(reported, f, indent=2)
+            os.replace(tmp, self.path)
+        return True
+
+
+def get_reporter(name=None, user=None, key=None):
+    """
+    Reporter named by SESSION_STATUS_REPORTER (see module doc); None for "off". user/key are
+    the credentials the sessions were opened with (default: the environment).
+    """
+    name = name or os.environ.get("SESSION_STATUS_REPORTER", "browserstack")
+    if name == "off":
+        return None
+    if name == "browserstack":
+        return BrowserStackReporter(user, key)
+    if name == "local":
+        return LocalReporter()
+    module, _, attr = name.partition(":")
+    target = getattr(importlib.import_module(module), attr or "reporter")
+    return target() if isinstance(target, type) else target
+
+
+# ---------- flushing ----------
+def flush(reporter=None, path=None, workers=4):
+    """
+    Report every recorded session; returns (reported, failed). Records of sessions that
+    could not be reported are kept for the next flush, the rest are dropped.
+    """
+    path = path or RECORD_PATH
+    records = load_records(path)
+    if not records or reporter is None:
+        return 0, 0
+    statuses = fold(records)
+
+    def send(item):
+        sid, (status, reason) = item
+        try:
+            return sid, bool(reporter.report(sid, status, reason))
+        except Exception as e:
+            print(f"[session_status] {sid}: {type(e).__name__}: {e}")
+            return sid, False
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(statuses)))) as pool:
+        results = dict(pool.map(send, statuses.items()))
+    pending = {sid for sid, ok in results.items() if not ok}
+    with _lock:
+        # keep lines appended while we were reporting, and the sessions that failed to report
+        late = load_records(path)[len(records):]
+        keep = [r for r in records if r["session"] in pending] + late
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(r) + "\n" for r in keep)
+        os.replace(tmp, path)
+        if not keep:
+            os.remove(path)
+    return len(results) - len(pending), len(pending)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report recorded BrowserStack session statuses")
+    parser.add_argument("--path", default=RECORD_PATH)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("show")
+    fl = sub.add_parser("flush")
+    fl.add_argument("--reporter", default=None, help="browserstack | local | off | pkg.mod:attr")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "show":
+        for sid, (status, reason) in fold(load_records(args.path)).items():
+            print(f"{sid}  {status:6}  {reason}")
+        return
+    reported, failed = flush(get_reporter(args.reporter), args.path)
+    print(f"[session_status] {reported} session(s) reported, {failed} left for the next flush")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# utils/wd_trace.py
+"""
+Per-command latency tracing of the WebDriver channel (WD_TRACE=1).
+
+install_trace(driver) wraps driver.command_executor.execute (one call per W3C command)
+and its _request (one call per HTTP request, so redirects and re-sent requests show up
+as retries). Each command is recorded with its name, locator strategy, payload size,
+duration, retries and whether it failed. With WD_TRACE unset nothing is wrapped, so the
+channel runs exactly as before.
+
+CommandTrace.summary() aggregates the records of one test: round trips, network time,
+time spent in finds that came back empty (implicit-wait / polling misses), time spent
+outside the channel (sleeps, explicit-wait polling, client work) and the slowest commands.
+"""
+import json
+import os
+import threading
+import time
+
+TRACE_ENABLED = os.environ.get("WD_TRACE") == "1"
+
+_FIND_COMMANDS = {"findElement", "findElements", "findChildElement", "findChildElements"}
+
+
+class CommandTrace:
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._mark = 0
+        self._mark_time = time.time()
+
+    def begin(self):
+        """Start a new per-test window (records before it are kept but not summarized)."""
+        with self._lock:
+            self._mark = len(self.records)
+        self._mark_time = time.time()
+
+    def record(self, rec):
+        with self._lock:
+            self.records.append(rec)
+
+    def window(self):
+        with self._lock:
+            return list(self.records[self._mark:])
+
+    def summary(self, top=5):
+        recs = self.window()
+        wall_ms = (time.time() - self._mark_time) * 1000.0
+        network_ms = sum(r["ms"] for r in recs)
+        by_command = {}
+        for r in recs:
+            agg = by_command.setdefault(r["command"], {"count": 0, "total_ms": 0.0})
+            agg["count"] += 1
+            agg["total_ms"] = round(agg["total_ms"] + r["ms"], 1)
+        return {
+            "round_trips": len(recs),
+            "wall_ms": round(wall_ms, 1),
+            "network_ms": round(network_ms, 1),
+            "find_miss_ms": round(sum(r["ms"] for r in recs if r.get("miss")), 1),
+            "outside_channel_ms": round(max(wall_ms - network_ms, 0.0), 1),
+            "retries": sum(r["retries"] for r in recs),
+            "errors": sum(1 for r in recs if r["error"]),
+            "bytes_out": sum(r["bytes_out"] for r in recs),
+            "by_command": dict(sorted(by_command.items(), key=lambda kv: -kv[1]["total_ms"])),
+            "slowest": sorted(recs, key=lambda r: -r["ms"])[:top],
+        }
+
+
+def install_trace(driver):
+    """Wrap the driver's command executor when WD_TRACE=1; returns the CommandTrace or None."""
+    if not TRACE_ENABLED:
+        return None
+    existing = getattr(driver, "_wd_trace", None)
+    if existing is not None:
+        return existing
+    trace = CommandTrace()
+    executor = driver.command_executor
+    execute, request = executor.execute, executor._request
+
+    def traced_request(*args, **kwargs):
+        trace._local.requests = getattr(trace._local, "requests", 0) + 1
+        return request(*args, **kwargs)
+
+    def traced_execute(command, params):
+        using = params.get("using") if isinstance(params, dict) else None
+        bytes_out = len(json.dumps(params)) if params else 0
+        trace._local.requests = 0
+        started = time.time()
+        error = None
+        try:
+            response = execute(command, params)
+            return response
+        except Exception as e:
+            error = type(e).__name__
+            response = None
+            raise
+        finally:
+            ms = (time.time() - started) * 1000.0
+            value = response.get("value") if isinstance(response, dict) else None
+            if isinstance(response, dict) and response.get("status", 0) not in (0, None, 200):
+                error = error or str(response.get("status"))
+            trace.record({
+                "command": command,
+                "using": using,
+                "bytes_out": bytes_out,
+                "ms": round(ms, 1),
+                "retries": max(getattr(trace._local, "requests", 1) - 1, 0),
+                "error": error,
+                "miss": command in _FIND_COMMANDS and (value == [] or error is not None),
+                "t": round(started, 3),
+            })
+
+    executor._request = traced_request
+    executor.execute = traced_execute
+    driver._wd_trace = trace
+    return trace
+
+
+def trace_for(driver):
+    return getattr(driver, "_wd_trace", None)